@@ -0,0 +1,86 @@
+"""Compare the vectorized fleet analytics with the per-object methods.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_analytics --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import time
+from datetime import date
+
+import numpy as np
+
+from src.habit_tracker.analytics.fleet import FleetAnalytics
+from src.habit_tracker.trackers_main_classes import Habit
+
+PERIOD = 30
+CHUNK = 10000
+TODAY = date(2025, 2, 1)
+
+
+def synthetic_columns(count: int, seed: int = 0) -> tuple:
+    """Generate habits with a 30-day period and a random set of completed days."""
+    rng = np.random.default_rng(seed)
+    start = date(2025, 1, 1).toordinal() + rng.integers(0, 28, count)
+    completed = rng.random((count, PERIOD)) < rng.random((count, 1))
+    habit_index, offset = np.nonzero(completed)
+    return start, start + PERIOD - 1, habit_index, start[habit_index] + offset
+
+
+def vectorized(count: int) -> float:
+    """Time all the fleet statistics computed from the columns."""
+    start, end, habit_index, day = synthetic_columns(count)
+    began = time.perf_counter()
+    fleet = FleetAnalytics(range(count), start, end, habit_index, day)
+    fleet.completion_rates()
+    fleet.longest_streaks()
+    fleet.current_streaks(TODAY)
+    fleet.weekday_distribution()
+    fleet.cohort_percentiles()
+    return time.perf_counter() - began
+
+
+def per_object(count: int) -> float:
+    """Time the same statistics computed with a loop over Habit objects, chunk by chunk to bound memory."""
+    start, end, habit_index, day = synthetic_columns(count)
+    began = time.perf_counter()
+    bounds = np.searchsorted(habit_index, np.arange(count + 1))
+    for first in range(0, count, CHUNK):
+        habits = []
+        for index in range(first, min(first + CHUNK, count)):
+            habit = Habit('h', 'каждый день', date.fromordinal(start[index]), date.fromordinal(end[index]), index)
+            for ordinal in day[bounds[index] : bounds[index + 1]].tolist():
+                habit.mark_day(date.fromordinal(ordinal))
+            habits.append(habit)
+
+        rates = [habit.completion_rate() for habit in habits]
+        [habit.stats.longest_streak for habit in habits]
+        [habit.stats.current_streak(TODAY, habit.end_day) for habit in habits]
+        [[sum(1 for d in habit.completed_days if d.weekday() == w) for w in range(7)] for habit in habits]
+        np.percentile(rates, (25, 50, 75, 90))
+    return time.perf_counter() - began
+
+
+def main() -> None:
+    """Run the benchmark and print the timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"habits":>10} {"per-object, s":>15} {"vectorized, s":>15} {"speedup":>9}')
+    for count in args.sizes:
+        objects, columns = per_object(count), vectorized(count)
+        results.append({'habits': count, 'per_object_s': objects, 'vectorized_s': columns})
+        print(f'{count:>10} {objects:>15.3f} {columns:>15.3f} {objects / columns:>8.1f}x')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
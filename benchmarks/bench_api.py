@@ -0,0 +1,289 @@
+"""Load-test every endpoint in-process on a temporary database and time the core methods.
+
+Run from the repository root, comparing with a previous run:
+
+    python -m benchmarks.bench_api --users 200 --habits 5 --days 90 --json before.json
+    python -m benchmarks.bench_api --users 200 --habits 5 --days 90 --json after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+from importlib import import_module
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from src.habit_tracker.completions import run_lengths
+from src.habit_tracker.motivation.motivation import Motivation
+from src.habit_tracker.trackers_main_classes import Habit
+
+APP_MODULE = 'src.habit_tracker.models.fastapi_model'
+FIRST_DAY = date(2025, 1, 1)
+FREQUENCIES = ('каждый день', 'по будням', 'пн, ср, пт', 'через день', 'по выходным')
+DENSITY = 0.6
+BATCH_SIZE = 5000
+WARMUP = 20
+PERCENTILES = (50, 95, 99)
+TIMER_SAMPLES = 10000
+
+Request = Tuple[str, str, dict, Optional[dict]]
+
+
+def day_text(offset: int) -> str:
+    """Format the day of the seeded period in the 'dd-mm-yyyy' format of the API."""
+    return (FIRST_DAY + timedelta(days=offset)).strftime('%d-%m-%Y')
+
+
+def percentiles(samples: List[float], scale: float) -> Dict[str, float]:
+    """Return the p50, p95 and p99 of the samples multiplied by the scale."""
+    cuts = statistics.quantiles(samples, n=100, method='inclusive') if len(samples) > 1 else samples * 99
+    return {f'p{p}': cuts[p - 1] * scale for p in PERCENTILES}
+
+
+async def seed(client: httpx.AsyncClient, users: int, habits: int, days: int, rng: random.Random) -> List[tuple]:
+    """Register the users, add their habits and load the completions, return the (user_id, habit_name) pairs."""
+    owned = []
+    for number in range(users):
+        user_id = (await client.post('/users/', params={'name': f'Пользователь {number}'})).json()['user_id']
+        for habit in range(habits):
+            name = f'Привычка {habit}'
+            params = {
+                'habits_name': name,
+                'freq': FREQUENCIES[habit % len(FREQUENCIES)],
+                'start_day': day_text(0),
+                'end_day': day_text(days - 1),
+            }
+            await client.post(f'/users/{user_id}/habits/', params=params)
+            owned.append((user_id, name))
+    items = [
+        {'habit_name': name, 'day': day_text(offset), 'user_id': user_id}
+        for user_id, name in owned
+        for offset in range(days)
+        if rng.random() < DENSITY
+    ]
+    for first in range(0, len(items), BATCH_SIZE):
+        await client.post('/records/batch/', json={'items': items[first : first + BATCH_SIZE]})
+    return owned
+
+
+def scenarios(owned: List[tuple], days: int) -> Dict[str, Callable[[random.Random], Request]]:
+    """Describe how to make a random request to every endpoint."""
+
+    def habit(rng: random.Random, path: str, method: str = 'GET', **params: str) -> Request:
+        user_id, name = rng.choice(owned)
+        return method, f'/habits/{name}/{path}', {'user_id': user_id, **params}, None
+
+    def new_habit(rng: random.Random) -> Request:
+        params = {'habits_name': f'Новая {rng.getrandbits(64)}', 'freq': 'каждый день'}
+        params.update(start_day=day_text(0), end_day=day_text(days - 1))
+        return 'POST', f'/users/{rng.choice(owned)[0]}/habits/', params, None
+
+    def batch(rng: random.Random) -> Request:
+        user_id, name = rng.choice(owned)
+        items = [{'habit_name': name, 'day': day_text(rng.randrange(days)), 'user_id': user_id} for _ in range(100)]
+        return 'POST', '/records/batch/', {}, {'items': items}
+
+    return {
+        'root': lambda _rng: ('GET', '/', {}, None),
+        'root_per_user': lambda rng: ('GET', '/', {'user_id': rng.choice(owned)[0]}, None),
+        'register_user': lambda _rng: ('POST', '/users/', {'name': 'Иван'}, None),
+        'add_habit': new_habit,
+        'check': lambda rng: habit(rng, f'check/{day_text(rng.randrange(days))}'),
+        'mark': lambda rng: habit(rng, f'mark/{day_text(rng.randrange(days))}', 'POST'),
+        'unmark': lambda rng: habit(rng, f'mark/{day_text(rng.randrange(days))}', 'DELETE'),
+        'rate': lambda rng: habit(rng, 'rate'),
+        'habit_stats': lambda rng: habit(rng, 'stats'),
+        'user_stats': lambda rng: ('GET', f'/users/{rng.choice(owned)[0]}/stats', {}, None),
+        'create_record': lambda rng: habit(rng, 'records/', 'POST', day=day_text(rng.randrange(days)), mood='хорошее'),
+        'records_batch': batch,
+        'chart': lambda rng: habit(rng, f'charts/{rng.choice(("pie", "calendar", "trend"))}'),
+        'list_users': lambda _rng: ('GET', '/users/', {'limit': 100}, None),
+        'list_habits': lambda rng: ('GET', '/habits/', {'user_id': rng.choice(owned)[0]}, None),
+        'list_records': lambda rng: ('GET', '/records/', {'user_id': rng.choice(owned)[0], 'limit': 100}, None),
+        'habit_history': lambda rng: habit(rng, 'history', date_from=day_text(0), date_to=day_text(days - 1)),
+        'user_history': lambda rng: ('GET', f'/users/{rng.choice(owned)[0]}/history', {'encoding': 'rle'}, None),
+    }
+
+
+async def load(client: httpx.AsyncClient, requests: List[Request], concurrency: int) -> dict:
+    """Send the requests from concurrent workers and return the throughput, latency percentiles and status codes."""
+    pending = iter(requests)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker() -> None:
+        for method, path, params, body in pending:
+            began = time.perf_counter()
+            response = await client.request(method, path, params=params, json=body)
+            latencies.append(time.perf_counter() - began)
+            statuses[str(response.status_code)] += 1
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - began
+    return {
+        'requests': len(latencies),
+        'throughput_rps': len(latencies) / seconds,
+        **{f'{name}_ms': value for name, value in percentiles(latencies, 1000).items()},
+        'statuses': dict(statuses),
+    }
+
+
+async def endpoints(args: argparse.Namespace) -> Dict[str, dict]:
+    """Seed a temporary database through the API and load-test every endpoint."""
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['HABITS_DB_PATH'] = os.path.join(directory, 'habits.db')
+        module = import_module(APP_MODULE)
+        if os.path.dirname(module.db.db_path) != directory:
+            raise RuntimeError(f'The app was imported before the database path was set, it uses {module.db.db_path}')
+        app = module.app
+        transport = httpx.ASGITransport(app=app)
+        async with (
+            app.router.lifespan_context(app),
+            httpx.AsyncClient(transport=transport, base_url='http://bench') as client,
+        ):
+            rng = random.Random(args.seed)
+            began = time.perf_counter()
+            owned = await seed(client, args.users, args.habits, args.days, rng)
+            print(f'seeded {len(owned)} habits of {args.users} users in {time.perf_counter() - began:.1f} s')
+            results = {}
+            for name, make in scenarios(owned, args.days).items():
+                if args.only and name not in args.only:
+                    continue
+                await load(client, [make(rng) for _ in range(WARMUP)], 1)
+                requests = [make(rng) for _ in range(args.requests)]
+                results[name] = await load(client, requests, args.concurrency)
+            return results
+
+
+def timer_overhead() -> int:
+    """Return the median nanoseconds between two back-to-back reads of the clock, taken off every timed call."""
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(TIMER_SAMPLES):
+        began = clock()
+        samples.append(clock() - began)
+    return int(statistics.median(samples))
+
+
+def micro(calls: int, seed: int) -> Dict[str, dict]:
+    """Time every call of the core methods and return the calls per second and the percentiles of a call in ns."""
+    rng = random.Random(seed)
+    period = 365
+    end_day = FIRST_DAY + timedelta(days=period - 1)
+    days = [day_text(rng.randrange(period)) for _ in range(calls)]
+    habit = Habit('Бег', 'каждый день', FIRST_DAY, end_day, 1)
+    for day in days[::2]:
+        habit.completion_mark(day)
+    fresh = Habit('Бег', 'каждый день', FIRST_DAY, end_day, 1)
+    motivation = Motivation()
+    heatmap = [Habit(f'Привычка {number}', 'каждый день', FIRST_DAY, end_day, 1) for number in range(20)]
+    for number, day in enumerate(days[: 20 * period // 2]):
+        heatmap[number % 20].completion_mark(day)
+    cases = {
+        'completion_mark': fresh.completion_mark,
+        'is_complited': habit.is_complited,
+        'completion_rate': lambda _day: habit.completion_rate(),
+        'give_random_quote': lambda _day: motivation.give_random_quote(),
+        'year_heatmap': lambda _day: [
+            (
+                run_lengths(habit.completed_days.bits_between(FIRST_DAY, end_day), period),
+                run_lengths(habit.scheduled_bits(FIRST_DAY, end_day), period),
+            )
+            for habit in heatmap
+        ],
+    }
+    clock = time.perf_counter_ns
+    overhead = timer_overhead()
+    results = {}
+    for name, function in cases.items():
+        per_call = []
+        for day in days:
+            began = clock()
+            function(day)
+            per_call.append(max(clock() - began - overhead, 0))
+        total = sum(per_call)
+        results[name] = {
+            'calls': calls,
+            'calls_per_s': calls / total * 1e9 if total else 0.0,
+            **{f'{key}_ns': value for key, value in percentiles(per_call, 1).items()},
+        }
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """Return the current commit of the repository, if there is one."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Print the throughput and the p99 of this run relative to the baseline run."""
+    print(f'\ncompared with {baseline.get("commit")}: throughput ratio, p99 ratio (lower is better)')
+    for section, rate, tail in (('endpoints', 'throughput_rps', 'p99_ms'), ('micro', 'calls_per_s', 'p99_ns')):
+        for name, current in results[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before and before[rate] and before[tail]:
+                print(f'{name:>18}: {current[rate] / before[rate]:6.2f}x {current[tail] / before[tail]:6.2f}x')
+
+
+def main() -> None:
+    """Run the benchmarks and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--habits', type=int, default=5, help='habits of every user')
+    parser.add_argument('--days', type=int, default=90, help='days in the period of every habit')
+    parser.add_argument('--requests', type=int, default=2000, help='requests to every endpoint')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--micro-calls', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='*', help='load-test only these endpoints')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results of a previous run to compare with')
+    args = parser.parse_args()
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('json', 'compare')},
+        'endpoints': asyncio.run(endpoints(args)),
+        'micro': micro(args.micro_calls, args.seed),
+    }
+
+    print(f'{"endpoint":>18} {"req/s":>10} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}  statuses')
+    for name, stats in results['endpoints'].items():
+        print(
+            f'{name:>18} {stats["throughput_rps"]:>10,.0f} {stats["p50_ms"]:>8.2f} {stats["p95_ms"]:>8.2f} '
+            f'{stats["p99_ms"]:>8.2f}  {stats["statuses"]}'
+        )
+    print(f'\n{"method":>18} {"calls/s":>12} {"p50 ns":>8} {"p95 ns":>8} {"p99 ns":>8}')
+    for name, stats in results['micro'].items():
+        print(
+            f'{name:>18} {stats["calls_per_s"]:>12,.0f} {stats["p50_ns"]:>8.0f} {stats["p95_ns"]:>8.0f} '
+            f'{stats["p99_ns"]:>8.0f}'
+        )
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(results, json.load(file))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
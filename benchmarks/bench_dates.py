@@ -0,0 +1,76 @@
+"""Compare the fast day parser with datetime.strptime on the check and mark paths.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dates --calls 200000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, List
+
+from src.habit_tracker.dates import parse_day
+from src.habit_tracker.trackers_main_classes import Habit
+
+FIRST_DAY = date(2025, 1, 1)
+PERIOD = 365
+
+
+def calls_per_second(function: Callable[[str], object], days: List[str]) -> float:
+    """Call the function with every day and return the number of calls per second."""
+    began = time.perf_counter()
+    for day in days:
+        function(day)
+    return len(days) / (time.perf_counter() - began)
+
+
+def main() -> None:
+    """Run the benchmark and print the throughput."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    days = [(FIRST_DAY + timedelta(days=rng.randrange(PERIOD))).strftime('%d-%m-%Y') for _ in range(args.calls)]
+    habit = Habit('Бег', 'каждый день', FIRST_DAY, FIRST_DAY + timedelta(days=PERIOD - 1), 1)
+
+    def strptime_check(day: str) -> bool:
+        return datetime.strptime(day, '%d-%m-%Y').date() in habit.completed_days
+
+    strptime_habit, fast_habit = (Habit('Бег', 'каждый день', FIRST_DAY, habit.end_day, 1) for _ in range(2))
+
+    def strptime_mark(day: str) -> bool:
+        return strptime_habit.mark_day(datetime.strptime(day, '%d-%m-%Y').date())
+
+    results = {
+        'parse': {
+            'strptime': calls_per_second(lambda day: datetime.strptime(day, '%d-%m-%Y').date(), days),
+            'fast_uncached': calls_per_second(parse_day.__wrapped__, days),
+            'fast_cached': calls_per_second(parse_day, days),
+        },
+        'check': {
+            'strptime': calls_per_second(strptime_check, days),
+            'fast': calls_per_second(habit.is_complited, days),
+        },
+        'mark': {
+            'strptime': calls_per_second(strptime_mark, days),
+            'fast': calls_per_second(fast_habit.completion_mark, days),
+        },
+    }
+
+    for operation, timings in results.items():
+        baseline = timings['strptime']
+        for variant, rate in timings.items():
+            print(f'{operation:>6} {variant:>14}: {rate:>12,.0f} calls/s {rate / baseline:>6.1f}x')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
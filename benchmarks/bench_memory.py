@@ -0,0 +1,152 @@
+"""Compare the memory taken by the compact Habit, User and Record with the plain classes they replaced.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory --records 1000000
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, List
+from uuid import uuid4
+
+from src.habit_tracker.analytics.aggregates import HabitStats
+from src.habit_tracker.completions import CompletionDays
+from src.habit_tracker.trackers_main_classes import Habit, Record, User
+
+RECORDS_PER_HABIT = 100
+HABITS_PER_USER = 5
+FIRST_DAY = date(2025, 1, 1)
+
+
+class PlainUser:
+    """The user as it was before: attributes in __dict__ and the id as a string."""
+
+    def __init__(self, name: str):
+        """Initialize the user."""
+        self.user_name = name
+        self.user_id = str(uuid4())
+        self.user_habits = set()
+
+
+class PlainHabit:
+    """The habit as it was before, with the records list attached on the first record."""
+
+    def __init__(self, name: str, user_id: str):
+        """Initialize the habit."""
+        self.habit_name = name
+        self.frequency = 'каждый день'
+        self.start_day = FIRST_DAY
+        self.end_day = FIRST_DAY + timedelta(days=RECORDS_PER_HABIT - 1)
+        self.completed_days = CompletionDays(FIRST_DAY)
+        self.stats = HabitStats()
+        self.version = 0
+        self.user_id = user_id
+        self.habit_id = str(uuid4())
+
+
+class PlainRecord:
+    """The record as it was before."""
+
+    def __init__(self, habit: PlainHabit, day: date):
+        """Initialize the record."""
+        self.record_id = str(uuid4())
+        self.habit = habit
+        self.day = day
+        self.mood = ''
+        self.notes = ''
+
+
+def build_plain(records: int) -> List[PlainUser]:
+    """Build users with habits and records out of the plain classes."""
+    users = []
+    for habit_number in range(records // RECORDS_PER_HABIT):
+        if habit_number % HABITS_PER_USER == 0:
+            users.append(PlainUser('Иван'))
+        habit = PlainHabit(f'Привычка {habit_number % HABITS_PER_USER}', users[-1].user_id)
+        habit.records = []
+        for offset in range(RECORDS_PER_HABIT):
+            habit.records.append(PlainRecord(habit, date.fromordinal(FIRST_DAY.toordinal() + offset)))
+        users[-1].user_habits.add(habit)
+    return users
+
+
+def build_compact(records: int) -> List[User]:
+    """Build the same users with habits and records out of the current classes."""
+    users = []
+    for habit_number in range(records // RECORDS_PER_HABIT):
+        if habit_number % HABITS_PER_USER == 0:
+            users.append(User('Иван'))
+        end_day = FIRST_DAY + timedelta(days=RECORDS_PER_HABIT - 1)
+        name = f'Привычка {habit_number % HABITS_PER_USER}'
+        habit = Habit(name, 'каждый день', FIRST_DAY, end_day, users[-1].user_id)
+        for offset in range(RECORDS_PER_HABIT):
+            habit.records.append(Record(habit, date.fromordinal(FIRST_DAY.toordinal() + offset)))
+        users[-1].add_habit(habit)
+    return users
+
+
+def measure(build: Callable[[int], list], count: int) -> int:
+    """Return the bytes allocated by the objects the function builds and keeps."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build(count)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return allocated
+
+
+def per_object(count: int) -> dict:
+    """Return the bytes taken by one object of every class, plain and compact."""
+    plain_habit = PlainHabit('Бег', 'u')
+    plain_habit.records = []
+    compact_habit = Habit('Бег', 'каждый день', FIRST_DAY, FIRST_DAY, 1)
+    builders = {
+        'user': (lambda n: [PlainUser('Иван') for _ in range(n)], lambda n: [User('Иван') for _ in range(n)]),
+        'habit': (
+            lambda n: [PlainHabit('Бег', 'u') for _ in range(n)],
+            lambda n: [Habit('Бег', 'каждый день', FIRST_DAY, FIRST_DAY, 1) for _ in range(n)],
+        ),
+        'record': (
+            lambda n: [PlainRecord(plain_habit, FIRST_DAY) for _ in range(n)],
+            lambda n: [Record(compact_habit, FIRST_DAY) for _ in range(n)],
+        ),
+    }
+    return {
+        name: {'plain': measure(plain, count) / count, 'compact': measure(compact, count) / count}
+        for name, (plain, compact) in builders.items()
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print the bytes per record."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=1000000)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    plain, compact = measure(build_plain, args.records), measure(build_compact, args.records)
+    results = {
+        'records': args.records,
+        'plain_bytes_per_record': plain / args.records,
+        'compact_bytes_per_record': compact / args.records,
+    }
+    results['bytes_per_object'] = per_object(min(args.records, 100000))
+    for name, sizes in results['bytes_per_object'].items():
+        print(f'{name:>7}: {sizes["plain"]:8.1f} bytes before, {sizes["compact"]:8.1f} bytes after')
+    print(f'{args.records} records in {args.records // RECORDS_PER_HABIT} habits:')
+    print(f'  plain classes:   {plain / args.records:8.1f} bytes per record, {plain / 2**20:8.1f} MiB')
+    print(f'  compact classes: {compact / args.records:8.1f} bytes per record, {compact / 2**20:8.1f} MiB')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Measure the import time and memory of the API and of the uvicorn worker serving it.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --runs 5 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+APP_MODULE = 'src.habit_tracker.models.fastapi_model'
+HEAVY_MODULES = ('matplotlib', 'numpy', 'vaderSentiment')
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| *(\S+)')
+READY_TIMEOUT = 30.0
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Import the module in a fresh interpreter and return the cumulative microseconds of every import it made."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and not module.startswith(match.group(3)):
+            times[match.group(3)] = int(match.group(2))
+    return times
+
+
+def import_footprint(module: str) -> dict:
+    """Import the module in a fresh interpreter and report the peak RSS and which heavy packages were loaded."""
+    code = (
+        'import json, resource, sys, time\n'
+        'began = time.perf_counter()\n'
+        f'import {module}\n'
+        'print(json.dumps({"seconds": time.perf_counter() - began,'
+        ' "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,'
+        f' "heavy": [name for name in {HEAVY_MODULES!r} if name in sys.modules]}}))'
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def free_port() -> int:
+    """Ask the OS for a free TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    """Read the resident memory of the process, only available on Linux."""
+    try:
+        with open(f'/proc/{pid}/status', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def server_startup() -> dict:
+    """Start uvicorn with the app on a temporary database and time it until the first response."""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, HABITS_DB_PATH=os.path.join(directory, 'habits.db'))
+        began = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', f'{APP_MODULE}:app', '--port', str(port), '--log-level', 'warning'],
+            env=env,
+        )
+        try:
+            while True:
+                try:
+                    with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1):
+                        break
+                except OSError:
+                    if time.perf_counter() - began > READY_TIMEOUT or server.poll() is not None:
+                        raise RuntimeError('uvicorn did not start') from None
+                    time.sleep(0.01)
+            return {'first_response_s': time.perf_counter() - began, 'rss_kb': rss_kb(server.pid)}
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def median_of(samples: List[dict], key: str) -> Optional[float]:
+    """Return the median of the key over the samples that have it."""
+    values = [sample[key] for sample in samples if sample.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='number of the slowest imports to show')
+    parser.add_argument('--no-server', action='store_true', help='do not start uvicorn')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    timings = [import_times(APP_MODULE) for _ in range(args.runs)]
+    slowest = {name: statistics.median(run.get(name, 0) for run in timings) for name in timings[0]}
+    footprints = [import_footprint(APP_MODULE) for _ in range(args.runs)]
+    servers = [] if args.no_server else [server_startup() for _ in range(args.runs)]
+    results = {
+        'import_s': median_of(footprints, 'seconds'),
+        'import_max_rss_kb': median_of(footprints, 'max_rss_kb'),
+        'heavy_modules_loaded': footprints[0]['heavy'],
+        'slowest_imports_us': dict(sorted(slowest.items(), key=lambda item: -item[1])[: args.top]),
+        'server_first_response_s': median_of(servers, 'first_response_s'),
+        'server_rss_kb': median_of(servers, 'rss_kb'),
+    }
+
+    print(f'import {APP_MODULE}: {results["import_s"]:.3f} s, peak RSS {results["import_max_rss_kb"]} KB')
+    print(f'heavy packages loaded at import: {", ".join(results["heavy_modules_loaded"]) or "none"}')
+    for name, microseconds in results['slowest_imports_us'].items():
+        print(f'{microseconds / 1000:>10.1f} ms  {name}')
+    if servers:
+        print(f'uvicorn first response: {results["server_first_response_s"]:.3f} s, RSS {results["server_rss_kb"]} KB')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
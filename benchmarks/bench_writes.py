@@ -0,0 +1,86 @@
+"""Compare the sustained throughput of completion marks written right away and with the group commit.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_writes --marks 20000 --writers 64 --shards 1 2 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from typing import List
+
+from src.habit_tracker.ids import format_id, new_id
+from src.habit_tracker.models import queries
+from src.habit_tracker.models.sharding import make_storage, make_writes
+from src.habit_tracker.trackers_main_classes import Habit
+
+FIRST_DAY = date(2025, 1, 1)
+PERIOD = 365
+
+
+async def run(mode: str, durable: bool, marks: int, writers: int, shards: int) -> float:
+    """Write the marks from concurrent writers and return the marks per second until all are committed."""
+    with tempfile.TemporaryDirectory() as directory:
+        db = make_storage(os.path.join(directory, 'habits.db'), shards)
+        await db.open()
+        habits: List[Habit] = [
+            Habit(f'Привычка {number}', 'каждый день', FIRST_DAY, FIRST_DAY + timedelta(days=PERIOD - 1), new_id())
+            for number in range(writers)
+        ]
+        writes = make_writes(db, mode)
+        writes.start()
+
+        async def writer(habit: Habit, count: int) -> None:
+            lane = writes.shard(format_id(habit.user_id))
+            for offset in range(count):
+                day = FIRST_DAY + timedelta(days=offset % PERIOD)
+                habit.mark_day(day)
+                params = (uuid.uuid4().hex[:8], day.isoformat(), format_id(habit.habit_id))
+                await lane.execute(queries.INSERT_MARK, params, [habit], durable)
+
+        began = time.perf_counter()
+        await asyncio.gather(*(writer(habit, marks // writers) for habit in habits))
+        await writes.close()
+        seconds = time.perf_counter() - began
+        await db.close()
+        return marks // writers * writers / seconds
+
+
+def main() -> None:
+    """Run the benchmark and print the throughput."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--marks', type=int, default=20000)
+    parser.add_argument('--writers', type=int, default=64, help='concurrent requests')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1], help='numbers of shards to compare')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    variants = {
+        'immediate': ('immediate', True),
+        'write_behind_durable': ('write-behind', True),
+        'write_behind': ('write-behind', False),
+    }
+    results = {
+        f'{name}_{shards}_shards' if len(args.shards) > 1 else name: asyncio.run(
+            run(mode, durable, args.marks, args.writers, shards)
+        )
+        for shards in args.shards
+        for name, (mode, durable) in variants.items()
+    }
+    baseline = next(iter(results.values()))
+    for name, rate in results.items():
+        print(f'{name:>31}: {rate:>10,.0f} marks/s {rate / baseline:>6.1f}x')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
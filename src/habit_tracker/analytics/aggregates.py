@@ -0,0 +1,253 @@
+import json
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from src.habit_tracker.schedules import DAILY, Schedule
+
+
+def week_key(day: date) -> str:
+    """
+    Return the ISO week of the day.
+
+    Args:
+        day (date): the day
+
+    Returns:
+        str: the week in the 'yyyy-Www' format
+    """
+    year, week, _ = day.isocalendar()
+    return f'{year}-W{week:02d}'
+
+
+def month_key(day: date) -> str:
+    """
+    Return the month of the day.
+
+    Args:
+        day (date): the day
+
+    Returns:
+        str: the month in the 'yyyy-mm' format
+    """
+    return f'{day.year}-{day.month:02d}'
+
+
+class HabitStats:
+    """Aggregates of a habit's completions kept up to date on every change."""
+
+    __slots__ = (
+        '_lengths',
+        '_run_ends',
+        '_run_starts',
+        'completed',
+        'last_day',
+        'longest_streak',
+        'monthly',
+        'schedule',
+        'scheduled_completed',
+        'weekly',
+    )
+
+    def __init__(self, schedule: Schedule = DAILY):
+        """
+        Initialize the HabitStats without completions.
+
+        Args:
+            schedule (Schedule): the compiled frequency of the habit
+
+        Returns:
+            None
+        """
+        self.schedule = schedule
+        self.completed = 0
+        self.scheduled_completed = 0
+        self.longest_streak = 0
+        self.last_day: Optional[int] = None
+        self.weekly: Dict[str, int] = {}
+        self.monthly: Dict[str, int] = {}
+        self._run_ends: Dict[int, int] = {}
+        self._run_starts: Dict[int, int] = {}
+        self._lengths: Counter = Counter()
+
+    @classmethod
+    def from_days(cls, days: Iterable[date], schedule: Schedule = DAILY) -> 'HabitStats':
+        """
+        Build the aggregates of the completed days.
+
+        Args:
+            days (Iterable[date]): distinct completed days
+            schedule (Schedule): the compiled frequency of the habit
+
+        Returns:
+            HabitStats: the aggregates
+        """
+        stats = cls(schedule)
+        for day in days:
+            stats.add(day)
+        return stats
+
+    @classmethod
+    def from_row(cls, row: tuple, schedule: Schedule = DAILY) -> 'HabitStats':
+        """
+        Restore the aggregates from the columns of the habit_stats table, without the completed days.
+
+        Args:
+            row (tuple): the columns as returned by to_row
+            schedule (Schedule): the compiled frequency of the habit
+
+        Returns:
+            HabitStats: the aggregates
+        """
+        completed, _, _, _, weekly, monthly, runs = row
+        stats = cls(schedule)
+        stats.completed = completed
+        stats.weekly = json.loads(weekly)
+        stats.monthly = json.loads(monthly)
+        for start, end in json.loads(runs):
+            stats._keep_run(start, end)
+            stats.scheduled_completed += end - start + 1
+        if stats._run_starts:
+            stats.last_day = schedule.day_at(max(stats._run_starts))
+        return stats
+
+    def add(self, day: date) -> None:
+        """
+        Count a newly completed day.
+
+        Args:
+            day (date): the day that was not completed before
+
+        Returns:
+            None
+        """
+        self.completed += 1
+        self.weekly[week_key(day)] = self.weekly.get(week_key(day), 0) + 1
+        self.monthly[month_key(day)] = self.monthly.get(month_key(day), 0) + 1
+        ordinal = day.toordinal()
+        if not self.schedule.is_scheduled(ordinal):
+            return
+
+        position = self.schedule.position(ordinal)
+        start = self._run_starts.pop(position - 1, None)
+        end = self._run_ends.pop(position + 1, None)
+        if start is not None:
+            del self._run_ends[start]
+            self._forget_length(position - start)
+        else:
+            start = position
+        if end is not None:
+            del self._run_starts[end]
+            self._forget_length(end - position)
+        else:
+            end = position
+        self._keep_run(start, end)
+
+        self.scheduled_completed += 1
+        if self.last_day is None or ordinal > self.last_day:
+            self.last_day = ordinal
+
+    def remove(self, day: date) -> None:
+        """
+        Stop counting a day that is no longer completed.
+
+        Args:
+            day (date): the previously completed day
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: the day is not completed
+        """
+        ordinal = day.toordinal()
+        if self.schedule.is_scheduled(ordinal):
+            self._remove_position(day, self.schedule.position(ordinal))
+        elif not self.completed:
+            raise ValueError(f'{day} is not completed')
+
+        self.completed -= 1
+        for counts, key in ((self.weekly, week_key(day)), (self.monthly, month_key(day))):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+
+    def _remove_position(self, day: date, position: int) -> None:
+        start = next((s for s in range(position, position - self.longest_streak, -1) if s in self._run_ends), None)
+        if start is None or self._run_ends[start] < position:
+            raise ValueError(f'{day} is not completed')
+        end = self._run_ends.pop(start)
+        del self._run_starts[end]
+        self._forget_length(end - start + 1)
+        if start < position:
+            self._keep_run(start, position - 1)
+        if position < end:
+            self._keep_run(position + 1, end)
+
+        self.scheduled_completed -= 1
+        self.longest_streak = max(self._lengths, default=0)
+        if day.toordinal() == self.last_day:
+            last = max(self._run_starts, default=None)
+            self.last_day = None if last is None else self.schedule.day_at(last)
+
+    def _keep_run(self, start: int, end: int) -> None:
+        self._run_ends[start] = end
+        self._run_starts[end] = start
+        self._lengths[end - start + 1] += 1
+        self.longest_streak = max(self.longest_streak, end - start + 1)
+
+    def _forget_length(self, length: int) -> None:
+        self._lengths[length] -= 1
+        if not self._lengths[length]:
+            del self._lengths[length]
+
+    @property
+    def last_run_length(self) -> int:
+        """
+        Return the length of the run of scheduled days that ends on the latest completed one.
+
+        Returns:
+            int: number of consecutive completed scheduled days
+        """
+        if self.last_day is None:
+            return 0
+        last = self.schedule.position(self.last_day)
+        return last - self._run_starts[last] + 1
+
+    def to_row(self) -> tuple:
+        """
+        Convert the aggregates to the columns of the habit_stats table.
+
+        Returns:
+            tuple: completed, longest_streak, last_day, last_run_length, weekly, monthly and the runs
+                of completed scheduled days as pairs of positions
+        """
+        last_day = None if self.last_day is None else date.fromordinal(self.last_day).isoformat()
+        return (
+            self.completed,
+            self.longest_streak,
+            last_day,
+            self.last_run_length,
+            json.dumps(self.weekly),
+            json.dumps(self.monthly),
+            json.dumps(sorted(self._run_ends.items())),
+        )
+
+    def current_streak(self, today: date, end_day: date) -> int:
+        """
+        Return the number of consecutive completed scheduled days up to today.
+
+        Args:
+            today (date): the current day
+            end_day (date): the final day of the habit, the streak can not be broken after it
+
+        Returns:
+            int: the current streak
+        """
+        if self.last_day is None:
+            return 0
+        reference = min(today, end_day).toordinal()
+        required = self.schedule.count_until(reference) - 1 - self.schedule.is_scheduled(reference)
+        if self.schedule.position(self.last_day) < required:
+            return 0
+        return self.last_run_length
@@ -0,0 +1,237 @@
+import sqlite3
+from contextlib import closing
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.habit_tracker.ids import format_id
+from src.habit_tracker.schedules import DAILY, DAYS_IN_WEEK, Schedule, compile_frequency
+from src.habit_tracker.trackers_main_classes import Habit
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+COHORT_PERCENTILES = (25, 50, 75, 90)
+POPCOUNT = np.array([mask.bit_count() for mask in range(1 << DAYS_IN_WEEK)])
+
+
+class FleetAnalytics:
+    """Statistics of many habits at once computed over columnar arrays."""
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        habit_ids: Sequence[str],
+        start: np.ndarray,
+        end: np.ndarray,
+        habit_index: np.ndarray,
+        day: np.ndarray,
+        schedules: Optional[Sequence[Schedule]] = None,
+    ):
+        """
+        Initialize the FleetAnalytics.
+
+        Args:
+            habit_ids (Sequence[str]): IDs of the habits
+            start (np.ndarray): ordinal of the first day of every habit
+            end (np.ndarray): ordinal of the final day of every habit
+            habit_index (np.ndarray): index of the habit of every completion
+            day (np.ndarray): ordinal of the day of every completion
+            schedules (Optional[Sequence[Schedule]]): anchored schedule of every habit, daily if not specified
+
+        Returns:
+            None
+        """
+        self.habit_ids = list(habit_ids)
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        columns = np.array(schedules if schedules is not None else [DAILY] * len(self.habit_ids), dtype=np.int64)
+        self.mask, self.interval, self.anchor = columns.reshape(-1, 3).T
+        habit_index = np.asarray(habit_index, dtype=np.int64)
+        day = np.asarray(day, dtype=np.int64)
+
+        inside = (day >= self.start[habit_index]) & (day <= self.end[habit_index])
+        habit_index, day = habit_index[inside], day[inside]
+        order = np.lexsort((day, habit_index))
+        habit_index, day = habit_index[order], day[order]
+        distinct = np.ones(len(day), dtype=bool)
+        distinct[1:] = (habit_index[1:] != habit_index[:-1]) | (day[1:] != day[:-1])
+        self.habit_index = habit_index[distinct]
+        self.day = day[distinct]
+        self.scheduled = self._is_scheduled(self.day, self.habit_index)
+        self.position = self._count_until(self.day, self.habit_index) - 1
+
+    def _count_until(self, ordinal: np.ndarray, habits: np.ndarray) -> np.ndarray:
+        mask, interval, anchor = self.mask[habits], self.interval[habits], self.anchor[habits]
+        weeks, rest = np.divmod(ordinal, DAYS_IN_WEEK)
+        weekly = np.where(ordinal > 0, weeks * POPCOUNT[mask] + POPCOUNT[mask & ((1 << rest) - 1)], 0)
+        every = np.maximum(0, (ordinal - anchor) // np.maximum(interval, 1) + 1)
+        return np.where(interval > 0, every, weekly)
+
+    def _is_scheduled(self, ordinal: np.ndarray, habits: np.ndarray) -> np.ndarray:
+        mask, interval, anchor = self.mask[habits], self.interval[habits], self.anchor[habits]
+        weekly = (mask >> ((ordinal - 1) % DAYS_IN_WEEK)) & 1 == 1
+        every = (ordinal >= anchor) & ((ordinal - anchor) % np.maximum(interval, 1) == 0)
+        return np.where(interval > 0, every, weekly)
+
+    @classmethod
+    def from_habits(cls, habits: Iterable[Habit]) -> 'FleetAnalytics':
+        """
+        Collect the completions of the habits into columns.
+
+        Args:
+            habits (Iterable[Habit]): the habits
+
+        Returns:
+            FleetAnalytics: the analytics of the habits
+        """
+        habit_ids: List[str] = []
+        start: List[int] = []
+        end: List[int] = []
+        habit_index: List[int] = []
+        day: List[int] = []
+        schedules: List[Schedule] = []
+        for index, habit in enumerate(habits):
+            habit_ids.append(format_id(habit.habit_id))
+            start.append(habit.start_day.toordinal())
+            end.append(habit.end_day.toordinal())
+            schedules.append(habit.schedule)
+            for completed in habit.completed_days:
+                habit_index.append(index)
+                day.append(completed.toordinal())
+        return cls(habit_ids, np.array(start), np.array(end), np.array(habit_index), np.array(day), schedules)
+
+    @classmethod
+    def from_database(cls, db_path: str) -> 'FleetAnalytics':
+        """
+        Read the habits and their records from the database into columns.
+
+        Args:
+            db_path (str): path to the SQLite database file
+
+        Returns:
+            FleetAnalytics: the analytics of all the stored habits
+        """
+        with closing(sqlite3.connect(db_path)) as conn:
+            habits = conn.execute('SELECT id, start_date, end_date, frequency FROM habits').fetchall()
+            positions: Dict[str, int] = {row[0]: index for index, row in enumerate(habits)}
+            records = conn.execute('SELECT habit_id, date FROM records').fetchall()
+        records = [(positions[habit_id], day) for habit_id, day in records if habit_id in positions]
+        start = np.fromiter((date.fromisoformat(row[1][:10]).toordinal() for row in habits), np.int64, len(habits))
+        return cls(
+            [row[0] for row in habits],
+            start,
+            np.fromiter((date.fromisoformat(row[2][:10]).toordinal() for row in habits), np.int64, len(habits)),
+            np.fromiter((row[0] for row in records), np.int64, len(records)),
+            np.fromiter((date.fromisoformat(row[1][:10]).toordinal() for row in records), np.int64, len(records)),
+            [compile_frequency(row[3]).anchored(int(first)) for row, first in zip(habits, start)],
+        )
+
+    def completed(self) -> np.ndarray:
+        """
+        Count the completed days of every habit.
+
+        Returns:
+            np.ndarray: number of completed days
+        """
+        return np.bincount(self.habit_index, minlength=len(self.habit_ids))
+
+    def completion_rates(self) -> np.ndarray:
+        """
+        Calculate the percentage of completed scheduled days of every habit, like Habit.completion_rate.
+
+        Returns:
+            np.ndarray: percentages rounded to two decimal places
+        """
+        habits = np.arange(len(self.habit_ids))
+        total = self._count_until(self.end, habits) - self._count_until(self.start - 1, habits)
+        completed = np.bincount(self.habit_index[self.scheduled], minlength=len(self.habit_ids))
+        rates = np.zeros(len(self.habit_ids))
+        positive = total > 0
+        rates[positive] = np.round(completed[positive] / total[positive] * 100, 2)
+        return rates
+
+    def due_on(self, day: date) -> np.ndarray:
+        """
+        Find the habits scheduled on the day, like Habit.is_due.
+
+        Args:
+            day (date): the day
+
+        Returns:
+            np.ndarray: True for every habit that is due on the day
+        """
+        ordinal = np.full(len(self.habit_ids), day.toordinal())
+        inside = (self.start <= ordinal) & (ordinal <= self.end)
+        return inside & self._is_scheduled(ordinal, np.arange(len(self.habit_ids)))
+
+    def _runs(self) -> tuple:
+        habit_index, position = self.habit_index[self.scheduled], self.position[self.scheduled]
+        if not len(position):
+            return habit_index, position, position
+        run_start = np.ones(len(position), dtype=bool)
+        run_start[1:] = (habit_index[1:] != habit_index[:-1]) | (position[1:] != position[:-1] + 1)
+        lengths = np.diff(np.append(np.flatnonzero(run_start), len(position)))
+        run_habit = habit_index[run_start]
+        run_last_position = position[np.append(np.flatnonzero(run_start)[1:], len(position)) - 1]
+        return run_habit, lengths, run_last_position
+
+    def longest_streaks(self) -> np.ndarray:
+        """
+        Find the longest run of consecutive completed scheduled days of every habit.
+
+        Returns:
+            np.ndarray: the longest streaks
+        """
+        run_habit, lengths, _ = self._runs()
+        longest = np.zeros(len(self.habit_ids), dtype=np.int64)
+        np.maximum.at(longest, run_habit, lengths)
+        return longest
+
+    def current_streaks(self, today: date) -> np.ndarray:
+        """
+        Find the current streak of every habit, like HabitStats.current_streak.
+
+        Args:
+            today (date): the current day
+
+        Returns:
+            np.ndarray: the current streaks
+        """
+        run_habit, lengths, run_last_position = self._runs()
+        current = np.zeros(len(self.habit_ids), dtype=np.int64)
+        if not len(run_habit):
+            return current
+        last_run = np.append(run_habit[1:] != run_habit[:-1], True)
+        habits, last_position, length = run_habit[last_run], run_last_position[last_run], lengths[last_run]
+        reference = np.minimum(today.toordinal(), self.end[habits])
+        required = self._count_until(reference, habits) - 1 - self._is_scheduled(reference, habits)
+        alive = last_position >= required
+        current[habits[alive]] = length[alive]
+        return current
+
+    def weekday_distribution(self) -> np.ndarray:
+        """
+        Count the completed days of every habit by the day of the week.
+
+        Returns:
+            np.ndarray: matrix with a row per habit and columns from Monday to Sunday
+        """
+        weekday = (self.day - 1) % 7
+        counts = np.bincount(self.habit_index * 7 + weekday, minlength=len(self.habit_ids) * 7)
+        return counts.reshape(len(self.habit_ids), 7)
+
+    def cohort_percentiles(self, percentiles: Sequence[float] = COHORT_PERCENTILES) -> Dict[str, np.ndarray]:
+        """
+        Calculate the percentiles of the completion rates of the habits grouped by their start month.
+
+        Args:
+            percentiles (Sequence[float]): the percentiles to calculate
+
+        Returns:
+            Dict[str, np.ndarray]: percentiles of every cohort keyed by the 'yyyy-mm' month
+        """
+        months = (self.start - UNIX_EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]')
+        rates = self.completion_rates()
+        order = np.argsort(months, kind='stable')
+        cohorts, first = np.unique(months[order], return_index=True)
+        groups = np.split(rates[order], first[1:])
+        return {str(cohort): np.percentile(group, percentiles) for cohort, group in zip(cohorts, groups)}
@@ -0,0 +1,189 @@
+from datetime import date, timedelta
+from typing import Iterator, List
+
+
+class CompletionDays:
+    """Set of completed days stored as a bitmap of day offsets."""
+
+    __slots__ = ('_bits', '_count', '_origin')
+
+    def __init__(self, origin: date):
+        """
+        Initialize the CompletionDays.
+
+        Args:
+            origin (date): the earliest day that can be stored, usually the start day of the habit
+
+        Returns:
+            None
+        """
+        self._origin = origin.toordinal()
+        self._bits = bytearray()
+        self._count = 0
+
+    def _offset(self, day: date) -> int:
+        return day.toordinal() - self._origin
+
+    def add(self, day: date) -> bool:
+        """
+        Mark the day as completed.
+
+        Args:
+            day (date): the completed day, not earlier than the origin
+
+        Returns:
+            bool: True if the day was not marked before, otherwise False
+
+        Raises:
+            ValueError: the day is earlier than the origin
+        """
+        offset = self._offset(day)
+        if offset < 0:
+            raise ValueError(f'{day} is earlier than the first day of the habit')
+        index, mask = offset >> 3, 1 << (offset & 7)
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index + 1 - len(self._bits)))
+        if self._bits[index] & mask:
+            return False
+        self._bits[index] |= mask
+        self._count += 1
+        return True
+
+    def discard(self, day: date) -> bool:
+        """
+        Remove the completion mark of the day if it is present.
+
+        Args:
+            day (date): the day to unmark
+
+        Returns:
+            bool: True if the day was marked, otherwise False
+        """
+        if day not in self:
+            return False
+        offset = self._offset(day)
+        self._bits[offset >> 3] &= ~(1 << (offset & 7)) & 0xFF
+        self._count -= 1
+        return True
+
+    def __contains__(self, day: object) -> bool:
+        """
+        Check whether the day is marked as completed.
+
+        Args:
+            day (object): the day to check
+
+        Returns:
+            bool: True if the day is marked, otherwise False
+        """
+        return isinstance(day, date) and self.contains_ordinal(day.toordinal())
+
+    def contains_ordinal(self, ordinal: int) -> bool:
+        """
+        Check whether the day with the given ordinal is marked as completed.
+
+        Args:
+            ordinal (int): the day as returned by date.toordinal
+
+        Returns:
+            bool: True if the day is marked, otherwise False
+        """
+        offset = ordinal - self._origin
+        index = offset >> 3
+        return offset >= 0 and index < len(self._bits) and bool(self._bits[index] & (1 << (offset & 7)))
+
+    def __len__(self) -> int:
+        """
+        Return the number of completed days.
+
+        Returns:
+            int: number of marked days
+        """
+        return self._count
+
+    def __iter__(self) -> Iterator[date]:
+        """
+        Iterate over the completed days in ascending order.
+
+        Returns:
+            Iterator[date]: the marked days
+        """
+        origin = date.fromordinal(self._origin)
+        for index, byte in enumerate(self._bits):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (1 << bit):
+                    yield origin + timedelta(days=(index << 3) + bit)
+
+    def count_between(self, first: date, last: date) -> int:
+        """
+        Count the completed days in the inclusive range.
+
+        Args:
+            first (date): the first day of the range
+            last (date): the last day of the range
+
+        Returns:
+            int: number of marked days between first and last
+        """
+        return self.bits_between(first, last).bit_count()
+
+    def bits_between(self, first: date, last: date) -> int:
+        """
+        Cut the completed days of the inclusive range out of the bitmap.
+
+        Args:
+            first (date): the first day of the range
+            last (date): the last day of the range
+
+        Returns:
+            int: bit N is set if the day `first + N days` is marked
+        """
+        start, stop = self._offset(first), self._offset(last)
+        low, high = max(start, 0), min(stop, len(self._bits) * 8 - 1)
+        if low > high:
+            return 0
+        chunk = int.from_bytes(self._bits[low >> 3 : (high >> 3) + 1], 'little') >> (low & 7)
+        return (chunk & ((1 << (high - low + 1)) - 1)) << (low - start)
+
+    def __repr__(self) -> str:
+        """
+        Represent the set with its days.
+
+        Returns:
+            str: the class name and the list of marked days
+        """
+        return f'{type(self).__name__}({[day.isoformat() for day in self]})'
+
+
+def to_bitstring(bits: int, length: int) -> str:
+    """
+    Write the days of a range as a string of ones and zeros.
+
+    Args:
+        bits (int): bit N stands for the day N of the range
+        length (int): number of days in the range
+
+    Returns:
+        str: character N is '1' if the bit N is set, otherwise '0'
+    """
+    return format(bits, f'0{length}b')[::-1] if length > 0 else ''
+
+
+def run_lengths(bits: int, length: int) -> List[int]:
+    """
+    Encode the days of a range as the lengths of the alternating runs of unset and set days.
+
+    Args:
+        bits (int): bit N stands for the day N of the range
+        length (int): number of days in the range
+
+    Returns:
+        List[int]: lengths of the runs, the first run is of unset days and may be empty
+    """
+    text = to_bitstring(bits, length)
+    runs = list(map(len, text.replace('01', '0 1').replace('10', '1 0').split()))
+    if text[:1] == '1':
+        runs.insert(0, 0)
+    return runs
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+DAY_FORMAT = '%d-%m-%Y'
+DATE_CACHE_SIZE = 4096
+DAY_LENGTH = 10
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_day(text: str) -> date:
+    """
+    Parse the day in the 'dd-mm-yyyy' format of the API.
+
+    Args:
+        text (str): the day in the 'dd-mm-yyyy' format
+
+    Returns:
+        date: the day
+
+    Raises:
+        ValueError: the string is not a valid day in the 'dd-mm-yyyy' format
+    """
+    if len(text) == DAY_LENGTH and text[2] == text[5] == '-' and text.isascii():
+        day, month, year = text[:2], text[3:5], text[6:]
+        if day.isdigit() and month.isdigit() and year.isdigit():
+            return date(int(year), int(month), int(day))
+    return datetime.strptime(text, DAY_FORMAT).date()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def day_ordinal(text: str) -> int:
+    """
+    Parse the day in the 'dd-mm-yyyy' format into its proleptic Gregorian ordinal.
+
+    Args:
+        text (str): the day in the 'dd-mm-yyyy' format
+
+    Returns:
+        int: the ordinal of the day, as date.toordinal returns it
+
+    Raises:
+        ValueError: the string is not a valid day in the 'dd-mm-yyyy' format
+    """
+    return parse_day(text).toordinal()
+
+
+def format_day(day: date) -> str:
+    """
+    Format the day in the 'dd-mm-yyyy' format of the API.
+
+    Args:
+        day (date): the day
+
+    Returns:
+        str: the day in the 'dd-mm-yyyy' format
+    """
+    return f'{day.day:02d}-{day.month:02d}-{day.year:04d}'
@@ -0,0 +1,46 @@
+import re
+from uuid import UUID, uuid4
+
+UUID_LENGTH = 36
+UUID_PATTERN = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+def new_id() -> int:
+    """
+    Generate the id of a new user, habit or record.
+
+    Returns:
+        int: a random UUID in the compact form
+    """
+    return uuid4().int << 1
+
+
+def parse_id(text: str) -> int:
+    """
+    Convert the id from the text form of the API and the database to the compact form kept in memory.
+
+    Args:
+        text (str): the id as a string
+
+    Returns:
+        int: the id as an integer
+    """
+    if len(text) == UUID_LENGTH and UUID_PATTERN.fullmatch(text):
+        return int(text.replace('-', ''), 16) << 1
+    return int.from_bytes(b'\x01' + text.encode('utf-8'), 'big') << 1 | 1
+
+
+def format_id(key: int) -> str:
+    """
+    Convert the id from the compact form back to the string.
+
+    Args:
+        key (int): the id as an integer
+
+    Returns:
+        str: the id as a string
+    """
+    if not key & 1:
+        return str(UUID(int=key >> 1))
+    value = key >> 1
+    return value.to_bytes((value.bit_length() + 7) // 8, 'big')[1:].decode('utf-8')
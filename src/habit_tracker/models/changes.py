@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from contextlib import suppress
+from typing import Dict, Optional, Set
+
+from src.habit_tracker.ids import parse_id
+from src.habit_tracker.models import queries
+from src.habit_tracker.models.hydration import Hydrator
+from src.habit_tracker.models.responses import ResponseCache
+from src.habit_tracker.models.sharding import Storage, Writes
+
+DEFAULT_SYNC_MS = 50.0
+CHANGE_RETENTION_S = 24 * 60 * 60
+PRUNE_EVERY_S = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+def sync_ms_from_env() -> float:
+    """
+    Read how often the changes are polled.
+
+    Returns:
+        float: HABITS_SYNC_MS if it is set, otherwise DEFAULT_SYNC_MS in a worker process or when
+            WEB_CONCURRENCY is above one, and 0 for a single process
+    """
+    configured = os.environ.get('HABITS_SYNC_MS')
+    if configured is not None:
+        return float(configured)
+    several = multiprocessing.parent_process() is not None or int(os.environ.get('WEB_CONCURRENCY', '1')) > 1
+    return DEFAULT_SYNC_MS if several else 0.0
+
+
+SYNC_MS = sync_ms_from_env()
+
+
+class ChangeFeed:
+    """Keep the in-memory model of a worker coherent with the writes of the other workers."""
+
+    def __init__(
+        self,
+        db: Storage,
+        writes: Writes,
+        hydrator: Hydrator,
+        responses: ResponseCache,
+        interval_ms: float = SYNC_MS,
+    ):
+        """
+        Initialize the ChangeFeed.
+
+        Args:
+            db (Storage): the database or its shards
+            writes (Writes): the writes recording the changed users
+            hydrator (Hydrator): refreshes the changed users
+            responses (ResponseCache): the cached responses to invalidate
+            interval_ms (float): how often the changes are polled, 0 turns the feed off for a single worker
+
+        Returns:
+            None
+        """
+        self.db = db
+        self.writes = writes
+        self.hydrator = hydrator
+        self.responses = responses
+        self.interval_s = max(0.0, interval_ms) / 1000
+        self.worker = uuid.uuid4().hex[:12]
+        self._seen: Dict[int, int] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pruned_at = 0.0
+        self.refreshed = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the changes are recorded and polled."""
+        return self.interval_s > 0
+
+    async def start(self) -> None:
+        """
+        Remember the last change of every shard and start recording the changes of this worker.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            if multiprocessing.parent_process() is not None:
+                logger.warning(
+                    'The changes of the other workers are not polled with HABITS_SYNC_MS=0, '
+                    'their cached responses and data go stale'
+                )
+            return
+        self._lock = asyncio.Lock()
+        for number, shard in enumerate(self.db.shards):
+            (self._seen[number],) = await shard.fetch_one(queries.SELECT_LAST_CHANGE)
+        self.writes.worker = self.worker
+        self.hydrator.on_miss = self.poll
+
+    def run(self) -> None:
+        """
+        Start polling the changes in the background.
+
+        Returns:
+            None
+        """
+        if self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Stop polling the changes.
+
+        Returns:
+            None
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def poll(self) -> int:
+        """
+        Refresh the users changed by the other workers since the last poll.
+
+        Returns:
+            int: number of refreshed users
+        """
+        if self._lock is None:
+            return 0
+        async with self._lock:
+            changed: Set[str] = set()
+            for number, shard in enumerate(self.db.shards):
+                for seq, user_id, worker in await shard.fetch_all(queries.SELECT_CHANGES, (self._seen[number],)):
+                    self._seen[number] = seq
+                    if worker != self.worker:
+                        changed.add(user_id)
+            for user_id in changed:
+                await self.hydrator.refresh(parse_id(user_id))
+            if changed:
+                self.responses.bump('users', 'habits', 'records')
+                self.refreshed += len(changed)
+            return len(changed)
+
+    async def prune(self) -> None:
+        """
+        Delete the rows of the changes older than the retention period.
+
+        Returns:
+            None
+        """
+        params = (time.time() - CHANGE_RETENTION_S,)
+        for shard in self.db.shards:
+            await shard.execute(queries.DELETE_OLD_CHANGES, params)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await self.poll()
+                if time.monotonic() - self._pruned_at >= PRUNE_EVERY_S:
+                    self._pruned_at = time.monotonic()
+                    await self.prune()
+            except Exception:
+                logger.exception('Failed to poll the changes of the other workers')
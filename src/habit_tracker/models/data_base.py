@@ -1,16 +1,13 @@
 import sqlite3
 
-conn = sqlite3.connect('habits.db')
-cursor = conn.cursor()
-
-cursor.execute("""
+SCHEMA = (
+    """
 CREATE TABLE IF NOT EXISTS users (
     id TEXT PRIMARY KEY,
     username TEXT NOT NULL
 )
-""")
-
-cursor.execute("""
+""",
+    """
 CREATE TABLE IF NOT EXISTS habits (
     id TEXT PRIMARY KEY,
     title TEXT NOT NULL,
@@ -20,9 +17,8 @@ CREATE TABLE IF NOT EXISTS habits (
     user_id TEXT,
     FOREIGN KEY (user_id) REFERENCES users(id)
 )
-""")
-
-cursor.execute("""
+""",
+    """
 CREATE TABLE IF NOT EXISTS records (
     id TEXT PRIMARY KEY,
     date TIMESTAMP NOT NULL,
@@ -31,7 +27,27 @@ CREATE TABLE IF NOT EXISTS records (
     habit_id TEXT,
     FOREIGN KEY (habit_id) REFERENCES habits(id)
 )
-""")
+""",
+)
+
+
+def create_tables(db_path: str = 'habits.db') -> None:
+    """
+    Create the tables of the habit tracker if they do not exist yet.
+
+    Args:
+        db_path (str): path to the SQLite database file
+
+    Returns:
+        None
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for statement in SCHEMA:
+        cursor.execute(statement)
+    conn.commit()
+    conn.close()
+
 
-conn.commit()
-conn.close()
+if __name__ == '__main__':
+    create_tables()
@@ -1,44 +1,156 @@
-import sqlite3
-import uuid
-from datetime import datetime
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import Annotated, Any, Dict, List, Literal, Optional, Set, Tuple, Union
+
+import aiosqlite
+from fastapi import Depends, FastAPI, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from src.habit_tracker.completions import run_lengths, to_bitstring
+from src.habit_tracker.dates import format_day, parse_day
+from src.habit_tracker.ids import format_id, parse_id
+from src.habit_tracker.models import queries
+from src.habit_tracker.models.changes import ChangeFeed
+from src.habit_tracker.models.hydration import Hydrator
+from src.habit_tracker.models.metrics import CONTENT_TYPE, Metrics, MetricsMiddleware
+from src.habit_tracker.models.registry import AmbiguousHabitError, HabitRegistry
+from src.habit_tracker.models.reminders import DueIndex, digest_entry
+from src.habit_tracker.models.responses import ResponseCache
+from src.habit_tracker.models.schemas import (
+    DEFAULT_PAGE_SIZE,
+    BatchItem,
+    BatchItemResult,
+    BatchRequest,
+    BatchResponse,
+    ImportResponse,
+    PageParams,
+    RecordFilters,
+)
+from src.habit_tracker.models.sharding import make_storage, make_writes
+from src.habit_tracker.models.transfer import MEDIA_TYPES as TRANSFER_MEDIA_TYPES
+from src.habit_tracker.models.transfer import Importer, export_lines, reload_users
+from src.habit_tracker.models.writes import WriteBehind
+from src.habit_tracker.motivation.motivation import Motivation, UserQuotes
+from src.habit_tracker.schedules import compile_frequency
+from src.habit_tracker.trackers_main_classes import Habit, Record, User
+from src.habit_tracker.visualisation.rendering import MEDIA_TYPES, ChartRenderer
+
+db = make_storage()
+registry = HabitRegistry()
+hydrator = Hydrator(db, registry)
+due = DueIndex(registry)
+writes = make_writes(db)
+motivation = Motivation()
+user_quotes = UserQuotes()
+charts = ChartRenderer()
+responses = ResponseCache()
+changes = ChangeFeed(db, writes, hydrator, responses)
+metrics = Metrics()
+MAX_HISTORY_DAYS = 3660
+HISTORY_ENCODINGS = {'bits': to_bitstring, 'rle': run_lengths}
+metrics.gauge('habits_resident_users', 'Users kept in memory.', lambda: len(registry.users))
+metrics.gauge('habits_resident_habits', 'Habits kept in memory.', lambda: len(registry.habits_by_id))
+metrics.gauge('habits_resident_records', 'Records kept in memory.', lambda: len(registry.records_by_id))
+metrics.gauge('habits_write_queue_depth', 'Writes waiting for the group commit.', lambda: writes.depth)
+metrics.cache('users', lambda: (hydrator.hits, hydrator.misses))
+metrics.cache('charts', lambda: (charts.hits, charts.misses))
+metrics.cache('responses', lambda: (responses.hits + responses.not_modified, responses.misses))
+metrics.cache('dates', lambda: parse_day.cache_info()[:2])
+metrics.cache('frequencies', lambda: compile_frequency.cache_info()[:2])
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Open the database pool and load the stored data at startup, close the pool at shutdown.
 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+    Args:
+        _app (FastAPI): the application
 
-from src.habit_tracker.motivation.motivation import Motivation
-from src.habit_tracker.trackers_main_classes import Habit, Record, User
+    Yields:
+        None
+    """
+    db.on_query = metrics.observe_query
+    await db.open()
+    hydrator.before_load = writes.sync
+    writes.on_failed = restore_users
+    await changes.start()
+    registry.on_add_habit = due.add
+    await hydrator.start()
+    due.rebuild(date.today().toordinal())
+    writes.start()
+    changes.run()
+    try:
+        yield
+    finally:
+        await changes.close()
+        await writes.close()
+        charts.close()
+        responses.clear()
+        await db.close()
 
-app = FastAPI()
 
-users = {}
-habits = []
-records = set()
+async def restore_users(user_ids: Set[str]) -> None:
+    """Load the users changed by failed queued writes again, the memory has changes the database does not.
 
+    Args:
+        user_ids (Set[str]): ids of the users
 
-def db_connect():
+    Returns:
+        None
     """
-    Connect database with fastapi.
+    for user_id in user_ids:
+        await hydrator.refresh(parse_id(user_id))
+    responses.bump('users', 'habits', 'records')
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+
+@app.exception_handler(AmbiguousHabitError)
+async def ambiguous_habit_handler(_request: Request, exc: AmbiguousHabitError) -> JSONResponse:
+    """Ask for the owner of a habit whose name is used by several users.
+
+    Args:
+        _request (Request): the request
+        exc (AmbiguousHabitError): the raised error
 
     Returns:
-        str: connection
+        JSONResponse: response with the 409 status code
     """
-    db_path = 'src/habit_tracker/models/habits.db'
-    return sqlite3.connect(db_path)
+    return JSONResponse(
+        content={'message': f"Привычка '{exc.args[0]}' есть у нескольких пользователей, укажите user_id"},
+        status_code=409,
+    )
 
 
 @app.get('/')
-async def root() -> dict[str, str]:
+async def root(user_id: Optional[str] = None) -> dict[str, str]:
     """Send the greeting message.
 
+    Args:
+        user_id (Optional[str]): unique id of the user to keep their own cycle of unique quotes
+
     Returns:
         dict[str, str]: greeting message for the user
     """
-    motivation = Motivation()
-    quote = motivation.give_random_quote()
+    quote = motivation.give_random_quote() if user_id is None else user_quotes.give_random_quote(user_id)
 
     return {'message': 'Привет! Расскажи о привычках, которые ты хочешь соблюдать', 'motivational_quote': quote}
 
 
+@app.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Export the request, SQL and cache metrics in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: the metrics
+    """
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.post('/users/')
 async def register_user(name: str) -> dict[str, str]:
     """Register a new user.
@@ -50,15 +162,15 @@ async def register_user(name: str) -> dict[str, str]:
         dict[str, str]: message that the user was registered
     """
     user = User(name=name)
-    users[user.user_id] = user
+    registry.add_user(user)
+    hydrator.track(user.user_id)
 
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO users VALUES (?, ?)', (user.user_id, user.user_name))
-        conn.commit()
+    params = (format_id(user.user_id), user.user_name)
+    await writes.shard(params[0]).execute(queries.INSERT_USER, params, users=params[:1])
+    responses.bump('users')
 
     return {
-        'user_id': user.user_id,
+        'user_id': format_id(user.user_id),
         'message': f'Пользователь {user.user_name} зарегистрирован. Скопируй и сохрани id. Он еще пригодится',
     }
 
@@ -78,21 +190,26 @@ async def add_habit(user_id: str, habits_name: str, freq: str, start_day: str, e
         dict[str, str]: message that the habit was added to the user
     """
     try:
-        user = users.get(user_id)
+        user = await hydrator.get_user(parse_id(user_id))
         if user is None:
             return JSONResponse(content={'message': 'Пользователь не найден'}, status_code=404)
+        if registry.find_habit(habits_name, user.user_id) is not None:
+            return JSONResponse(content={'message': f"Привычка '{habits_name}' уже существует"}, status_code=409)
 
-        habit = Habit(name=habits_name, freq=freq, start_day=start_day, end_day=end_day, user_id=user_id)
+        habit = Habit(name=habits_name, freq=freq, start_day=start_day, end_day=end_day, user_id=user.user_id)
         user.add_habit(habit)
-        habits.append(habit)
-
-        with db_connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO habits VALUES (?, ?, ?, ?, ?, ?)',
-                (habit.habit_id, habit.habit_name, habit.frequency, habit.start_day, habit.end_day, habit.user_id),
-            )
-            conn.commit()
+        registry.add_habit(habit)
+
+        params = (
+            format_id(habit.habit_id),
+            habit.habit_name,
+            habit.frequency,
+            habit.start_day.isoformat(),
+            habit.end_day.isoformat(),
+            user_id,
+        )
+        await writes.shard(user_id).execute(queries.INSERT_HABIT, params, users=[user_id])
+        responses.bump('habits')
 
         return {'message': f"Новая привычка '{habits_name}' создана для пользователя {user.user_name}"}
 
@@ -111,86 +228,421 @@ async def delete_habit(user_id: str, habit_name: str) -> dict[str, str]:
     Returns:
         dict[str, str]: message that the habit is removed
     """
-    user = users.get(user_id)
+    user = await hydrator.get_user(parse_id(user_id))
     if user is None:
         return JSONResponse(content={'message': 'Пользователь не найден'}, status_code=404)
 
-    user.remove_habit(habit_name)
+    habit = await hydrator.find_habit(habit_name, user.user_id)
+    if habit is not None:
+        user.remove_habit(habit)
+        registry.remove_habit(habit)
 
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM habits WHERE title=? AND user_id=?', (habit_name, user_id))
-        conn.commit()
+    async def delete(conn: aiosqlite.Connection) -> None:
+        await conn.execute(queries.DELETE_HABIT_STATS, (habit_name, user_id))
+        await conn.execute(queries.DELETE_HABIT_RECORDS, (habit_name, user_id))
+        await conn.execute(queries.DELETE_HABIT, (habit_name, user_id))
+
+    await writes.shard(user_id).submit(delete, users=[user_id])
+    responses.bump('habits', 'records')
 
     return {'message': f"Привычка '{habit_name}' удалена у пользователя {user.user_name}"}
 
 
 @app.get('/habits/{habit_name}/check/{day}')
-async def check_habit_completion(habit_name: str, day: str) -> bool:
+async def check_habit_completion(request: Request, habit_name: str, day: str, user_id: Optional[str] = None) -> bool:
     """
     Check whether the habit is marked as completed on the specified date.
 
     Args:
+        request (Request): the request
         habit_name (str): name of the habit
         day (str): the day of verification in the 'dd-mm-yyyy' format
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
 
     Returns:
         bool: True if the habit was completed on the specified date, otherwise False
     """
-    habit = next((h for h in habits if h.habit_name == habit_name), None)
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
     if habit is None:
         return JSONResponse(content={'message': 'Привычка не найдена'}, status_code=404)
-    return habit.is_complited(day)
+    try:
+        parsed_day = parse_day(day)
+    except ValueError:
+        return JSONResponse(content={'message': "Используйте формат даты 'DD-MM-YYYY'"}, status_code=422)
+    key = ('check', habit.habit_id, habit.version, day)
+    cached = responses.lookup(request, key)
+    if cached is not None:
+        return cached
+    return responses.store(key, parsed_day in habit.completed_days)
 
 
 @app.post('/habits/{habit_name}/mark/{day}')
-async def mark_habit_completion(habit_name: str, day: str) -> dict[str, str]:
+async def mark_habit_completion(
+    habit_name: str, day: str, user_id: Optional[str] = None, durable: bool = False
+) -> dict[str, str]:
     """
     Record the fulfillment of a habit on a specified date.
 
     Args:
         habit_name (str): name of the habit
         day (str): the day of fulfillment in the 'dd-mm-yyyy' format
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
+        durable (bool, optional): in the write-behind mode, answer only after the change is committed
 
     Returns:
         dict[str, str]: message that the habit was fixed
     """
-    habit = next((h for h in habits if h.habit_name == habit_name), None)
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
     if habit is None:
         return JSONResponse(content={'message': 'Привычка не найдена'}, status_code=404)
-    habit.completion_mark(day)
+    try:
+        parsed_day = parse_day(day)
+    except ValueError:
+        return JSONResponse(content={'message': "Используйте формат даты 'DD-MM-YYYY'"}, status_code=422)
+    record = Record(habit=habit, day=parsed_day)
+    if habit.mark_day(parsed_day):
+        keep_record(record)
 
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO records VALUES (?, ?, NULL, NULL, ?)',
-            (uuid.uuid4().hex[:8], day, habit.habit_id),
-        )
-        conn.commit()
+    params = (format_id(record.record_id), parsed_day.isoformat(), format_id(habit.habit_id))
+    await writes.shard(format_id(habit.user_id)).execute(queries.INSERT_MARK, params, [habit], durable)
+    responses.bump('records')
 
     return {'message': f"Привычка '{habit_name}' зафиксирована как выполненная на {day}"}
 
 
+@app.delete('/habits/{habit_name}/mark/{day}')
+async def unmark_habit_completion(
+    habit_name: str, day: str, user_id: Optional[str] = None, durable: bool = False
+) -> dict[str, str]:
+    """
+    Remove the fulfillment of a habit on a specified date together with its record.
+
+    Args:
+        habit_name (str): name of the habit
+        day (str): the day of fulfillment in the 'dd-mm-yyyy' format
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
+        durable (bool, optional): in the write-behind mode, answer only after the change is committed
+
+    Returns:
+        dict[str, str]: message that the fulfillment was removed
+    """
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
+    if habit is None:
+        return JSONResponse(content={'message': 'Привычка не найдена'}, status_code=404)
+    try:
+        parsed_day = parse_day(day)
+    except ValueError:
+        return JSONResponse(content={'message': "Используйте формат даты 'DD-MM-YYYY'"}, status_code=422)
+
+    habit.unmark_day(parsed_day)
+    for record in [r for r in habit.records if r.day == parsed_day]:
+        habit.records.remove(record)
+        registry.remove_record(record)
+
+    params = (format_id(habit.habit_id), parsed_day.isoformat())
+    await writes.shard(format_id(habit.user_id)).execute(queries.DELETE_MARK, params, [habit], durable)
+    responses.bump('records')
+
+    return {'message': f"Отметка о выполнении привычки '{habit_name}' на {day} удалена"}
+
+
 @app.get('/habits/{habit_name}/rate')
-async def get_habit_completion_rate(habit_name: str) -> dict[str, str]:
+async def get_habit_completion_rate(request: Request, habit_name: str, user_id: Optional[str] = None) -> dict[str, str]:
     """
     Count the habit fulfillment percentage.
 
     Args:
+        request (Request): the request
         habit_name (str): name of the habit
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
 
     Returns:
         dict[str, str]: message with the percentage of the fulfillment
     """
-    habit = next((h for h in habits if h.habit_name == habit_name), None)
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
     if habit is None:
         return JSONResponse(content={'message': 'Привычка не найдена'}, status_code=404)
+    key = ('rate', habit.habit_id, habit.version, habit_name)
+    cached = responses.lookup(request, key)
+    if cached is not None:
+        return cached
     rate_value = habit.completion_rate()
-    return {'message': f"Процент выполнения привычки '{habit_name}' составляет {rate_value}%"}
+    return responses.store(key, {'message': f"Процент выполнения привычки '{habit_name}' составляет {rate_value}%"})
+
+
+@app.get('/habits/{habit_name}/stats')
+async def get_habit_stats(habit_name: str, user_id: Optional[str] = None) -> dict[str, Any]:
+    """
+    Get the completion statistics of the habit.
+
+    Args:
+        habit_name (str): name of the habit
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
+
+    Returns:
+        dict[str, Any]: completed days, rate, current and longest streaks, weekly and monthly totals
+    """
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
+    if habit is None:
+        return JSONResponse(content={'message': 'Привычка не найдена'}, status_code=404)
+    return habit_stats(habit)
+
+
+@app.get('/users/{user_id}/stats')
+async def get_user_stats(user_id: str) -> list[dict[str, Any]]:
+    """
+    Get the completion statistics of all the user's habits.
+
+    Args:
+        user_id (str): unique id of the user
+
+    Returns:
+        list[dict[str, Any]]: statistics of every habit
+    """
+    user = await hydrator.get_user(parse_id(user_id))
+    if user is None:
+        return JSONResponse(content={'message': 'Пользователь не найден'}, status_code=404)
+    return [habit_stats(habit) for habit in user.habits()]
+
+
+@app.get('/habits/{habit_name}/charts/{kind}')
+async def get_habit_chart(
+    habit_name: str,
+    kind: Literal['pie', 'calendar', 'trend'],
+    fmt: Annotated[Literal['png', 'svg'], Query(alias='format')] = 'png',
+    user_id: Optional[str] = None,
+) -> Response:
+    """
+    Get the chart of the habit as an image.
+
+    Args:
+        habit_name (str): name of the habit
+        kind (Literal['pie', 'calendar', 'trend']): the completion rate pie, the calendar heatmap or the weekly trend
+        fmt (Literal['png', 'svg']): format of the image
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
+
+    Returns:
+        Response: the image
+    """
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
+    if habit is None:
+        return JSONResponse(content={'message': 'Привычка не найдена'}, status_code=404)
+    return Response(content=await charts.render(habit, kind, fmt), media_type=MEDIA_TYPES[fmt])
+
+
+@app.get('/habits/{habit_name}/history')
+async def get_habit_history(  # noqa: PLR0913, PLR0917
+    request: Request,
+    habit_name: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    encoding: Literal['bits', 'rle'] = 'bits',
+    user_id: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Get the completed and the scheduled days of the habit in a date range.
+
+    Args:
+        request (Request): the request
+        habit_name (str): name of the habit
+        date_from (Optional[str], optional): the first day in the 'dd-mm-yyyy' format, a year before date_to by default
+        date_to (Optional[str], optional): the last day in the 'dd-mm-yyyy' format, today by default
+        encoding (Literal['bits', 'rle']): a string with a character per day or the lengths of the runs of days
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
+
+    Returns:
+        dict[str, Any]: the range and the history of the habit
+    """
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
+    if habit is None:
+        return JSONResponse(content={'message': 'Привычка не найдена'}, status_code=404)
+    try:
+        first, last = history_range(date_from, date_to)
+    except ValueError as e:
+        return JSONResponse(content={'message': str(e)}, status_code=422)
+
+    key = ('history', habit.habit_id, habit.version, first, last, encoding)
+    cached = responses.lookup(request, key)
+    if cached is not None:
+        return cached
+    return responses.store(key, history_response(first, last, encoding, [habit]))
+
+
+@app.get('/users/{user_id}/history')
+async def get_user_history(
+    request: Request,
+    user_id: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    encoding: Literal['bits', 'rle'] = 'bits',
+) -> dict[str, Any]:
+    """
+    Get the completed and the scheduled days of all the user's habits in a date range, as for a heatmap.
+
+    Args:
+        request (Request): the request
+        user_id (str): unique id of the user
+        date_from (Optional[str], optional): the first day in the 'dd-mm-yyyy' format, a year before date_to by default
+        date_to (Optional[str], optional): the last day in the 'dd-mm-yyyy' format, today by default
+        encoding (Literal['bits', 'rle']): a string with a character per day or the lengths of the runs of days
+
+    Returns:
+        dict[str, Any]: the range and the history of every habit ordered by name
+    """
+    user = await hydrator.get_user(parse_id(user_id))
+    if user is None:
+        return JSONResponse(content={'message': 'Пользователь не найден'}, status_code=404)
+    try:
+        first, last = history_range(date_from, date_to)
+    except ValueError as e:
+        return JSONResponse(content={'message': str(e)}, status_code=422)
+
+    habits = sorted(user.habits(), key=lambda habit: (habit.habit_name, habit.habit_id))
+    key = ('user_history', user.user_id, tuple((h.habit_id, h.version) for h in habits), first, last, encoding)
+    cached = responses.lookup(request, key)
+    if cached is not None:
+        return cached
+    return responses.store(key, history_response(first, last, encoding, habits))
+
+
+@app.get('/users/{user_id}/due')
+async def get_due_habits(user_id: str) -> dict[str, Any]:
+    """
+    Get the user's habits scheduled for today and not completed yet, as for a reminder.
+
+    Args:
+        user_id (str): unique id of the user
+
+    Returns:
+        dict[str, Any]: the user, the day and the due habits ordered by name
+    """
+    user = await hydrator.get_user(parse_id(user_id))
+    if user is None:
+        return JSONResponse(content={'message': 'Пользователь не найден'}, status_code=404)
+    today = date.today()
+    due.advance(today.toordinal())
+    return digest_entry(user, today, due.digest(user.user_id))
+
+
+def history_range(date_from: Optional[str], date_to: Optional[str]) -> Tuple[date, date]:
+    """
+    Parse the date range of a history request.
+
+    Args:
+        date_from (Optional[str]): the first day in the 'dd-mm-yyyy' format, a year before the last day by default
+        date_to (Optional[str]): the last day in the 'dd-mm-yyyy' format, today by default
+
+    Returns:
+        Tuple[date, date]: the first and the last day
+
+    Raises:
+        ValueError: a date is invalid, the range is empty or too long
+    """
+    try:
+        last = date.today() if date_to is None else parse_day(date_to)
+        first = last - timedelta(days=364) if date_from is None else parse_day(date_from)
+    except ValueError:
+        raise ValueError("Используйте формат даты 'DD-MM-YYYY'") from None
+    if first > last:
+        raise ValueError('Начало диапазона позже его конца')
+    if (last - first).days >= MAX_HISTORY_DAYS:
+        raise ValueError(f'Диапазон не может быть длиннее {MAX_HISTORY_DAYS} дней')
+    return first, last
+
+
+def history_response(first: date, last: date, encoding: str, habits: List[Habit]) -> dict[str, Any]:
+    """
+    Encode the completed and the scheduled days of the habits in the range.
+
+    Args:
+        first (date): the first day of the range
+        last (date): the last day of the range
+        encoding (str): 'bits' or 'rle'
+        habits (List[Habit]): the habits
+
+    Returns:
+        dict[str, Any]: the range and the history of every habit
+    """
+    length = (last - first).days + 1
+    encode = HISTORY_ENCODINGS[encoding]
+    return {
+        'date_from': format_day(first),
+        'date_to': format_day(last),
+        'encoding': encoding,
+        'habits': [
+            {
+                'habit_id': format_id(habit.habit_id),
+                'habit_name': habit.habit_name,
+                'completed': encode(habit.completed_days.bits_between(first, last), length),
+                'scheduled': encode(habit.scheduled_bits(first, last), length),
+            }
+            for habit in habits
+        ],
+    }
+
+
+def optional_id(user_id: Optional[str]) -> Optional[int]:
+    """
+    Convert the optional id from the request to the form kept in memory.
+
+    Args:
+        user_id (Optional[str]): the id from the request
+
+    Returns:
+        Optional[int]: the id or None if it is not specified
+    """
+    return None if user_id is None else parse_id(user_id)
+
+
+def habit_stats(habit: Habit) -> dict[str, Any]:
+    """
+    Collect the statistics of the habit for a response.
+
+    Args:
+        habit (Habit): the habit
+
+    Returns:
+        dict[str, Any]: the statistics
+    """
+    stats = habit.stats
+    return {
+        'habit_id': format_id(habit.habit_id),
+        'habit_name': habit.habit_name,
+        'completed': stats.completed,
+        'scheduled_days': habit.scheduled_days(),
+        'completion_rate': habit.completion_rate(),
+        'current_streak': stats.current_streak(date.today(), habit.end_day),
+        'longest_streak': stats.longest_streak,
+        'weekly': stats.weekly,
+        'monthly': stats.monthly,
+    }
+
+
+def keep_record(record: Record) -> Record:
+    """
+    Attach the record to its habit, or update the record the habit already has with the same id.
+
+    Args:
+        record (Record): the record stored in the database
+
+    Returns:
+        Record: the record attached to the habit
+    """
+    existing = registry.get_record(record.record_id, record.habit)
+    if existing is not None:
+        existing.update_mood(record.mood)
+        existing.update_notes(record.notes)
+        return existing
+
+    record.habit.records.append(record)
+    registry.add_record(record)
+    return record
 
 
 @app.post('/habits/{habit_name}/records/')
-async def create_record(habit_name: str, day: str, mood: str = '', notes: str = '') -> dict[str, str]:
+async def create_record(  # noqa: PLR0913, PLR0917
+    habit_name: str, day: str, mood: str = '', notes: str = '', user_id: Optional[str] = None, durable: bool = False
+) -> dict[str, str]:
     """
     Create a new record for a habit.
 
@@ -199,141 +651,407 @@ async def create_record(habit_name: str, day: str, mood: str = '', notes: str =
         day (str): date of completion in the 'dd-mm-yyyy' format
         mood (str, optional): user's mood. Default is empty.
         notes (str, optional): additional notes. Default is empty.
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
+        durable (bool, optional): in the write-behind mode, answer only after the change is committed
 
     Returns:
         dict[str, str]: JSON response with success or error message
     """
-    habit = next((h for h in habits if h.habit_name == habit_name), None)
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
     if habit is None:
         return {'message': 'Привычка не найдена'}
 
     try:
-        parsed_day = datetime.strptime(day, '%d-%m-%Y').date()
+        parsed_day = parse_day(day)
     except ValueError:
         return {'message': "Ошибка: Дата указана в неверном формате. Используйте формат 'DD-MM-YYYY'."}
 
+    existing = next((r for r in habit.records if r.day == parsed_day), None)
+    stored_id_known = existing is not None or parsed_day not in habit.completed_days
     record = Record(habit=habit, day=parsed_day, mood=mood, notes=notes)
-
-    if not hasattr(habit, 'records'):
-        habit.records = []
-    habit.records.append(record)
-
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO records VALUES (?, ?, ?, ?, ?)',
-            (record.record_id, parsed_day, mood, notes, habit.habit_id),
-        )
-        conn.commit()
+    habit.mark_day(parsed_day)
+    params = (format_id(record.record_id), parsed_day.isoformat(), mood, notes, format_id(habit.habit_id))
+
+    async def upsert(conn: aiosqlite.Connection) -> str:
+        async with conn.execute(queries.UPSERT_RECORD_RETURNING_ID, params) as cursor:
+            (stored_id,) = await cursor.fetchone()
+        return stored_id
+
+    lane = writes.shard(format_id(habit.user_id))
+    if stored_id_known and not durable and lane.mode == 'write-behind':
+        await lane.execute(queries.UPSERT_RECORD, params, [habit], durable=False)
+        if existing is not None:
+            record.record_id = existing.record_id
+    else:
+        record.record_id = parse_id(await lane.submit(upsert, [habit]))
+    responses.bump('records')
+    record = keep_record(record)
 
     return {
         'message': f"Запись о выполнении привычки '{habit_name}' создана успешно. "
         f'Скопируй и сохрани id, он еще пригодится',
-        'record_id': record.record_id,
-        'date': parsed_day.strftime('%d-%m-%Y'),
+        'record_id': format_id(record.record_id),
+        'date': format_day(parsed_day),
     }
 
 
+async def check_batch_item(item: BatchItem, seen: Set[Tuple[int, date]]) -> Union[Record, str]:
+    """
+    Validate one item of a batch.
+
+    Args:
+        item (BatchItem): the item to check
+        seen (Set[Tuple[int, date]]): habit ids and days of the accepted items, the item is added to it
+
+    Returns:
+        Union[Record, str]: new record for the item or the reason it is rejected
+    """
+    try:
+        habit = await hydrator.find_habit(item.habit_name, optional_id(item.user_id))
+    except AmbiguousHabitError:
+        return 'Укажите user_id'
+    if habit is None:
+        return 'Привычка не найдена'
+    try:
+        parsed_day = parse_day(item.day)
+    except ValueError:
+        return 'Неверный формат даты'
+    if not habit.end_day >= parsed_day >= habit.start_day:
+        return 'Дата вне периода привычки'
+    if (habit.habit_id, parsed_day) in seen:
+        return 'Дата повторяется в пакете'
+    seen.add((habit.habit_id, parsed_day))
+    return Record(habit=habit, day=parsed_day, mood=item.mood, notes=item.notes)
+
+
+@app.post('/records/batch/')
+async def create_records_batch(batch: BatchRequest) -> BatchResponse:
+    """
+    Mark many habit completions and create their records in one transaction.
+
+    Args:
+        batch (BatchRequest): the completions to ingest
+
+    Returns:
+        BatchResponse: number of created records and the result of every item
+    """
+    results = []
+    accepted = []
+    seen = set()
+    for index, item in enumerate(batch.items):
+        checked = await check_batch_item(item, seen)
+        if isinstance(checked, str):
+            results.append(BatchItemResult(index=index, ok=False, message=checked))
+            continue
+        result = BatchItemResult(index=index, ok=True, message='Запись создана')
+        accepted.append((checked, result))
+        results.append(result)
+
+    lanes = {}
+    for record, result in accepted:
+        lanes.setdefault(writes.shard(format_id(record.habit.user_id)), []).append((record, result))
+    outcomes = await asyncio.gather(
+        *(write_batch_records(lane, [record for record, _ in items]) for lane, items in lanes.items()),
+        return_exceptions=True,
+    )
+    responses.bump('records')
+    created = 0
+    for items, outcome in zip(lanes.values(), outcomes):
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome
+        for record, result in items:
+            if isinstance(outcome, Exception):
+                result.ok, result.message = False, f'Запись не сохранена: {outcome!s}'
+                continue
+            record.record_id = outcome[record.habit.habit_id, record.day.isoformat()]
+            result.record_id = format_id(keep_record(record).record_id)
+            created += 1
+
+    return BatchResponse(created=created, results=results)
+
+
+async def write_batch_records(lane: WriteBehind, records: List[Record]) -> Dict[Tuple[int, str], int]:
+    """
+    Mark the records of one shard on their habits and write them in one transaction.
+
+    Args:
+        lane (WriteBehind): the writes of the shard
+        records (List[Record]): the accepted records of the users of the shard
+
+    Returns:
+        Dict[Tuple[int, str], int]: stored id of the record of every habit id and ISO day
+    """
+    spans = {}
+    for record in records:
+        first, last = spans.get(record.habit, (record.day, record.day))
+        spans[record.habit] = (min(first, record.day), max(last, record.day))
+
+    rows = [(format_id(r.record_id), r.day.isoformat(), r.mood, r.notes, format_id(r.habit.habit_id)) for r in records]
+
+    async def upsert_all(conn: aiosqlite.Connection) -> Dict[Tuple[int, str], int]:
+        await conn.executemany(queries.UPSERT_RECORD, rows)
+        stored_ids = {}
+        for habit, (first, last) in spans.items():
+            params = (format_id(habit.habit_id), first.isoformat(), last.isoformat())
+            for day, record_id in await conn.execute_fetchall(queries.SELECT_RECORD_IDS, params):
+                stored_ids[habit.habit_id, day] = parse_id(record_id)
+        return stored_ids
+
+    newly_marked = [record for record in records if record.habit.mark_day(record.day)]
+    try:
+        return await lane.submit(upsert_all, spans)
+    except BaseException:
+        for record in newly_marked:
+            record.habit.unmark_day(record.day)
+        raise
+
+
 @app.post('/habits/{habit_name}/records/{record_id}/mood')
-async def update_record_mood(habit_name: str, record_id: str, mood: str = '') -> dict[str, str]:
+async def update_record_mood(
+    habit_name: str, record_id: str, mood: str = '', user_id: Optional[str] = None, durable: bool = False
+) -> dict[str, str]:
     """Update mood.
 
     Args:
         habit_name (str): the name of the habit
         record_id (str): id of the record
         mood (str, optional): user's mood. The default value is empty
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
+        durable (bool, optional): in the write-behind mode, answer only after the change is committed
 
     Returns:
         dict[str, str]: message that mood was updated
     """
-    habit = next((h for h in habits if h.habit_name == habit_name), None)
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
     if habit is None:
         return {'message': 'Привычка не найдена'}
 
-    record = next((r for r in habit.records if r.record_id == record_id), None)
+    record = registry.get_record(parse_id(record_id), habit)
     if record is None:
         return {'message': 'Запись не найдена'}
 
     record.update_mood(mood)
 
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE records SET mood=? WHERE id=? AND habit_id=?',
-            (mood, record_id, habit.habit_id),
-        )
-        conn.commit()
+    params = (mood, record_id, format_id(habit.habit_id))
+    owner = format_id(habit.user_id)
+    await writes.shard(owner).execute(queries.UPDATE_RECORD_MOOD, params, durable=durable, users=[owner])
+    responses.bump('records')
 
     return {'message': f"Настроение в записи '{record_id}' обновлено"}
 
 
 @app.post('/habits/{habit_name}/records/{record_id}/notes')
-async def update_record_notes(habit_name: str, record_id: str, notes: str = '') -> dict[str, str]:
+async def update_record_notes(
+    habit_name: str, record_id: str, notes: str = '', user_id: Optional[str] = None, durable: bool = False
+) -> dict[str, str]:
     """Update notes.
 
     Args:
         habit_name (str): the name of the habit
         record_id (str): id of the record
         notes (str, optional): additional notes. They are empty by default
+        user_id (Optional[str], optional): owner of the habit, required when its name is not unique
+        durable (bool, optional): in the write-behind mode, answer only after the change is committed
 
     Returns:
         dict[str, str]: message that notes were updated
     """
-    habit = next((h for h in habits if h.habit_name == habit_name), None)
+    habit = await hydrator.find_habit(habit_name, optional_id(user_id))
     if habit is None:
         return {'message': 'Привычка не найдена'}
 
-    record = next((r for r in habit.records if r.record_id == record_id), None)
+    record = registry.get_record(parse_id(record_id), habit)
     if record is None:
         return {'message': 'Запись не найдена'}
 
     record.update_notes(notes)
 
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE records SET notes=? WHERE id=? AND habit_id=?',
-            (notes, record_id, habit.habit_id),
-        )
-        conn.commit()
+    params = (notes, record_id, format_id(habit.habit_id))
+    owner = format_id(habit.user_id)
+    await writes.shard(owner).execute(queries.UPDATE_RECORD_NOTES, params, durable=durable, users=[owner])
+    responses.bump('records')
 
     return {'message': f"Заметки в записи '{record_id}' обновлены"}
 
 
+async def list_rows(request: Request, table: str, conditions: List[str], params: List[Any], page: PageParams) -> Any:
+    """
+    Read one page of a table, or stream it, ordered by id.
+
+    Args:
+        request (Request): the request
+        table (str): name of the table
+        conditions (List[str]): SQL filters
+        params (List[Any]): parameters of the filters
+        page (PageParams): cursor, size and format of the page
+
+    Returns:
+        Any: list of rows or a streaming response with one JSON array per line
+    """
+    if page.fmt != 'ndjson':
+        key = (table, request.url.query, *responses.versions(table))
+        cached = responses.lookup(request, key)
+        if cached is not None:
+            return cached
+
+    await writes.sync()
+    if page.cursor is not None:
+        conditions = [*conditions, 'id > ?']
+        params = [*params, page.cursor]
+
+    if page.fmt == 'ndjson':
+        if page.limit is not None:
+            params = [*params, page.limit]
+        rows = db.iterate(queries.select_page(table, conditions, page.limit is not None), params)
+
+        async def lines():
+            count = 0
+            async for row in rows:
+                yield json.dumps(row, ensure_ascii=False) + '\n'
+                count += 1
+                if count == page.limit:
+                    break
+
+        return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+    limit = page.limit or DEFAULT_PAGE_SIZE
+    rows = await db.fetch_all(queries.select_page(table, conditions, True), [*params, limit + 1])
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = rows[-1][0]
+    return responses.store(key, rows, headers)
+
+
+def to_iso(day: str) -> str:
+    """
+    Convert the date from the 'dd-mm-yyyy' format of the API to the ISO format of the database.
+
+    Args:
+        day (str): the date in the 'dd-mm-yyyy' format
+
+    Returns:
+        str: the date in the 'yyyy-mm-dd' format
+    """
+    return parse_day(day).isoformat()
+
+
 @app.get('/users/')
-async def get_all_users() -> list:
-    """Get all users from the database.
+async def get_all_users(request: Request, page: Annotated[PageParams, Depends()]) -> Any:
+    """Get users from the database page by page.
+
+    Args:
+        request (Request): the request
+        page (PageParams): cursor, size and format of the page
 
     Returns:
-        list: list of all users
+        Any: list of users
     """
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM users')
-        return cursor.fetchall()
+    return await list_rows(request, 'users', [], [], page)
 
 
 @app.get('/habits/')
-async def get_all_habits() -> list:
-    """Get all habits from the database.
+async def get_all_habits(
+    request: Request, page: Annotated[PageParams, Depends()], user_id: Optional[str] = None
+) -> Any:
+    """Get habits from the database page by page.
+
+    Args:
+        request (Request): the request
+        page (PageParams): cursor, size and format of the page
+        user_id (Optional[str], optional): only the habits of this user
 
     Returns:
-        list: list of all habits
+        Any: list of habits
     """
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM habits')
-        return cursor.fetchall()
+    conditions, params = [], []
+    if user_id is not None:
+        conditions.append('user_id = ?')
+        params.append(user_id)
+    return await list_rows(request, 'habits', conditions, params, page)
 
 
 @app.get('/records/')
-async def get_all_records() -> list:
-    """Get all records from the database.
+async def get_all_records(
+    request: Request, page: Annotated[PageParams, Depends()], filters: Annotated[RecordFilters, Depends()]
+) -> Any:
+    """Get records from the database page by page.
+
+    Args:
+        request (Request): the request
+        page (PageParams): cursor, size and format of the page
+        filters (RecordFilters): user, habit and date range of the records
+
+    Returns:
+        Any: list of records
+    """
+    conditions, params = [], []
+    if filters.user_id is not None:
+        conditions.append(queries.HABIT_OF_USER)
+        params.append(filters.user_id)
+    if filters.habit_id is not None:
+        conditions.append('habit_id = ?')
+        params.append(filters.habit_id)
+    try:
+        if filters.date_from is not None:
+            conditions.append('date >= ?')
+            params.append(to_iso(filters.date_from))
+        if filters.date_to is not None:
+            conditions.append('date <= ?')
+            params.append(to_iso(filters.date_to))
+    except ValueError:
+        return JSONResponse(content={'message': "Используйте формат даты 'DD-MM-YYYY'"}, status_code=422)
+    return await list_rows(request, 'records', conditions, params, page)
+
+
+@app.get('/users/{user_id}/export')
+async def export_user(
+    user_id: str,
+    fmt: Annotated[Literal['csv', 'ndjson'], Query(alias='format')] = 'ndjson',
+    cursor: Optional[str] = None,
+) -> StreamingResponse:
+    """Stream the user, the habits and the records of the user from the database.
+
+    Args:
+        user_id (str): unique id of the user
+        fmt (Literal['csv', 'ndjson']): format of the file
+        cursor (Optional[str], optional): id of the last record received before, to resume an interrupted export
 
     Returns:
-        list: list of all records
+        StreamingResponse: the history of the user, one user, habit or record per line
     """
-    with db_connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM records')
-        return cursor.fetchall()
+    await writes.sync()
+    shard = db.shard(user_id)
+    if await shard.fetch_one(queries.SELECT_USER, (user_id,)) is None:
+        return JSONResponse(content={'message': 'Пользователь не найден'}, status_code=404)
+    if cursor is not None and await shard.fetch_one(queries.SELECT_RECORD_POSITION, (cursor,)) is None:
+        return JSONResponse(content={'message': 'Запись не найдена'}, status_code=404)
+    headers = {'Content-Disposition': f'attachment; filename="habits-{user_id}.{fmt}"'}
+    return StreamingResponse(
+        export_lines(shard, user_id, fmt, cursor), media_type=TRANSFER_MEDIA_TYPES[fmt], headers=headers
+    )
+
+
+@app.post('/users/import')
+async def import_users(
+    request: Request,
+    fmt: Annotated[Literal['csv', 'ndjson'], Query(alias='format')] = 'ndjson',
+    skip: Annotated[int, Query(ge=0)] = 0,
+) -> ImportResponse:
+    """Import users, habits and records from the body of the request as it arrives.
+
+    Args:
+        request (Request): the request with the file in its body
+        fmt (Literal['csv', 'ndjson']): format of the file
+        skip (int, optional): number of lines imported before, the checkpoint of an interrupted import
+
+    Returns:
+        ImportResponse: numbers of imported users, habits and records, the skipped lines and the checkpoint
+    """
+    importer = Importer(db, writes)
+    try:
+        result = await importer.run(request.stream(), fmt, skip)
+    finally:
+        await reload_users(hydrator, writes, importer.user_ids)
+        responses.bump('users', 'habits', 'records')
+    return result
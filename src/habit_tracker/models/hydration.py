@@ -0,0 +1,322 @@
+import os
+from collections import OrderedDict
+from datetime import date
+from typing import Awaitable, Callable, Iterable, Optional
+
+from src.habit_tracker.analytics.aggregates import HabitStats
+from src.habit_tracker.ids import format_id, parse_id
+from src.habit_tracker.models import queries
+from src.habit_tracker.models.registry import HabitRegistry
+from src.habit_tracker.models.sharding import Storage
+from src.habit_tracker.trackers_main_classes import Habit, Record, User
+
+HYDRATION_MODE = os.environ.get('HABITS_HYDRATION', 'eager')
+MAX_RESIDENT_USERS = int(os.environ.get('HABITS_MAX_RESIDENT_USERS', '10000'))
+
+
+def habit_from_row(row: tuple) -> Habit:
+    """
+    Build a habit from a row of the habits table.
+
+    Args:
+        row (tuple): id, title, frequency, start_date, end_date and user_id
+
+    Returns:
+        Habit: the habit without completions
+    """
+    habit_id, title, frequency, start_date, end_date, user_id = row
+    return Habit(
+        title,
+        frequency,
+        date.fromisoformat(start_date[:10]),
+        date.fromisoformat(end_date[:10]),
+        parse_id(user_id),
+        habit_id=parse_id(habit_id),
+    )
+
+
+def attach_record_row(habit: Habit, row: tuple, registry: HabitRegistry) -> Record:
+    """
+    Build a record from a row of the records table and attach it to the habit.
+
+    Args:
+        habit (Habit): the habit of the record
+        row (tuple): id, date, mood, notes and habit_id
+        registry (HabitRegistry): indexes to add the record to
+
+    Returns:
+        Record: the record
+    """
+    record_id, day, mood, notes, _ = row
+    record = Record(habit, date.fromisoformat(day[:10]), mood or '', notes or '', record_id=parse_id(record_id))
+    habit.records.append(record)
+    registry.add_record(record)
+    habit.load_day(record.day)
+    return record
+
+
+def stats_match(habit: Habit, stats: HabitStats) -> bool:
+    """
+    Check the statistics restored from the habit_stats table against the completed days of the habit.
+
+    Args:
+        habit (Habit): the habit with all its records attached
+        stats (HabitStats): the restored statistics
+
+    Returns:
+        bool: True if the totals and the latest run agree with the completed days
+    """
+    completed = len(habit.completed_days)
+    if completed != stats.completed or not completed == sum(stats.weekly.values()) == sum(stats.monthly.values()):
+        return False
+    first = habit.start_day.toordinal()
+    done = habit.completed_days.bits_between(habit.start_day, habit.end_day)
+    done &= habit.scheduled_bits(habit.start_day, habit.end_day)
+    if done.bit_count() != stats.scheduled_completed:
+        return False
+    if not done:
+        return stats.last_day is None
+    last = first + done.bit_length() - 1
+    if stats.last_day != last:
+        return False
+    position = stats.schedule.position(last) - stats.last_run_length + 1
+    start = stats.schedule.day_at(position)
+    if start < first or (done >> (start - first)).bit_count() != stats.last_run_length:
+        return False
+    return not habit.completed_days.contains_ordinal(stats.schedule.day_at(position - 1))
+
+
+def restore_stats(habit: Habit, row: Optional[tuple]) -> None:
+    """
+    Set the statistics of the habit from its row of the habit_stats table, or count them when the row disagrees.
+
+    Args:
+        habit (Habit): the habit with all its records attached
+        row (Optional[tuple]): the row of the habit_stats table
+
+    Returns:
+        None
+    """
+    if row is not None and row[-1] is not None:
+        stats = HabitStats.from_row(row[1:], habit.schedule)
+        if stats_match(habit, stats):
+            habit.stats = stats
+            return
+    habit.stats = HabitStats.from_days(habit.completed_days, habit.schedule)
+
+
+class Hydrator:
+    """Rebuild the in-memory users, habits and records from the database."""
+
+    def __init__(
+        self,
+        db: Storage,
+        registry: HabitRegistry,
+        mode: str = HYDRATION_MODE,
+        max_users: int = MAX_RESIDENT_USERS,
+    ):
+        """
+        Initialize the Hydrator.
+
+        Args:
+            db (Storage): the database or its shards
+            registry (HabitRegistry): the indexes to fill
+            mode (str): 'eager' or 'lazy'
+            max_users (int): number of resident users in the lazy mode
+
+        Returns:
+            None
+        """
+        if mode not in {'eager', 'lazy'}:
+            raise ValueError(f'Unknown hydration mode: {mode}')
+        self.db = db
+        self.registry = registry
+        self.mode = mode
+        self.max_users = max(1, max_users)
+        self._resident: OrderedDict[int, None] = OrderedDict()
+        self.before_load: Optional[Callable[[], Awaitable[None]]] = None
+        self.on_miss: Optional[Callable[[], Awaitable[None]]] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def start(self) -> None:
+        """
+        Load the whole database in the eager mode.
+
+        Returns:
+            None
+        """
+        if self.mode == 'eager':
+            await self.load_all()
+
+    async def load_all(self) -> None:
+        """
+        Load all the users, habits and records streaming them from the database.
+
+        Returns:
+            None
+        """
+        async for user_id, username in self.db.iterate(queries.SELECT_ALL_USERS):
+            self.registry.add_user(User(username, parse_id(user_id)))
+        async for row in self.db.iterate(queries.SELECT_ALL_HABITS):
+            self._add_habit(row)
+        async for row in self.db.iterate(queries.SELECT_ALL_RECORDS):
+            habit = self.registry.get_habit(parse_id(row[4]))
+            if habit is not None:
+                attach_record_row(habit, row, self.registry)
+        stats = {parse_id(row[0]): row async for row in self.db.iterate(queries.SELECT_ALL_HABIT_STATS)}
+        for habit in self.registry.habits_by_id.values():
+            restore_stats(habit, stats.get(habit.habit_id))
+
+    def _add_habit(self, row: tuple) -> Optional[Habit]:
+        habit = habit_from_row(row)
+        user = self.registry.get_user(habit.user_id)
+        if user is None:
+            return None
+        user.add_habit(habit)
+        self.registry.add_habit(habit)
+        return habit
+
+    def track(self, user_id: int) -> None:
+        """
+        Mark the user as the most recently used one and evict the least recently used users.
+
+        Args:
+            user_id (int): unique id of a resident user
+
+        Returns:
+            None
+        """
+        if self.mode == 'eager':
+            return
+        self._resident[user_id] = None
+        self._resident.move_to_end(user_id)
+        while len(self._resident) > self.max_users:
+            evicted_id, _ = self._resident.popitem(last=False)
+            evicted = self.registry.get_user(evicted_id)
+            if evicted is not None:
+                self.registry.remove_user(evicted)
+
+    async def get_user(self, user_id: int) -> Optional[User]:
+        """
+        Find the user, loading it from the database if it is not resident.
+
+        Args:
+            user_id (int): unique id of the user
+
+        Returns:
+            Optional[User]: the user or None if it does not exist
+        """
+        user = self.registry.get_user(user_id)
+        if user is not None:
+            self.hits += 1
+        elif self.mode == 'lazy':
+            self.misses += 1
+            user = await self._load_user(user_id)
+        elif self.on_miss is not None:
+            await self.on_miss()
+            user = self.registry.get_user(user_id)
+        if user is not None:
+            self.track(user_id)
+        return user
+
+    async def refresh(self, user_id: int) -> None:
+        """
+        Drop what is known about the user after their rows were changed by another worker.
+
+        Args:
+            user_id (int): unique id of the user
+
+        Returns:
+            None
+        """
+        if self.mode == 'eager':
+            await self.reload(user_id)
+            return
+        resident = self.registry.get_user(user_id)
+        if resident is not None:
+            self.registry.remove_user(resident)
+        self._resident.pop(user_id, None)
+
+    async def reload(self, user_id: int) -> Optional[User]:
+        """
+        Load the user from the database again, replacing the resident one, in any mode.
+
+        Args:
+            user_id (int): unique id of the user
+
+        Returns:
+            Optional[User]: the user or None if it does not exist
+        """
+        resident = self.registry.get_user(user_id)
+        if resident is not None:
+            self.registry.remove_user(resident)
+        self._resident.pop(user_id, None)
+        user = await self._load_user(user_id)
+        if user is not None:
+            self.track(user_id)
+        return user
+
+    async def _load_user(self, user_id: int) -> Optional[User]:
+        if self.before_load is not None:
+            await self.before_load()
+        params = (format_id(user_id),)
+        shard = self.db.shard(params[0])
+        row = await shard.fetch_one(queries.SELECT_USER, params)
+        if row is None:
+            return None
+        user = User(row[1], user_id)
+        habit_rows = await shard.fetch_all(queries.SELECT_USER_HABITS, params)
+        record_rows = await shard.fetch_all(queries.SELECT_USER_RECORDS, params)
+        stats = {parse_id(row[0]): row for row in await shard.fetch_all(queries.SELECT_USER_STATS, params)}
+        if self.registry.get_user(user_id) is not None:
+            return self.registry.get_user(user_id)
+
+        self.registry.add_user(user)
+        for habit_row in habit_rows:
+            self._add_habit(habit_row)
+        for record_row in record_rows:
+            habit = self.registry.get_habit(parse_id(record_row[4]))
+            if habit is not None:
+                attach_record_row(habit, record_row, self.registry)
+        for habit in user.habits():
+            restore_stats(habit, stats.get(habit.habit_id))
+        return user
+
+    async def find_habit(self, habit_name: str, user_id: Optional[int] = None) -> Optional[Habit]:
+        """
+        Find the habit by name, loading its owners from the database if they are not resident.
+
+        Args:
+            habit_name (str): name of the habit
+            user_id (Optional[int]): owner of the habit
+
+        Returns:
+            Optional[Habit]: the habit or None if it does not exist
+
+        Raises:
+            AmbiguousHabitError: the owner is not specified and the name is not unique
+        """
+        habit = await self._find_habit(habit_name, user_id)
+        if habit is None and self.on_miss is not None:
+            await self.on_miss()
+            habit = await self._find_habit(habit_name, user_id)
+        return habit
+
+    async def _find_habit(self, habit_name: str, user_id: Optional[int]) -> Optional[Habit]:
+        if user_id is not None:
+            if await self.get_user(user_id) is None:
+                return None
+        elif self.mode == 'lazy':
+            if self.before_load is not None:
+                await self.before_load()
+            owners = await self.db.fetch_all(queries.SELECT_HABIT_OWNERS, (habit_name,))
+            await self._ensure_users(parse_id(row[0]) for row in owners)
+        habit = self.registry.find_habit(habit_name, user_id)
+        if habit is not None:
+            self.track(habit.user_id)
+        return habit
+
+    async def _ensure_users(self, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            await self.get_user(user_id)
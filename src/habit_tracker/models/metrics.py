@@ -0,0 +1,379 @@
+import logging
+import os
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from src.habit_tracker.models import queries
+
+SLOW_REQUEST_MS = float(os.environ.get('HABITS_SLOW_REQUEST_MS', '500'))
+SLOW_QUERY_MS = float(os.environ.get('HABITS_SLOW_QUERY_MS', '100'))
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = 'unmatched'
+QUERY_NAMES = {
+    value: name.lower() for name, value in vars(queries).items() if name.isupper() and isinstance(value, str)
+}
+STATEMENT = re.compile(r'\s*(\w+)(?:.*?\b(?:FROM|INTO|UPDATE)\s+(\w+))?', re.IGNORECASE | re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def statement_name(query: str) -> str:
+    """
+    Name the SQL statement for the metrics, so that the number of label values stays small.
+
+    Args:
+        query (str): SQL statement or 'transaction' for a whole write transaction
+
+    Returns:
+        str: name of the module-level query, or the verb and the table of a statement built at runtime
+    """
+    if query in QUERY_NAMES:
+        return QUERY_NAMES[query]
+    match = STATEMENT.match(query)
+    if match is None:
+        return 'other'
+    return '_'.join(part.lower() for part in match.groups() if part)
+
+
+def format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    """
+    Format the labels of a sample in the Prometheus text format.
+
+    Args:
+        names (Sequence[str]): label names
+        values (Sequence[Any]): label values
+
+    Returns:
+        str: the labels in braces, or an empty string without labels
+    """
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets, one series per set of label values."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        """
+        Initialize the Histogram.
+
+        Args:
+            name (str): metric name
+            documentation (str): help text
+            labelnames (Sequence[str]): names of the labels
+            buckets (Sequence[float]): upper bounds of the buckets in increasing order
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, List[float]] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        """
+        Add the value to the series of the labels.
+
+        Args:
+            labels (tuple): label values in the order of the label names
+            value (float): the observed value
+
+        Returns:
+            None
+        """
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        """
+        Format the histogram in the Prometheus text format.
+
+        Returns:
+            List[str]: lines of the exposition
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        names = (*self.labelnames, 'le')
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{format_labels(names, (*labels, bound))} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(self.labelnames, labels)} {series[-1]}')
+            lines.append(f'{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Monotonic count, one series per set of label values."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        """
+        Initialize the Counter.
+
+        Args:
+            name (str): metric name ending with '_total'
+            documentation (str): help text
+            labelnames (Sequence[str]): names of the labels
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[tuple, int] = {}
+
+    def inc(self, labels: tuple, amount: int = 1) -> None:
+        """
+        Increase the series of the labels.
+
+        Args:
+            labels (tuple): label values in the order of the label names
+            amount (int): the increment
+
+        Returns:
+            None
+        """
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        """
+        Format the counter in the Prometheus text format.
+
+        Returns:
+            List[str]: lines of the exposition
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Collected:
+    """Gauge or counter whose samples are read from the application when the metrics are scraped."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[tuple, float]]],
+    ):
+        """
+        Initialize the Collected metric.
+
+        Args:
+            name (str): metric name
+            documentation (str): help text
+            kind (str): 'gauge' or 'counter'
+            labelnames (Sequence[str]): names of the labels
+            collect (Callable[[], Iterable[Tuple[tuple, float]]]): returns the labels and the value of every sample
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        """
+        Read the samples and format them in the Prometheus text format.
+
+        Returns:
+            List[str]: lines of the exposition
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labels, value in self.collect():
+            lines.append(f'{self.name}{format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Metrics:
+    """Request, SQL and cache metrics of the API exported in the Prometheus text format."""
+
+    def __init__(self, slow_request_ms: float = SLOW_REQUEST_MS, slow_query_ms: float = SLOW_QUERY_MS):
+        """
+        Initialize the Metrics.
+
+        Args:
+            slow_request_ms (float): requests taking longer are logged as slow
+            slow_query_ms (float): SQL statements taking longer are logged as slow
+
+        Returns:
+            None
+        """
+        self.slow_request_s = slow_request_ms / 1000
+        self.slow_query_s = slow_query_ms / 1000
+        self.requests = Histogram(
+            'habits_http_request_duration_seconds', 'Latency of HTTP requests.', ('method', 'route'), LATENCY_BUCKETS
+        )
+        self.not_found = Counter('habits_http_not_found_total', 'Responses with the 404 status.', ('method', 'route'))
+        self.errors = Counter(
+            'habits_http_errors_total',
+            'Responses with a 5xx status and unhandled errors.',
+            ('method', 'route', 'status'),
+        )
+        self.queries = Histogram(
+            'habits_sql_duration_seconds',
+            'Latency of SQL statements and transactions.',
+            ('statement',),
+            LATENCY_BUCKETS,
+        )
+        self._collected: List[Collected] = []
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._collected.append(
+            Collected('habits_cache_hits_total', 'Lookups found in the cache.', 'counter', ('cache',), self._hits)
+        )
+        self._collected.append(
+            Collected('habits_cache_misses_total', 'Lookups missing the cache.', 'counter', ('cache',), self._misses)
+        )
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> None:
+        """
+        Export a value of the application read at scrape time.
+
+        Args:
+            name (str): metric name
+            documentation (str): help text
+            read (Callable[[], float]): returns the current value
+
+        Returns:
+            None
+        """
+        self._collected.append(Collected(name, documentation, 'gauge', (), lambda: [((), read())]))
+
+    def cache(self, name: str, read: Callable[[], Tuple[int, int]]) -> None:
+        """
+        Export the hits and the misses of a cache read at scrape time.
+
+        Args:
+            name (str): name of the cache in the 'cache' label
+            read (Callable[[], Tuple[int, int]]): returns the number of hits and misses
+
+        Returns:
+            None
+        """
+        self._caches[name] = read
+
+    def _hits(self) -> List[Tuple[tuple, int]]:
+        return [((name,), read()[0]) for name, read in self._caches.items()]
+
+    def _misses(self) -> List[Tuple[tuple, int]]:
+        return [((name,), read()[1]) for name, read in self._caches.items()]
+
+    def observe_request(self, scope: dict, status: int, seconds: float) -> None:
+        """
+        Record the latency and the status of a request.
+
+        Args:
+            scope (dict): ASGI scope of the request after routing
+            status (int): status of the response
+            seconds (float): time spent on the request
+
+        Returns:
+            None
+        """
+        route = scope.get('route')
+        labels = (scope['method'], route.path if route is not None else UNMATCHED_ROUTE)
+        self.requests.observe(labels, seconds)
+        if status == 404:  # noqa: PLR2004
+            self.not_found.inc(labels)
+        elif status >= 500:  # noqa: PLR2004
+            self.errors.inc((*labels, status))
+        if seconds >= self.slow_request_s:
+            logger.warning(f'Slow request: {scope["method"]} {scope["path"]} {status} took {seconds * 1000:.0f} ms')
+
+    def observe_query(self, query: str, seconds: float) -> None:
+        """
+        Record the latency of an SQL statement.
+
+        Args:
+            query (str): SQL statement or 'transaction' for a whole write transaction
+            seconds (float): time spent on the statement
+
+        Returns:
+            None
+        """
+        name = statement_name(query)
+        self.queries.observe((name,), seconds)
+        if seconds >= self.slow_query_s:
+            logger.warning(f'Slow SQL: {name} took {seconds * 1000:.0f} ms')
+
+    def render(self) -> str:
+        """
+        Format all the metrics in the Prometheus text format.
+
+        Returns:
+            str: the exposition
+        """
+        lines = []
+        for metric in (self.requests, self.not_found, self.errors, self.queries, *self._collected):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, including the streaming of the response body."""
+
+    def __init__(self, app: Callable, metrics: Metrics):
+        """
+        Initialize the MetricsMiddleware.
+
+        Args:
+            app (Callable): the wrapped ASGI application
+            metrics (Metrics): where the requests are recorded
+
+        Returns:
+            None
+        """
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """
+        Serve the request and record it.
+
+        Args:
+            scope (dict): ASGI scope
+            receive (Callable): ASGI receive channel
+            send (Callable): ASGI send channel
+
+        Returns:
+            None
+        """
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: dict) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        began = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.observe_request(scope, status, perf_counter() - began)
@@ -0,0 +1,146 @@
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Tuple
+
+import aiosqlite
+
+from src.habit_tracker.models.data_base import SCHEMA
+
+CREATE_SCHEMA_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TEXT NOT NULL
+)
+"""
+
+
+class Migration(NamedTuple):
+    """Versioned change of the database schema."""
+
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+
+MIGRATIONS = (
+    Migration(1, 'initial tables', SCHEMA),
+    Migration(
+        2,
+        'store record dates in the ISO format',
+        (
+            """
+            UPDATE records SET date = substr(date, 7, 4) || '-' || substr(date, 4, 2) || '-' || substr(date, 1, 2)
+            WHERE date GLOB '[0-9][0-9]-[0-9][0-9]-[0-9][0-9][0-9][0-9]'
+            """,
+        ),
+    ),
+    Migration(
+        3,
+        'one record per habit and day',
+        (
+            """
+            DELETE FROM records WHERE EXISTS (
+                SELECT 1 FROM records AS other
+                WHERE other.habit_id = records.habit_id AND other.date = records.date AND (
+                    (other.mood IS NOT NULL OR other.notes IS NOT NULL)
+                        > (records.mood IS NOT NULL OR records.notes IS NOT NULL)
+                    OR ((other.mood IS NOT NULL OR other.notes IS NOT NULL)
+                        = (records.mood IS NOT NULL OR records.notes IS NOT NULL) AND other.rowid < records.rowid)
+                )
+            )
+            """,
+            'CREATE UNIQUE INDEX IF NOT EXISTS idx_records_habit_date ON records(habit_id, date)',
+        ),
+    ),
+    Migration(
+        4,
+        'indexes for habit and date lookups',
+        (
+            'CREATE INDEX IF NOT EXISTS idx_habits_user_title ON habits(user_id, title)',
+            'CREATE INDEX IF NOT EXISTS idx_records_date ON records(date)',
+        ),
+    ),
+    Migration(5, 'index for habit lookups by name', ('CREATE INDEX IF NOT EXISTS idx_habits_title ON habits(title)',)),
+    Migration(
+        6,
+        'summary of habit completions',
+        (
+            """
+            CREATE TABLE IF NOT EXISTS habit_stats (
+                habit_id TEXT PRIMARY KEY,
+                completed INTEGER NOT NULL,
+                longest_streak INTEGER NOT NULL,
+                last_day TEXT,
+                last_run_length INTEGER NOT NULL,
+                weekly TEXT NOT NULL,
+                monthly TEXT NOT NULL,
+                FOREIGN KEY (habit_id) REFERENCES habits(id)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        7,
+        'log of the users changed by every worker',
+        (
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                worker TEXT NOT NULL,
+                changed_at REAL NOT NULL,
+                UNIQUE (user_id, worker)
+            )
+            """,
+            'CREATE INDEX IF NOT EXISTS idx_changes_changed_at ON changes(changed_at)',
+        ),
+    ),
+    Migration(8, 'runs of completed days in the summary', ('ALTER TABLE habit_stats ADD COLUMN runs TEXT',)),
+    Migration(
+        9,
+        'index for the habits that have not ended yet',
+        ('CREATE INDEX IF NOT EXISTS idx_habits_end_date ON habits(end_date)',),
+    ),
+    Migration(
+        10,
+        'drop the records and summaries of deleted habits',
+        (
+            'DELETE FROM records WHERE habit_id IS NULL OR habit_id NOT IN (SELECT id FROM habits)',
+            'DELETE FROM habit_stats WHERE habit_id NOT IN (SELECT id FROM habits)',
+        ),
+    ),
+)
+
+
+async def apply_migrations(conn: aiosqlite.Connection) -> List[int]:
+    """
+    Apply the migrations that are not recorded in the schema_migrations table yet.
+
+    Args:
+        conn (aiosqlite.Connection): connection that is not inside a transaction
+
+    Returns:
+        List[int]: versions of the applied migrations
+    """
+    await conn.execute(CREATE_SCHEMA_TABLE)
+    await conn.commit()
+    applied = {row[0] for row in await conn.execute_fetchall('SELECT version FROM schema_migrations')}
+
+    newly_applied = []
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        await conn.execute('BEGIN')
+        try:
+            for statement in migration.statements:
+                await conn.execute(statement)
+            await conn.execute(
+                'INSERT INTO schema_migrations VALUES (?, ?, ?)',
+                (migration.version, migration.description, datetime.now(timezone.utc).isoformat()),
+            )
+        except BaseException:
+            await conn.rollback()
+            raise
+        await conn.commit()
+        newly_applied.append(migration.version)
+    return newly_applied
@@ -0,0 +1,84 @@
+from typing import Sequence
+
+INSERT_USER = 'INSERT INTO users VALUES (?, ?)'
+INSERT_HABIT = 'INSERT INTO habits VALUES (?, ?, ?, ?, ?, ?)'
+DELETE_HABIT = 'DELETE FROM habits WHERE title=? AND user_id=?'
+INSERT_MARK = 'INSERT INTO records VALUES (?, ?, NULL, NULL, ?) ON CONFLICT(habit_id, date) DO NOTHING'
+UPSERT_RECORD = (
+    'INSERT INTO records VALUES (?, ?, ?, ?, ?) '
+    'ON CONFLICT(habit_id, date) DO UPDATE SET mood=excluded.mood, notes=excluded.notes'
+)
+UPSERT_RECORD_RETURNING_ID = UPSERT_RECORD + ' RETURNING id'
+DELETE_MARK = 'DELETE FROM records WHERE habit_id=? AND date=?'
+UPSERT_HABIT_STATS = 'INSERT OR REPLACE INTO habit_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+DELETE_HABIT_STATS = 'DELETE FROM habit_stats WHERE habit_id IN (SELECT id FROM habits WHERE title=? AND user_id=?)'
+DELETE_HABIT_RECORDS = 'DELETE FROM records WHERE habit_id IN (SELECT id FROM habits WHERE title=? AND user_id=?)'
+SELECT_RECORD_IDS = 'SELECT date, id FROM records WHERE habit_id=? AND date BETWEEN ? AND ?'
+UPDATE_RECORD_MOOD = 'UPDATE records SET mood=? WHERE id=? AND habit_id=?'
+UPDATE_RECORD_NOTES = 'UPDATE records SET notes=? WHERE id=? AND habit_id=?'
+
+SELECT_ALL_USERS = 'SELECT * FROM users'
+SELECT_ALL_HABITS = 'SELECT * FROM habits'
+SELECT_ALL_RECORDS = 'SELECT * FROM records'
+SELECT_ALL_HABIT_STATS = 'SELECT * FROM habit_stats'
+SELECT_USER = 'SELECT * FROM users WHERE id=?'
+SELECT_USER_HABITS = 'SELECT * FROM habits WHERE user_id=?'
+SELECT_USER_RECORDS = 'SELECT records.* FROM records JOIN habits ON habits.id = records.habit_id WHERE habits.user_id=?'
+SELECT_HABIT_OWNERS = 'SELECT DISTINCT user_id FROM habits WHERE title=?'
+SELECT_DUE_HABITS = (
+    'SELECT users.id, users.username, habits.* FROM habits JOIN users ON users.id = habits.user_id '
+    'WHERE habits.end_date >= ? AND habits.start_date < ? AND NOT EXISTS ('
+    'SELECT 1 FROM records WHERE records.habit_id = habits.id AND records.date >= ? AND records.date < ?) '
+    'ORDER BY users.id, habits.title'
+)
+
+UPSERT_USER = 'INSERT INTO users VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET username=excluded.username'
+UPSERT_HABIT = (
+    'INSERT INTO habits VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET title=excluded.title, '
+    'frequency=excluded.frequency, start_date=excluded.start_date, end_date=excluded.end_date, user_id=excluded.user_id'
+)
+SELECT_HABIT = 'SELECT * FROM habits WHERE id=?'
+SELECT_HABIT_DAYS = 'SELECT date FROM records WHERE habit_id=?'
+SELECT_HABIT_ID = 'SELECT id FROM habits WHERE user_id=? AND title=?'
+EXPORT_HABITS = SELECT_USER_HABITS + ' ORDER BY id'
+EXPORT_RECORDS = 'SELECT * FROM records WHERE habit_id=? AND date > ? ORDER BY date'
+SELECT_RECORD_POSITION = 'SELECT habit_id, date FROM records WHERE id=?'
+
+UPSERT_CHANGE = 'INSERT OR REPLACE INTO changes (user_id, worker, changed_at) VALUES (?, ?, ?)'
+SELECT_CHANGES = 'SELECT seq, user_id, worker FROM changes WHERE seq > ? ORDER BY seq'
+SELECT_LAST_CHANGE = 'SELECT COALESCE(MAX(seq), 0) FROM changes'
+DELETE_OLD_CHANGES = 'DELETE FROM changes WHERE changed_at < ?'
+
+HABIT_OF_USER = 'habit_id IN (SELECT id FROM habits WHERE user_id=?)'
+
+SELECT_SHARD_USERS = 'SELECT id FROM users UNION SELECT user_id FROM habits WHERE user_id IS NOT NULL'
+SELECT_USER_STATS = 'SELECT * FROM habit_stats WHERE ' + HABIT_OF_USER
+REPLACE_HABIT = 'INSERT OR REPLACE INTO habits VALUES (?, ?, ?, ?, ?, ?)'
+REPLACE_RECORD = 'INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)'
+DELETE_USER_DATA = (
+    'DELETE FROM records WHERE ' + HABIT_OF_USER,
+    'DELETE FROM habit_stats WHERE ' + HABIT_OF_USER,
+    'DELETE FROM habits WHERE user_id=?',
+    'DELETE FROM users WHERE id=?',
+)
+
+
+def select_page(table: str, conditions: Sequence[str], limited: bool) -> str:
+    """
+    Build a keyset-paginated query over a table ordered by id.
+
+    Args:
+        table (str): name of the table
+        conditions (Sequence[str]): SQL conditions joined with AND, each with its own placeholders
+        limited (bool): whether the query ends with a LIMIT placeholder
+
+    Returns:
+        str: the query
+    """
+    query = f'SELECT * FROM {table}'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY id'
+    if limited:
+        query += ' LIMIT ?'
+    return query
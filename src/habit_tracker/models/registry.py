@@ -0,0 +1,176 @@
+from typing import Callable, Dict, Optional, Tuple
+
+from src.habit_tracker.trackers_main_classes import Habit, Record, User
+
+
+class AmbiguousHabitError(LookupError):
+    """Several users have a habit with the requested name."""
+
+
+class HabitRegistry:
+    """In-memory indexes of the users, habits and records served by the API."""
+
+    def __init__(self):
+        """
+        Initialize the HabitRegistry.
+
+        Returns:
+            None
+        """
+        self.users: Dict[int, User] = {}
+        self.habits_by_id: Dict[int, Habit] = {}
+        self.habits_by_key: Dict[Tuple[int, str], Habit] = {}
+        self.habits_by_name: Dict[str, Dict[int, Habit]] = {}
+        self.records_by_id: Dict[int, Record] = {}
+        self.on_add_habit: Optional[Callable[[Habit], None]] = None
+
+    def add_user(self, user: User) -> None:
+        """
+        Register the user.
+
+        Args:
+            user (User): an instance of the User class
+
+        Returns:
+            None
+        """
+        self.users[user.user_id] = user
+
+    def remove_user(self, user: User) -> None:
+        """
+        Drop the user together with the habits and records from the indexes.
+
+        Args:
+            user (User): an instance of the User class
+
+        Returns:
+            None
+        """
+        for habit in user.habits():
+            self.remove_habit(habit)
+        self.users.pop(user.user_id, None)
+
+    def get_user(self, user_id: int) -> Optional[User]:
+        """
+        Find the user by ID.
+
+        Args:
+            user_id (int): unique id of the user
+
+        Returns:
+            Optional[User]: the user or None if it is not registered
+        """
+        return self.users.get(user_id)
+
+    def add_habit(self, habit: Habit) -> None:
+        """
+        Index the habit by its ID, by its owner and name and by its name.
+
+        Args:
+            habit (Habit): an instance of the Habit class
+
+        Returns:
+            None
+        """
+        self.habits_by_id[habit.habit_id] = habit
+        self.habits_by_key[habit.user_id, habit.habit_name] = habit
+        self.habits_by_name.setdefault(habit.habit_name, {})[habit.habit_id] = habit
+        if self.on_add_habit is not None:
+            self.on_add_habit(habit)
+
+    def remove_habit(self, habit: Habit) -> None:
+        """
+        Drop the habit and all of its records from the indexes.
+
+        Args:
+            habit (Habit): an instance of the Habit class
+
+        Returns:
+            None
+        """
+        self.habits_by_id.pop(habit.habit_id, None)
+        self.habits_by_key.pop((habit.user_id, habit.habit_name), None)
+        same_name = self.habits_by_name.get(habit.habit_name)
+        if same_name is not None:
+            same_name.pop(habit.habit_id, None)
+            if not same_name:
+                del self.habits_by_name[habit.habit_name]
+        for record in habit.records:
+            self.records_by_id.pop(record.record_id, None)
+
+    def get_habit(self, habit_id: int) -> Optional[Habit]:
+        """
+        Find the habit by ID.
+
+        Args:
+            habit_id (int): unique id of the habit
+
+        Returns:
+            Optional[Habit]: the habit or None if it does not exist
+        """
+        return self.habits_by_id.get(habit_id)
+
+    def find_habit(self, habit_name: str, user_id: Optional[int] = None) -> Optional[Habit]:
+        """
+        Find the habit by name.
+
+        Args:
+            habit_name (str): name of the habit
+            user_id (Optional[int]): owner of the habit. It is only required when several users
+                have a habit with the same name
+
+        Returns:
+            Optional[Habit]: the habit or None if it does not exist
+
+        Raises:
+            AmbiguousHabitError: the owner is not specified and the name is not unique
+        """
+        if user_id is not None:
+            return self.habits_by_key.get((user_id, habit_name))
+
+        same_name = self.habits_by_name.get(habit_name)
+        if not same_name:
+            return None
+        if len(same_name) > 1:
+            raise AmbiguousHabitError(habit_name)
+        return next(iter(same_name.values()))
+
+    def add_record(self, record: Record) -> None:
+        """
+        Index the record by its ID.
+
+        Args:
+            record (Record): an instance of the Record class
+
+        Returns:
+            None
+        """
+        self.records_by_id[record.record_id] = record
+
+    def remove_record(self, record: Record) -> None:
+        """
+        Drop the record from the index.
+
+        Args:
+            record (Record): an instance of the Record class
+
+        Returns:
+            None
+        """
+        self.records_by_id.pop(record.record_id, None)
+
+    def get_record(self, record_id: int, habit: Habit) -> Optional[Record]:
+        """
+        Find the record of the habit by ID.
+
+        Args:
+            record_id (int): unique id of the record
+            habit (Habit): the habit the record must belong to
+
+        Returns:
+            Optional[Record]: the record or None if the habit has no such record
+        """
+        record = self.records_by_id.get(record_id)
+        if record is None or record.habit is not habit:
+            return None
+        return record
@@ -0,0 +1,200 @@
+import heapq
+from datetime import date, timedelta
+from itertools import count
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from src.habit_tracker.dates import format_day
+from src.habit_tracker.ids import format_id, parse_id
+from src.habit_tracker.models import queries
+from src.habit_tracker.models.hydration import habit_from_row
+from src.habit_tracker.models.registry import HabitRegistry
+from src.habit_tracker.models.sharding import Storage
+from src.habit_tracker.trackers_main_classes import Habit, User
+
+
+def next_due_day(habit: Habit, ordinal: int) -> Optional[int]:
+    """
+    Find the first day on or after the day on which the habit is scheduled.
+
+    Args:
+        habit (Habit): the habit
+        ordinal (int): the day
+
+    Returns:
+        Optional[int]: the scheduled day or None if the habit period ends before it
+    """
+    day = habit.schedule.next_day(max(ordinal, habit.start_day.toordinal()))
+    return day if day <= habit.end_day.toordinal() else None
+
+
+class DueIndex:
+    """Habits due today, by user, kept up to date as the days pass."""
+
+    def __init__(self, registry: HabitRegistry):
+        """
+        Initialize the DueIndex.
+
+        Args:
+            registry (HabitRegistry): the habits to index
+
+        Returns:
+            None
+        """
+        self.registry = registry
+        self.today: Optional[int] = None
+        self._heap: List[Tuple[int, int, Habit]] = []
+        self._next: Dict[int, int] = {}
+        self._due: Dict[int, Dict[int, Habit]] = {}
+        self._order = count()
+
+    def _live(self, habit: Habit) -> bool:
+        return self.registry.habits_by_id.get(habit.habit_id) is habit
+
+    def add(self, habit: Habit) -> None:
+        """
+        Schedule the habit from today on.
+
+        Args:
+            habit (Habit): a habit of the registry
+
+        Returns:
+            None
+        """
+        if self.today is None:
+            return
+        day = next_due_day(habit, self.today)
+        if day == self.today:
+            self._due.setdefault(habit.user_id, {})[habit.habit_id] = habit
+            day = next_due_day(habit, self.today + 1)
+        if day is None:
+            self._next.pop(habit.habit_id, None)
+            return
+        self._next[habit.habit_id] = day
+        heapq.heappush(self._heap, (day, next(self._order), habit))
+
+    def advance(self, today: int) -> None:
+        """
+        Move the index to the day, popping only the habits scheduled on the days that have come.
+
+        Args:
+            today (int): ordinal of the current day
+
+        Returns:
+            None
+        """
+        if self.today is not None and today == self.today:
+            return
+        if self.today is None or today < self.today:
+            self.rebuild(today)
+            return
+        self.today = today
+        self._due = {}
+        while self._heap and self._heap[0][0] <= today:
+            day, _, habit = heapq.heappop(self._heap)
+            if self._next.get(habit.habit_id) == day and self._live(habit):
+                self.add(habit)
+        if len(self._heap) > 2 * len(self._next) + 1024:
+            self._compact()
+
+    def rebuild(self, today: int) -> None:
+        """
+        Index all the habits of the registry from the day on.
+
+        Args:
+            today (int): ordinal of the current day
+
+        Returns:
+            None
+        """
+        self.today = today
+        self._heap, self._next, self._due = [], {}, {}
+        for habit in self.registry.habits_by_id.values():
+            self.add(habit)
+
+    def _compact(self) -> None:
+        self._heap = [
+            entry for entry in self._heap if self._next.get(entry[2].habit_id) == entry[0] and self._live(entry[2])
+        ]
+        heapq.heapify(self._heap)
+        self._next = {entry[2].habit_id: entry[0] for entry in self._heap}
+
+    def digest(self, user_id: int) -> List[Habit]:
+        """
+        List the habits of the user due today and not completed yet.
+
+        Args:
+            user_id (int): unique id of the user
+
+        Returns:
+            List[Habit]: the habits ordered by name
+        """
+        due = self._due.get(user_id)
+        if not due:
+            return []
+        habits = [
+            habit
+            for habit in due.values()
+            if self._live(habit) and not habit.completed_days.contains_ordinal(self.today)
+        ]
+        return sorted(habits, key=lambda habit: habit.habit_name)
+
+    def digests(self) -> Iterator[Tuple[int, List[Habit]]]:
+        """
+        Yield the digests of all the users who have habits due today and not completed yet.
+
+        Yields:
+            Tuple[int, List[Habit]]: the id of the user and their due habits ordered by name
+        """
+        for user_id in list(self._due):
+            habits = self.digest(user_id)
+            if habits:
+                yield user_id, habits
+
+
+def digest_entry(user: User, day: date, habits: List[Habit]) -> Dict[str, Any]:
+    """
+    Describe the habits due for the user on the day, as they are sent in a reminder.
+
+    Args:
+        user (User): the user
+        day (date): the day
+        habits (List[Habit]): the due habits
+
+    Returns:
+        Dict[str, Any]: the user, the day and the name and frequency of every habit
+    """
+    return {
+        'user_id': format_id(user.user_id),
+        'user_name': user.user_name,
+        'day': format_day(day),
+        'habits': [
+            {'habit_id': format_id(habit.habit_id), 'habit_name': habit.habit_name, 'frequency': habit.frequency}
+            for habit in habits
+        ],
+    }
+
+
+async def read_digests(db: Storage, day: date) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Read the habits due on the day and not completed yet from the database, without loading the users.
+
+    Args:
+        db (Storage): the database
+        day (date): the day
+
+    Yields:
+        Dict[str, Any]: the digest entry of the next user who has due habits
+    """
+    first, last = day.isoformat(), (day + timedelta(days=1)).isoformat()
+    user: Optional[User] = None
+    habits: List[Habit] = []
+    async for user_id, user_name, *row in db.iterate(queries.SELECT_DUE_HABITS, (first, last, first, last)):
+        if user is None or user.user_id != parse_id(user_id):
+            if habits:
+                yield digest_entry(user, day, habits)
+            user, habits = User(user_name, parse_id(user_id)), []
+        habit = habit_from_row(tuple(row))
+        if habit.is_due(day):
+            habits.append(habit)
+    if habits:
+        yield digest_entry(user, day, habits)
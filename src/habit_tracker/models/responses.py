@@ -0,0 +1,154 @@
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+RESPONSE_CACHE_MB = float(os.environ.get('HABITS_RESPONSE_CACHE_MB', '32'))
+CACHE_CONTROL = 'no-cache'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check the If-None-Match header against the current entity tag with the weak comparison.
+
+    Args:
+        if_none_match (Optional[str]): the header of the request
+        etag (str): the current entity tag
+
+    Returns:
+        bool: True if the client already has the current representation, otherwise False
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+class ResponseCache:
+    """Entity tags, conditional requests and recently serialized responses of the read endpoints."""
+
+    def __init__(self, cache_mb: float = RESPONSE_CACHE_MB):
+        """
+        Initialize the ResponseCache.
+
+        Args:
+            cache_mb (float): megabytes of response bodies kept in memory
+
+        Returns:
+            None
+        """
+        self.cache_bytes = max(0, int(cache_mb * 1024 * 1024))
+        self.epoch = uuid.uuid4().hex[:8]
+        self._tables: Dict[str, int] = {}
+        self._cache: OrderedDict[tuple, Tuple[bytes, Dict[str, str]]] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def versions(self, *tables: str) -> Tuple[int, ...]:
+        """
+        Return the versions of the tables.
+
+        Args:
+            *tables (str): names of the tables
+
+        Returns:
+            Tuple[int, ...]: the version of every table
+        """
+        return tuple(self._tables.get(table, 0) for table in tables)
+
+    def bump(self, *tables: str) -> None:
+        """
+        Change the versions of the tables after a write to them.
+
+        Args:
+            *tables (str): names of the written tables
+
+        Returns:
+            None
+        """
+        for table in tables:
+            self._tables[table] = self._tables.get(table, 0) + 1
+
+    def etag(self, key: tuple) -> str:
+        """
+        Derive the entity tag of a response.
+
+        Args:
+            key (tuple): route, parameters and versions of the response
+
+        Returns:
+            str: the quoted entity tag
+        """
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+        return f'"{self.epoch}-{digest}"'
+
+    def lookup(self, request: Request, key: tuple) -> Optional[Response]:
+        """
+        Answer a read request with 304 or the cached body, before anything is computed.
+
+        Args:
+            request (Request): the request with the optional If-None-Match header
+            key (tuple): route, parameters and versions of the response
+
+        Returns:
+            Optional[Response]: the response with the ETag header, or None if it has to be built and stored
+        """
+        headers = self._headers(key)
+        if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        cached = self._cache.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._cache.move_to_end(key)
+        body, extra = cached
+        return Response(body, media_type='application/json', headers={**extra, **headers})
+
+    def store(self, key: tuple, content: Any, extra: Optional[Dict[str, str]] = None) -> JSONResponse:
+        """
+        Serialize the content of a response and keep it for the next requests with the same key.
+
+        Args:
+            key (tuple): route, parameters and versions of the response
+            content (Any): the content to send as JSON
+            extra (Optional[Dict[str, str]]): other headers of the response, kept together with the body
+
+        Returns:
+            JSONResponse: the response with the ETag header
+        """
+        extra = extra or {}
+        response = JSONResponse(content, headers={**extra, **self._headers(key)})
+        body = bytes(response.body)
+        if len(body) <= self.cache_bytes:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._cache[key] = (body, extra)
+            self._size += len(body)
+            while self._size > self.cache_bytes:
+                _, (evicted, _) = self._cache.popitem(last=False)
+                self._size -= len(evicted)
+        return response
+
+    def _headers(self, key: tuple) -> Dict[str, str]:
+        return {'ETag': self.etag(key), 'Cache-Control': CACHE_CONTROL}
+
+    def clear(self) -> None:
+        """
+        Forget the cached responses, the versions and the tags stay valid.
+
+        Returns:
+            None
+        """
+        self._cache.clear()
+        self._size = 0
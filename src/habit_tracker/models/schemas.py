@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from typing import Annotated, List, Literal, Optional
+
+from fastapi import Query
+from pydantic import BaseModel, Field
+
+MAX_BATCH_SIZE = 10000
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class BatchItem(BaseModel):
+    """One completion of a habit with optional mood and notes."""
+
+    habit_name: str
+    day: str
+    user_id: Optional[str] = None
+    mood: str = ''
+    notes: str = ''
+
+
+class BatchRequest(BaseModel):
+    """Completions to ingest in one request."""
+
+    items: List[BatchItem] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one ingested completion."""
+
+    index: int
+    ok: bool
+    message: str
+    record_id: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    """Outcome of the whole batch."""
+
+    created: int
+    results: List[BatchItemResult]
+
+
+class ImportIssue(BaseModel):
+    """Line of an imported file that was skipped."""
+
+    line: int
+    message: str
+
+
+class ImportResponse(BaseModel):
+    """Outcome of an import, lines is the checkpoint to resume from."""
+
+    lines: int = 0
+    users: int = 0
+    habits: int = 0
+    records: int = 0
+    rejected: int = 0
+    issues: List[ImportIssue] = []
+
+
+@dataclass
+class PageParams:
+    """Keyset pagination of a listing."""
+
+    cursor: Optional[str] = None
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_PAGE_SIZE)] = None
+    fmt: Annotated[Literal['json', 'ndjson'], Query(alias='format')] = 'json'
+
+
+@dataclass
+class RecordFilters:
+    """Filters of the records listing, the dates are in the 'dd-mm-yyyy' format."""
+
+    user_id: Optional[str] = None
+    habit_id: Optional[str] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
@@ -0,0 +1,374 @@
+import asyncio
+import hashlib
+import heapq
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence, Set, Union
+
+from src.habit_tracker.models import queries
+from src.habit_tracker.models.storage import DB_PATH, POOL_SIZE, ConnectionPool
+from src.habit_tracker.models.writes import WRITE_BATCH_SIZE, WRITE_FLUSH_MS, WRITE_MODE, WRITE_QUEUE_SIZE, WriteBehind
+
+DB_SHARDS = int(os.environ.get('HABITS_DB_SHARDS', '1'))
+JUMP_MULTIPLIER = 2862933555777941757
+UINT64 = (1 << 64) - 1
+
+
+def shard_paths(db_path: str, count: int) -> List[str]:
+    """
+    Name the database files of the shards.
+
+    Args:
+        db_path (str): path to the database file
+        count (int): number of shards
+
+    Returns:
+        List[str]: path to the file of every shard, 'habits.db', 'habits.1.db', 'habits.2.db' and so on
+    """
+    stem, extension = os.path.splitext(db_path)
+    return [db_path] + [f'{stem}.{number}{extension}' for number in range(1, count)]
+
+
+def shard_index(user_id: str, count: int) -> int:
+    """
+    Choose the shard of the user with the jump consistent hash of the id.
+
+    Args:
+        user_id (str): unique id of the user as stored in the database
+        count (int): number of shards
+
+    Returns:
+        int: number of the shard from 0 to count - 1
+    """
+    key = int.from_bytes(hashlib.blake2b(user_id.encode(), digest_size=8).digest(), 'little')
+    bucket, jump = -1, 0
+    while jump < count:
+        bucket = jump
+        key = (key * JUMP_MULTIPLIER + 1) & UINT64
+        jump = int((bucket + 1) * (1 << 31) / ((key >> 33) + 1))
+    return bucket
+
+
+async def merge_by_id(streams: List[AsyncIterator[tuple]]) -> AsyncIterator[tuple]:
+    """
+    Merge the rows of several streams ordered by their first column.
+
+    Args:
+        streams (List[AsyncIterator[tuple]]): the streams, each ordered by the first column
+
+    Yields:
+        tuple: the next row of all the streams
+    """
+    heap = []
+    try:
+        firsts = await asyncio.gather(*(anext(stream, None) for stream in streams))
+        for number, row in enumerate(firsts):
+            if row is not None:
+                heap.append((row[0], number, row))
+        heapq.heapify(heap)
+        while heap:
+            _, number, row = heap[0]
+            yield row
+            following = await anext(streams[number], None)
+            if following is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (following[0], number, following))
+    finally:
+        for stream in streams:
+            await stream.aclose()
+
+
+class ShardedPool:
+    """Databases of the users split between several SQLite files, one connection pool per file."""
+
+    def __init__(self, paths: Sequence[str], size: int = POOL_SIZE):
+        """
+        Initialize the ShardedPool.
+
+        Args:
+            paths (Sequence[str]): path to the database file of every shard
+            size (int): number of reader connections of every shard
+
+        Returns:
+            None
+        """
+        self.shards = [ConnectionPool(path, size) for path in paths]
+        self.db_path = self.shards[0].db_path
+
+    @property
+    def on_query(self) -> Optional[Callable[[str, float], None]]:
+        """Receives every statement and whole write transaction of every shard with its duration in seconds."""
+        return self.shards[0].on_query
+
+    @on_query.setter
+    def on_query(self, observe: Optional[Callable[[str, float], None]]) -> None:
+        for shard in self.shards:
+            shard.on_query = observe
+
+    def shard(self, user_id: str) -> ConnectionPool:
+        """
+        Find the pool of the shard holding the rows of the user.
+
+        Args:
+            user_id (str): unique id of the user
+
+        Returns:
+            ConnectionPool: the pool of the shard
+        """
+        return self.shards[shard_index(user_id, len(self.shards))]
+
+    async def open(self) -> None:
+        """
+        Open the pools of all the shards and bring their schemas up to date.
+
+        Returns:
+            None
+        """
+        await asyncio.gather(*(shard.open() for shard in self.shards))
+
+    async def close(self) -> None:
+        """
+        Close the pools of all the shards.
+
+        Returns:
+            None
+        """
+        await asyncio.gather(*(shard.close() for shard in self.shards))
+
+    async def fetch_all(self, query: str, params: Sequence[Any] = ()) -> List[tuple]:
+        """
+        Fetch all the rows of a query from every shard in parallel.
+
+        Args:
+            query (str): SQL query
+            params (Sequence[Any]): query parameters
+
+        Returns:
+            List[tuple]: the rows of all the shards merged by the first column
+        """
+        results = await asyncio.gather(*(shard.fetch_all(query, params) for shard in self.shards))
+        return list(heapq.merge(*results, key=lambda row: row[0]))
+
+    async def iterate(self, query: str, params: Sequence[Any] = (), chunk_size: int = 500) -> AsyncIterator[tuple]:
+        """
+        Yield the rows of a query from every shard as they are fetched.
+
+        Args:
+            query (str): SQL query
+            params (Sequence[Any]): query parameters
+            chunk_size (int): number of rows fetched from the cursor of a shard at once
+
+        Yields:
+            tuple: the next row of all the shards merged by the first column
+        """
+        async for row in merge_by_id([shard.iterate(query, params, chunk_size) for shard in self.shards]):
+            yield row
+
+    async def fetch_one(self, query: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        """
+        Fetch the first row of a query from every shard in parallel.
+
+        Args:
+            query (str): SQL query
+            params (Sequence[Any]): query parameters
+
+        Returns:
+            Optional[tuple]: the row of the first shard that has one or None if nothing was found
+        """
+        rows = await asyncio.gather(*(shard.fetch_one(query, params) for shard in self.shards))
+        return next((row for row in rows if row is not None), None)
+
+
+class ShardedWrites:
+    """Writes of the users split between the shards, each shard written by its own WriteBehind."""
+
+    def __init__(
+        self,
+        db: ShardedPool,
+        mode: str = WRITE_MODE,
+        queue_size: int = WRITE_QUEUE_SIZE,
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_ms: float = WRITE_FLUSH_MS,
+    ):
+        """
+        Initialize the ShardedWrites.
+
+        Args:
+            db (ShardedPool): the shards
+            mode (str): 'immediate' or 'write-behind'
+            queue_size (int): number of queued writes of every shard
+            batch_size (int): maximum number of writes committed in one transaction
+            flush_ms (float): how long a group waits for more writes after the first one
+
+        Returns:
+            None
+        """
+        self.db = db
+        self.mode = mode
+        self.lanes = [WriteBehind(shard, mode, queue_size, batch_size, flush_ms) for shard in db.shards]
+
+    @property
+    def depth(self) -> int:
+        """Number of writes waiting in the queues of all the shards."""
+        return sum(lane.depth for lane in self.lanes)
+
+    @property
+    def worker(self) -> Optional[str]:
+        """Name under which the transactions of every shard record the changed users."""
+        return self.lanes[0].worker
+
+    @worker.setter
+    def worker(self, worker: Optional[str]) -> None:
+        for lane in self.lanes:
+            lane.worker = worker
+
+    @property
+    def on_failed(self) -> Optional[Callable[[Set[str]], Awaitable[None]]]:
+        """Receives the ids of the users changed by the failed queued writes of every shard."""
+        return self.lanes[0].on_failed
+
+    @on_failed.setter
+    def on_failed(self, repair: Optional[Callable[[Set[str]], Awaitable[None]]]) -> None:
+        for lane in self.lanes:
+            lane.on_failed = repair
+
+    def shard(self, user_id: str) -> WriteBehind:
+        """
+        Find the writes of the shard holding the rows of the user.
+
+        Args:
+            user_id (str): unique id of the user
+
+        Returns:
+            WriteBehind: the writes of the shard
+        """
+        return self.lanes[shard_index(user_id, len(self.lanes))]
+
+    def start(self) -> None:
+        """
+        Start the background tasks of all the shards in the write-behind mode.
+
+        Returns:
+            None
+        """
+        for lane in self.lanes:
+            lane.start()
+
+    async def close(self) -> None:
+        """
+        Commit the queued writes of all the shards and stop the background tasks.
+
+        Returns:
+            None
+        """
+        await asyncio.gather(*(lane.close() for lane in self.lanes))
+
+    async def sync(self) -> None:
+        """
+        Wait until the writes queued so far on all the shards are committed.
+
+        Returns:
+            None
+        """
+        await asyncio.gather(*(lane.sync() for lane in self.lanes))
+
+
+Storage = Union[ConnectionPool, ShardedPool]
+Writes = Union[WriteBehind, ShardedWrites]
+
+
+def make_storage(db_path: str = DB_PATH, shards: int = DB_SHARDS, size: int = POOL_SIZE) -> Storage:
+    """
+    Create the pool of the database, or of its shards.
+
+    Args:
+        db_path (str): path to the database file, the first shard
+        shards (int): number of shards
+        size (int): number of reader connections of every shard
+
+    Returns:
+        Storage: a ConnectionPool for a single database, otherwise a ShardedPool
+    """
+    if shards <= 1:
+        return ConnectionPool(db_path, size)
+    return ShardedPool(shard_paths(db_path, shards), size)
+
+
+def make_writes(db: Storage, mode: str = WRITE_MODE) -> Writes:
+    """
+    Create the writes of the database, or of its shards.
+
+    Args:
+        db (Storage): the database
+        mode (str): 'immediate' or 'write-behind'
+
+    Returns:
+        Writes: a WriteBehind for a single database, otherwise a ShardedWrites
+    """
+    if isinstance(db, ShardedPool):
+        return ShardedWrites(db, mode)
+    return WriteBehind(db, mode)
+
+
+async def move_user(source: ConnectionPool, target: ConnectionPool, user_id: str) -> None:
+    """
+    Copy the user, their habits, records and statistics to another shard and delete them from the source.
+
+    Args:
+        source (ConnectionPool): the shard the user is on
+        target (ConnectionPool): the shard the user moves to
+        user_id (str): unique id of the user
+
+    Returns:
+        None
+    """
+    params = (user_id,)
+    users = await source.fetch_all(queries.SELECT_USER, params)
+    habits = await source.fetch_all(queries.SELECT_USER_HABITS, params)
+    records = await source.fetch_all(queries.SELECT_USER_RECORDS, params)
+    stats = await source.fetch_all(queries.SELECT_USER_STATS, params)
+    async with target.transaction() as conn:
+        for query, rows in (
+            (queries.UPSERT_USER, users),
+            (queries.REPLACE_HABIT, habits),
+            (queries.REPLACE_RECORD, records),
+            (queries.UPSERT_HABIT_STATS, stats),
+        ):
+            await conn.executemany(query, rows)
+    async with source.transaction() as conn:
+        for query in queries.DELETE_USER_DATA:
+            await conn.execute(query, params)
+
+
+async def rebalance(
+    db_path: str, old_count: int, new_count: int, on_move: Optional[Callable[[str, int, int], None]] = None
+) -> int:
+    """
+    Move every user whose shard changes with the number of shards.
+
+    Args:
+        db_path (str): path to the database file, the first shard
+        old_count (int): number of shards the data is split between now
+        new_count (int): number of shards to split the data between
+        on_move (Optional[Callable[[str, int, int], None]]): receives the id, source and target of a moved user
+
+    Returns:
+        int: number of moved users
+    """
+    old_count, new_count = max(1, old_count), max(1, new_count)
+    pools = [ConnectionPool(path, 1) for path in shard_paths(db_path, max(old_count, new_count))]
+    await asyncio.gather(*(pool.open() for pool in pools))
+    moved = 0
+    try:
+        for source in range(old_count):
+            for (user_id,) in await pools[source].fetch_all(queries.SELECT_SHARD_USERS):
+                target = shard_index(user_id, new_count)
+                if target == source:
+                    continue
+                await move_user(pools[source], pools[target], user_id)
+                moved += 1
+                if on_move is not None:
+                    on_move(user_id, source, target)
+    finally:
+        await asyncio.gather(*(pool.close() for pool in pools))
+    return moved
@@ -0,0 +1,328 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager, contextmanager
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, Generator, Iterable, List, Optional, Sequence
+
+import aiosqlite
+
+from src.habit_tracker.models.migrations import apply_migrations
+
+DB_PATH = os.environ.get('HABITS_DB_PATH', 'src/habit_tracker/models/habits.db')
+POOL_SIZE = int(os.environ.get('HABITS_DB_POOL_SIZE', '4'))
+BUSY_TIMEOUT = 30.0
+CACHED_STATEMENTS = 256
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+)
+TRANSACTION = 'transaction'
+
+
+class TimedResult:
+    """Statement of a TimedConnection that is timed when it is awaited or entered."""
+
+    __slots__ = ('_cursor', '_observe', '_query', '_result')
+
+    def __init__(self, result: Any, query: str, observe: Callable[[str, float], None]):
+        """
+        Initialize the TimedResult.
+
+        Args:
+            result (Any): the pending statement returned by aiosqlite
+            query (str): SQL statement
+            observe (Callable[[str, float], None]): receives the statement and its duration in seconds
+
+        Returns:
+            None
+        """
+        self._result = result
+        self._query = query
+        self._observe = observe
+        self._cursor: Optional[aiosqlite.Cursor] = None
+
+    def __await__(self) -> Generator[Any, None, aiosqlite.Cursor]:
+        """Execute the statement and return the cursor."""
+        began = perf_counter()
+        cursor = yield from self._result.__await__()
+        self._observe(self._query, perf_counter() - began)
+        return cursor
+
+    async def __aenter__(self) -> aiosqlite.Cursor:
+        """Execute the statement and return the cursor for the block."""
+        self._cursor = await self
+        return self._cursor
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the cursor."""
+        await self._cursor.close()
+
+
+class TimedConnection:
+    """Writer connection handed to a transaction block that times every statement executed on it."""
+
+    __slots__ = ('_conn', '_observe')
+
+    def __init__(self, conn: aiosqlite.Connection, observe: Callable[[str, float], None]):
+        """
+        Initialize the TimedConnection.
+
+        Args:
+            conn (aiosqlite.Connection): the writer connection
+            observe (Callable[[str, float], None]): receives every statement and its duration in seconds
+
+        Returns:
+            None
+        """
+        self._conn = conn
+        self._observe = observe
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else to the connection."""
+        return getattr(self._conn, name)
+
+    def execute(self, query: str, params: Sequence[Any] = ()) -> TimedResult:
+        """
+        Execute the statement, it can be awaited or used as an async context manager.
+
+        Args:
+            query (str): SQL statement
+            params (Sequence[Any]): statement parameters
+
+        Returns:
+            TimedResult: the pending statement
+        """
+        return TimedResult(self._conn.execute(query, params), query, self._observe)
+
+    async def executemany(self, query: str, params: Iterable[Sequence[Any]]) -> aiosqlite.Cursor:
+        """
+        Execute the statement for every parameter set.
+
+        Args:
+            query (str): SQL statement
+            params (Iterable[Sequence[Any]]): parameter sets
+
+        Returns:
+            aiosqlite.Cursor: the cursor
+        """
+        began = perf_counter()
+        cursor = await self._conn.executemany(query, params)
+        self._observe(query, perf_counter() - began)
+        return cursor
+
+    async def execute_fetchall(self, query: str, params: Sequence[Any] = ()) -> Iterable[tuple]:
+        """
+        Execute the query and fetch all its rows.
+
+        Args:
+            query (str): SQL query
+            params (Sequence[Any]): query parameters
+
+        Returns:
+            Iterable[tuple]: the rows
+        """
+        began = perf_counter()
+        rows = await self._conn.execute_fetchall(query, params)
+        self._observe(query, perf_counter() - began)
+        return rows
+
+
+class ConnectionPool:
+    """Pool of persistent aiosqlite connections shared by all requests."""
+
+    def __init__(self, db_path: str = DB_PATH, size: int = POOL_SIZE):
+        """
+        Initialize the ConnectionPool.
+
+        Args:
+            db_path (str): path to the SQLite database file
+            size (int): number of reader connections
+
+        Returns:
+            None
+        """
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._readers: Optional[asyncio.Queue] = None
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._connections: List[aiosqlite.Connection] = []
+        self.on_query: Optional[Callable[[str, float], None]] = None
+
+    @property
+    def shards(self) -> List['ConnectionPool']:
+        """The pools of all the shards, as a ShardedPool has, only this one."""
+        return [self]
+
+    def shard(self, _user_id: str) -> 'ConnectionPool':
+        """
+        Find the pool holding the rows of the user, as a ShardedPool does.
+
+        Args:
+            _user_id (str): unique id of the user
+
+        Returns:
+            ConnectionPool: this pool, the single database holds the rows of every user
+        """
+        return self
+
+    @contextmanager
+    def _timed(self, query: str) -> Generator[None, None, None]:
+        if self.on_query is None:
+            yield
+            return
+        began = perf_counter()
+        try:
+            yield
+        finally:
+            self.on_query(query, perf_counter() - began)
+
+    async def _connect(self, isolation_level: Optional[str]) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=isolation_level,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        for pragma in PRAGMAS:
+            await conn.execute(pragma)
+        self._connections.append(conn)
+        return conn
+
+    async def open(self) -> None:
+        """
+        Open the connections and bring the schema up to date.
+
+        Returns:
+            None
+        """
+        self._write_lock = asyncio.Lock()
+        self._writer = await self._connect(isolation_level='')
+        await apply_migrations(self._writer)
+
+        self._readers = asyncio.Queue()
+        for _ in range(self.size):
+            self._readers.put_nowait(await self._connect(isolation_level=None))
+
+    async def close(self) -> None:
+        """
+        Close all the connections of the pool.
+
+        Returns:
+            None
+        """
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+        self._writer = None
+        self._readers = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Borrow a reader connection for the duration of the block.
+
+        Yields:
+            aiosqlite.Connection: connection in autocommit mode
+        """
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Run the block inside one write transaction.
+
+        Yields:
+            aiosqlite.Connection: the writer connection, timing the statements if on_query is set
+        """
+        with self._timed(TRANSACTION):
+            async with self._write_lock:
+                conn = self._writer if self.on_query is None else TimedConnection(self._writer, self.on_query)
+                try:
+                    yield conn
+                except BaseException:
+                    await self._writer.rollback()
+                    raise
+                await self._writer.commit()
+
+    async def execute(self, query: str, params: Sequence[Any] = ()) -> None:
+        """
+        Execute a single write statement and commit it.
+
+        Args:
+            query (str): SQL statement
+            params (Sequence[Any]): statement parameters
+
+        Returns:
+            None
+        """
+        async with self.transaction() as conn:
+            await conn.execute(query, params)
+
+    async def execute_many(self, query: str, params: Iterable[Sequence[Any]]) -> None:
+        """
+        Execute a write statement for every parameter set in one transaction.
+
+        Args:
+            query (str): SQL statement
+            params (Iterable[Sequence[Any]]): parameter sets
+
+        Returns:
+            None
+        """
+        async with self.transaction() as conn:
+            await conn.executemany(query, params)
+
+    async def fetch_all(self, query: str, params: Sequence[Any] = ()) -> List[tuple]:
+        """
+        Fetch all the rows of a query.
+
+        Args:
+            query (str): SQL query
+            params (Sequence[Any]): query parameters
+
+        Returns:
+            List[tuple]: fetched rows
+        """
+        with self._timed(query):
+            async with self.reader() as conn, conn.execute(query, params) as cursor:
+                return list(await cursor.fetchall())
+
+    async def iterate(self, query: str, params: Sequence[Any] = (), chunk_size: int = 500) -> AsyncIterator[tuple]:
+        """
+        Yield the rows of a query as they are fetched, chunk by chunk.
+
+        Args:
+            query (str): SQL query
+            params (Sequence[Any]): query parameters
+            chunk_size (int): number of rows fetched from the cursor at once
+
+        Yields:
+            tuple: the next row
+        """
+        with self._timed(query):
+            async with self.reader() as conn, conn.execute(query, params) as cursor:
+                while rows := await cursor.fetchmany(chunk_size):
+                    for row in rows:
+                        yield row
+
+    async def fetch_one(self, query: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        """
+        Fetch the first row of a query.
+
+        Args:
+            query (str): SQL query
+            params (Sequence[Any]): query parameters
+
+        Returns:
+            Optional[tuple]: the row or None if nothing was found
+        """
+        with self._timed(query):
+            async with self.reader() as conn, conn.execute(query, params) as cursor:
+                return await cursor.fetchone()
@@ -0,0 +1,497 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import os
+import sqlite3
+from datetime import date
+from functools import partial
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import aiosqlite
+
+from src.habit_tracker.analytics.aggregates import HabitStats
+from src.habit_tracker.ids import parse_id
+from src.habit_tracker.models import queries
+from src.habit_tracker.models.hydration import Hydrator, habit_from_row
+from src.habit_tracker.models.schemas import ImportIssue, ImportResponse
+from src.habit_tracker.models.sharding import Storage, Writes
+from src.habit_tracker.models.writes import save_stats
+
+IMPORT_CHUNK_SIZE = int(os.environ.get('HABITS_IMPORT_CHUNK_SIZE', '5000'))
+EXPORT_CHUNK_SIZE = 500
+MAX_ISSUES = 100
+FIELDS = ('kind', 'id', 'user_id', 'name', 'frequency', 'start_date', 'end_date', 'habit_id', 'date', 'mood', 'notes')
+MEDIA_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+UNREADABLE = 'Строка не разобрана'
+
+
+async def export_items(db: Storage, user_id: str, cursor: Optional[str] = None) -> AsyncIterator[dict]:
+    """
+    Yield the user, the habits and the records of the user straight from the database cursors.
+
+    Args:
+        db (Storage): the database or its shards
+        user_id (str): unique id of the user
+        cursor (Optional[str]): id of the last record exported before, only the following records are yielded
+
+    Yields:
+        dict: the next user, habit or record with the 'kind' key
+    """
+    db = db.shard(user_id)
+    user = await db.fetch_one(queries.SELECT_USER, (user_id,))
+    if user is None:
+        return
+    habits = await db.fetch_all(queries.EXPORT_HABITS, (user_id,))
+    after_habit, after_day = '', ''
+    if cursor is None:
+        yield {'kind': 'user', 'id': user[0], 'name': user[1]}
+        for habit_id, title, frequency, start_date, end_date, owner in habits:
+            yield {
+                'kind': 'habit',
+                'id': habit_id,
+                'user_id': owner,
+                'name': title,
+                'frequency': frequency,
+                'start_date': start_date[:10],
+                'end_date': end_date[:10],
+            }
+    else:
+        position = await db.fetch_one(queries.SELECT_RECORD_POSITION, (cursor,))
+        if position is None:
+            return
+        after_habit, after_day = position
+
+    for habit_id, *_ in habits:
+        if habit_id < after_habit:
+            continue
+        params = (habit_id, after_day if habit_id == after_habit else '')
+        async for record_id, day, mood, notes, _ in db.iterate(queries.EXPORT_RECORDS, params):
+            yield {
+                'kind': 'record',
+                'id': record_id,
+                'habit_id': habit_id,
+                'date': day[:10],
+                'mood': mood,
+                'notes': notes,
+            }
+
+
+async def export_lines(db: Storage, user_id: str, fmt: str, cursor: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Format the history of the user as CSV or NDJSON, a chunk of lines at a time.
+
+    Args:
+        db (Storage): the database or its shards
+        user_id (str): unique id of the user
+        fmt (str): 'csv' or 'ndjson'
+        cursor (Optional[str]): id of the last record exported before
+
+    Yields:
+        str: the next lines
+    """
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, FIELDS, lineterminator='\n')
+        if cursor is None:
+            writer.writeheader()
+        write = writer.writerow
+    else:
+        write = partial(write_json_line, buffer)
+
+    count = 0
+    async for item in export_items(db, user_id, cursor):
+        write(item)
+        count += 1
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_json_line(buffer: io.StringIO, item: dict) -> None:
+    """
+    Write the item as one line of NDJSON.
+
+    Args:
+        buffer (io.StringIO): where the line is written
+        item (dict): the item
+
+    Returns:
+        None
+    """
+    buffer.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+
+async def read_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Split a stream of UTF-8 bytes into lines without reading it whole.
+
+    Args:
+        chunks (AsyncIterable[bytes]): the stream
+
+    Yields:
+        str: the next line without the line break
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    rest = ''
+    async for chunk in chunks:
+        *lines, rest = (rest + decoder.decode(chunk)).split('\n')
+        for line in lines:
+            yield line
+    rest += decoder.decode(b'', final=True)
+    if rest:
+        yield rest
+
+
+async def read_items(chunks: AsyncIterable[bytes], fmt: str) -> AsyncIterator[Union[dict, str]]:
+    """
+    Parse a stream of CSV or NDJSON into items, skipping the blank lines.
+
+    Args:
+        chunks (AsyncIterable[bytes]): the stream
+        fmt (str): 'csv' or 'ndjson'
+
+    Yields:
+        Union[dict, str]: the next item, or the reason it could not be read
+    """
+    if fmt == 'ndjson':
+        async for line in read_lines(chunks):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = UNREADABLE
+            yield item if isinstance(item, dict) else UNREADABLE
+        return
+
+    header = None
+    pending: List[str] = []
+    quotes = 0
+    async for line in read_lines(chunks):
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        text = '\n'.join(pending)
+        pending, quotes = [], 0
+        if not text.strip():
+            continue
+        row = next(csv.reader([text]))
+        if header is None:
+            header = row
+            continue
+        yield {key: value or None for key, value in zip(header, row)}
+    if pending:
+        yield UNREADABLE
+
+
+def text_field(item: dict, key: str) -> str:
+    """
+    Read a field of an imported item as text.
+
+    Args:
+        item (dict): the item
+        key (str): name of the field
+
+    Returns:
+        str: the value, empty if the field is missing
+    """
+    value = item.get(key)
+    return '' if value is None else str(value)
+
+
+def optional_text(item: dict, key: str) -> Optional[str]:
+    """
+    Read an optional field of an imported item.
+
+    Args:
+        item (dict): the item
+        key (str): name of the field
+
+    Returns:
+        Optional[str]: the value, None if the field is missing
+    """
+    value = item.get(key)
+    return None if value is None else str(value)
+
+
+def parse_period(item: dict) -> Optional[Tuple[date, date]]:
+    """
+    Read the period of an imported habit.
+
+    Args:
+        item (dict): the habit with the start_date and end_date fields in the ISO format
+
+    Returns:
+        Optional[Tuple[date, date]]: the first and the last day, None if a date is invalid or the period is empty
+    """
+    try:
+        start_day = date.fromisoformat(text_field(item, 'start_date'))
+        end_day = date.fromisoformat(text_field(item, 'end_date'))
+    except ValueError:
+        return None
+    return (start_day, end_day) if start_day <= end_day else None
+
+
+async def write_rows(conn: aiosqlite.Connection, rows: Tuple[List[tuple], List[tuple], List[tuple]]) -> List[int]:
+    """
+    Upsert a chunk of imported users, habits and records.
+
+    Args:
+        conn (aiosqlite.Connection): the writer connection
+        rows (Tuple[List[tuple], List[tuple], List[tuple]]): rows of the users, the habits and the records
+
+    Returns:
+        List[int]: positions of the records that were not written
+    """
+    users, habits, records = rows
+    for query, params in ((queries.UPSERT_USER, users), (queries.UPSERT_HABIT, habits)):
+        if params:
+            await conn.executemany(query, params)
+    if not records:
+        return []
+    try:
+        await conn.executemany(queries.UPSERT_RECORD, records)
+        return []
+    except sqlite3.IntegrityError:
+        pass
+    conflicts = []
+    for position, record in enumerate(records):
+        try:
+            await conn.execute(queries.UPSERT_RECORD, record)
+        except sqlite3.IntegrityError:
+            conflicts.append(position)
+    return conflicts
+
+
+class Importer:
+    """Import users, habits and records from a stream of CSV or NDJSON."""
+
+    def __init__(self, db: Storage, writes: Writes, chunk_size: int = IMPORT_CHUNK_SIZE):
+        """
+        Initialize the Importer.
+
+        Args:
+            db (Storage): the database to look up the users and habits that are not in the file
+            writes (Writes): where the chunks are written
+            chunk_size (int): number of rows written in one transaction
+
+        Returns:
+            None
+        """
+        self.db = db
+        self.writes = writes
+        self.chunk_size = max(1, chunk_size)
+        self.result = ImportResponse()
+        self.user_ids: Set[str] = set()
+        self._users: Set[str] = set()
+        self._habits: Dict[str, Optional[Tuple[str, date, date]]] = {}
+        self._titles: Dict[Tuple[str, str], Optional[str]] = {}
+        self._rows: Tuple[List[tuple], List[tuple], List[tuple]] = ([], [], [])
+        self._record_lines: List[int] = []
+
+    async def run(
+        self,
+        chunks: AsyncIterable[bytes],
+        fmt: str,
+        skip: int = 0,
+        on_commit: Optional[Callable[[int], None]] = None,
+    ) -> ImportResponse:
+        """
+        Import the stream.
+
+        Args:
+            chunks (AsyncIterable[bytes]): the stream
+            fmt (str): 'csv' or 'ndjson'
+            skip (int): number of lines imported before, the checkpoint of an interrupted import
+            on_commit (Optional[Callable[[int], None]]): receives the checkpoint after every commit
+
+        Returns:
+            ImportResponse: numbers of imported users, habits and records, and the skipped lines
+        """
+        number = skip
+        self.result.lines = skip
+        line = 0
+        async for item in read_items(chunks, fmt):
+            line += 1
+            if line <= skip:
+                continue
+            number = line
+            message = item if isinstance(item, str) else await self._accept(item, line)
+            if message is not None:
+                self._reject(line, message)
+            if sum(map(len, self._rows)) >= self.chunk_size:
+                await self._commit(line, on_commit)
+        await self._commit(number, on_commit)
+        return self.result
+
+    async def _commit(self, line: int, on_commit: Optional[Callable[[int], None]]) -> None:
+        users, habits, records = self._rows
+        record_lines = self._record_lines
+        self._rows, self._record_lines = ([], [], []), []
+        lanes = {}
+        owners = {}
+        lines = {}
+        for kind, rows, owner_of in (
+            (0, users, lambda row: row[0]),
+            (1, habits, lambda row: row[5]),
+            (2, records, lambda row: self._habits[row[4]][0]),
+        ):
+            for row in rows:
+                owner = owner_of(row)
+                lane = self.writes.shard(owner)
+                lanes.setdefault(lane, ([], [], []))[kind].append(row)
+                owners.setdefault(lane, set()).add(owner)
+        for row, line_number in zip(records, record_lines):
+            lines.setdefault(self.writes.shard(self._habits[row[4]][0]), []).append(line_number)
+        conflicts = await asyncio.gather(
+            *(lane.submit(partial(write_rows, rows=rows), users=owners[lane]) for lane, rows in lanes.items())
+        )
+        rejected = [lines[lane][position] for lane, positions in zip(lanes, conflicts) for position in positions]
+        for line_number in sorted(rejected):
+            self.result.records -= 1
+            self._reject(line_number, 'Запись с таким id уже есть у другой привычки или даты')
+        self.result.lines = line
+        if on_commit is not None:
+            on_commit(line)
+
+    def _reject(self, line: int, message: str) -> None:
+        self.result.rejected += 1
+        if len(self.result.issues) < MAX_ISSUES:
+            self.result.issues.append(ImportIssue(line=line, message=message))
+
+    async def _accept(self, item: dict, line: int) -> Optional[str]:
+        kind = item.get('kind')
+        item_id = text_field(item, 'id')
+        if not item_id:
+            return 'Не указан id'
+        if kind == 'user':
+            return self._accept_user(item, item_id)
+        if kind == 'habit':
+            return await self._accept_habit(item, item_id)
+        if kind == 'record':
+            return await self._accept_record(item, item_id, line)
+        return 'Неизвестный тип строки'
+
+    def _accept_user(self, item: dict, user_id: str) -> Optional[str]:
+        name = text_field(item, 'name')
+        if not name:
+            return 'Не указано имя'
+        self._rows[0].append((user_id, name))
+        self._users.add(user_id)
+        self.user_ids.add(user_id)
+        self.result.users += 1
+        return None
+
+    async def _accept_habit(self, item: dict, habit_id: str) -> Optional[str]:
+        owner = text_field(item, 'user_id')
+        name = text_field(item, 'name')
+        if not await self._user_exists(owner):
+            return 'Пользователь не найден'
+        if not name:
+            return 'Не указано название'
+        period = parse_period(item)
+        if period is None:
+            return 'Неверный период привычки'
+        start_day, end_day = period
+        stored = await self._habit(habit_id)
+        if stored is not None and stored[0] != owner:
+            return 'Привычка принадлежит другому пользователю'
+        if await self._habit_id(owner, name) not in {None, habit_id}:
+            return f"Привычка '{name}' уже существует"
+
+        frequency = text_field(item, 'frequency')
+        self._rows[1].append((habit_id, name, frequency, start_day.isoformat(), end_day.isoformat(), owner))
+        self._habits[habit_id] = (owner, start_day, end_day)
+        self._titles[owner, name] = habit_id
+        self.user_ids.add(owner)
+        self.result.habits += 1
+        return None
+
+    async def _accept_record(self, item: dict, record_id: str, line: int) -> Optional[str]:
+        habit_id = text_field(item, 'habit_id')
+        habit = await self._habit(habit_id)
+        if habit is None:
+            return 'Привычка не найдена'
+        owner, start_day, end_day = habit
+        try:
+            day = date.fromisoformat(text_field(item, 'date'))
+        except ValueError:
+            return 'Неверный формат даты'
+        if not end_day >= day >= start_day:
+            return 'Дата вне периода привычки'
+
+        mood, notes = optional_text(item, 'mood'), optional_text(item, 'notes')
+        self._rows[2].append((record_id, day.isoformat(), mood, notes, habit_id))
+        self._record_lines.append(line)
+        self.user_ids.add(owner)
+        self.result.records += 1
+        return None
+
+    async def _user_exists(self, user_id: str) -> bool:
+        if user_id in self._users:
+            return True
+        if not user_id or await self.db.shard(user_id).fetch_one(queries.SELECT_USER, (user_id,)) is None:
+            return False
+        self._users.add(user_id)
+        return True
+
+    async def _habit(self, habit_id: str) -> Optional[Tuple[str, date, date]]:
+        if habit_id not in self._habits:
+            row = await self.db.fetch_one(queries.SELECT_HABIT, (habit_id,)) if habit_id else None
+            self._habits[habit_id] = (
+                None if row is None else (row[5], date.fromisoformat(row[3][:10]), date.fromisoformat(row[4][:10]))
+            )
+        return self._habits[habit_id]
+
+    async def _habit_id(self, user_id: str, name: str) -> Optional[str]:
+        if (user_id, name) not in self._titles:
+            row = await self.db.shard(user_id).fetch_one(queries.SELECT_HABIT_ID, (user_id, name))
+            self._titles[user_id, name] = row[0] if row else None
+        return self._titles[user_id, name]
+
+
+async def reload_users(hydrator: Hydrator, writes: Writes, user_ids: Iterable[str]) -> None:
+    """
+    Load the imported users into memory again and save the statistics of their habits.
+
+    Args:
+        hydrator (Hydrator): loads the users
+        writes (Writes): where the statistics are written
+        user_ids (Iterable[str]): ids of the imported users
+
+    Returns:
+        None
+    """
+    for user_id in user_ids:
+        user = await hydrator.reload(parse_id(user_id))
+        if user is not None and user.habits():
+            for habit in user.habits():
+                habit.stats = HabitStats.from_days(habit.completed_days, habit.schedule)
+            await writes.shard(user_id).submit(partial(save_stats, changed=list(user.habits())), users=[user_id])
+
+
+async def save_imported_stats(db: Storage, writes: Writes, user_ids: Iterable[str]) -> None:
+    """
+    Save the statistics of the habits of the imported users, reading only the days of one habit at a time.
+
+    Args:
+        db (Storage): the database or its shards
+        writes (Writes): where the statistics are written
+        user_ids (Iterable[str]): ids of the imported users
+
+    Returns:
+        None
+    """
+    for user_id in user_ids:
+        shard = db.shard(user_id)
+        for row in await shard.fetch_all(queries.SELECT_USER_HABITS, (user_id,)):
+            habit = habit_from_row(row)
+            async for (day,) in shard.iterate(queries.SELECT_HABIT_DAYS, (row[0],)):
+                habit.mark_day(date.fromisoformat(day[:10]))
+            await writes.shard(user_id).submit(partial(save_stats, changed=[habit]), users=[user_id])
@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import aiosqlite
+
+from src.habit_tracker.ids import format_id
+from src.habit_tracker.models import queries
+from src.habit_tracker.models.storage import ConnectionPool
+from src.habit_tracker.trackers_main_classes import Habit
+
+WRITE_MODE = os.environ.get('HABITS_WRITE_MODE', 'immediate')
+WRITE_QUEUE_SIZE = int(os.environ.get('HABITS_WRITE_QUEUE_SIZE', '10000'))
+WRITE_BATCH_SIZE = int(os.environ.get('HABITS_WRITE_BATCH_SIZE', '1000'))
+WRITE_FLUSH_MS = float(os.environ.get('HABITS_WRITE_FLUSH_MS', '0'))
+
+logger = logging.getLogger(__name__)
+
+Apply = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+class PendingWrite(NamedTuple):
+    """Write of one request waiting in the queue: a single statement or a function writing several."""
+
+    query: Optional[str]
+    params: tuple
+    apply: Optional[Apply]
+    habits: tuple
+    done: Optional[asyncio.Future]
+    users: tuple = ()
+
+
+async def save_stats(conn: aiosqlite.Connection, changed: Iterable[Habit]) -> None:
+    """
+    Write the statistics of the changed habits inside the current transaction.
+
+    Args:
+        conn (aiosqlite.Connection): the writer connection
+        changed (Iterable[Habit]): habits whose completions were changed
+
+    Returns:
+        None
+    """
+    await conn.executemany(queries.UPSERT_HABIT_STATS, [(format_id(h.habit_id), *h.stats.to_row()) for h in changed])
+
+
+class WriteBehind:
+    """Write the changes of the requests to the database, right away or in groups."""
+
+    def __init__(
+        self,
+        db: ConnectionPool,
+        mode: str = WRITE_MODE,
+        queue_size: int = WRITE_QUEUE_SIZE,
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_ms: float = WRITE_FLUSH_MS,
+    ):
+        """
+        Initialize the WriteBehind.
+
+        Args:
+            db (ConnectionPool): the database
+            mode (str): 'immediate' or 'write-behind'
+            queue_size (int): number of queued writes, further requests wait for a free place
+            batch_size (int): maximum number of writes committed in one transaction
+            flush_ms (float): how long a group waits for more writes after the first one, 0 commits right away
+
+        Returns:
+            None
+        """
+        if mode not in {'immediate', 'write-behind'}:
+            raise ValueError(f'Unknown write mode: {mode}')
+        self.db = db
+        self.mode = mode
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_s = max(0.0, flush_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._unflushed = 0
+        self.worker: Optional[str] = None
+        self.on_failed: Optional[Callable[[Set[str]], Awaitable[None]]] = None
+        self._repairs: Set[asyncio.Task] = set()
+
+    @property
+    def depth(self) -> int:
+        """Number of writes waiting in the queue."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def shard(self, _user_id: str) -> 'WriteBehind':
+        """
+        Find the writes of the user, as ShardedWrites does.
+
+        Args:
+            _user_id (str): unique id of the user
+
+        Returns:
+            WriteBehind: these writes, the single database takes the writes of every user
+        """
+        return self
+
+    def start(self) -> None:
+        """
+        Start the background task in the write-behind mode.
+
+        Returns:
+            None
+        """
+        if self.mode == 'write-behind':
+            self._queue = asyncio.Queue(self.queue_size)
+            self._task = asyncio.create_task(self._run(self._queue))
+
+    async def close(self) -> None:
+        """
+        Commit all the queued writes and stop the background task.
+
+        Returns:
+            None
+        """
+        if self._task is None:
+            return
+        queue, task = self._queue, self._task
+        await queue.put(None)
+        await task
+        self._queue = self._task = None
+        while not queue.empty():
+            leftovers = [queue.get_nowait() for _ in range(queue.qsize())]
+            await self._flush([pending for pending in leftovers if pending is not None])
+        if self._repairs:
+            await asyncio.gather(*self._repairs, return_exceptions=True)
+
+    async def execute(
+        self,
+        query: str,
+        params: Sequence[Any],
+        habits: Iterable[Habit] = (),
+        durable: bool = True,
+        users: Iterable[str] = (),
+    ) -> None:
+        """
+        Write one statement of a request together with the statistics of the changed habits.
+
+        Args:
+            query (str): SQL statement
+            params (Sequence[Any]): statement parameters
+            habits (Iterable[Habit]): habits whose statistics are saved with the write
+            durable (bool): wait until the write is committed, always the case in the immediate mode
+            users (Iterable[str]): ids of the changed users other than the owners of the habits
+
+        Returns:
+            None
+        """
+        await self._enqueue(PendingWrite(query, tuple(params), None, tuple(habits), None, tuple(users)), durable)
+
+    async def submit(
+        self, apply: Apply, habits: Iterable[Habit] = (), durable: bool = True, users: Iterable[str] = ()
+    ) -> Any:
+        """
+        Write the changes of a request together with the statistics of the changed habits.
+
+        Args:
+            apply (Apply): executes the statements of the request on the writer connection
+            habits (Iterable[Habit]): habits whose statistics are saved with the write
+            durable (bool): wait until the write is committed, always the case in the immediate mode
+            users (Iterable[str]): ids of the changed users other than the owners of the habits
+
+        Returns:
+            Any: what apply returned, or None if the write was only queued
+        """
+        return await self._enqueue(PendingWrite(None, (), apply, tuple(habits), None, tuple(users)), durable)
+
+    async def sync(self) -> None:
+        """
+        Wait until all the writes queued so far are committed.
+
+        Returns:
+            None
+        """
+        if self._queue is not None and self._unflushed:
+            await self._enqueue(PendingWrite(None, (), None, (), None), durable=True)
+
+    async def _enqueue(self, pending: PendingWrite, durable: bool) -> Any:
+        if self._queue is None:
+            async with self.db.transaction() as conn:
+                results = await self._write(conn, [pending])
+            return results[0]
+
+        done = asyncio.get_running_loop().create_future() if durable else None
+        self._unflushed += 1
+        await self._queue.put(pending._replace(done=done))
+        return await done if done is not None else None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            pending = await queue.get()
+            if pending is None:
+                return
+            batch = [pending]
+            deadline = loop.time() + self.flush_s
+            while len(batch) < self.batch_size:
+                try:
+                    pending = await self._take(queue, deadline - loop.time())
+                except TimeoutError:
+                    break
+                if pending is None:
+                    closing = True
+                    break
+                batch.append(pending)
+            try:
+                await self._flush(batch)
+            except Exception:
+                logger.exception(f'Failed to flush {len(batch)} queued writes')
+
+    @staticmethod
+    async def _take(queue: asyncio.Queue, timeout: float) -> Optional[PendingWrite]:
+        if not queue.empty():
+            return queue.get_nowait()
+        if timeout <= 0:
+            raise TimeoutError
+        return await asyncio.wait_for(queue.get(), timeout)
+
+    async def _write(self, conn: aiosqlite.Connection, batch: List[PendingWrite]) -> List[Any]:
+        results = []
+        start = 0
+        while start < len(batch):
+            pending = batch[start]
+            if pending.query is None:
+                results.append(await pending.apply(conn) if pending.apply is not None else None)
+                start += 1
+                continue
+            end = start + 1
+            while end < len(batch) and batch[end].query == pending.query:
+                end += 1
+            await conn.executemany(pending.query, [same.params for same in batch[start:end]])
+            results.extend([None] * (end - start))
+            start = end
+        await save_stats(conn, {habit: None for pending in batch for habit in pending.habits})
+        if self.worker is not None:
+            changed = {format_id(habit.user_id) for pending in batch for habit in pending.habits}
+            changed.update(user_id for pending in batch for user_id in pending.users)
+            now = time.time()
+            await conn.executemany(queries.UPSERT_CHANGE, [(user_id, self.worker, now) for user_id in changed])
+        return results
+
+    async def _write_one_by_one(self, batch: List[PendingWrite]) -> List[Tuple[bool, Any]]:
+        outcomes = []
+        async with self.db.transaction() as conn:
+            await conn.execute('BEGIN IMMEDIATE')
+            for pending in batch:
+                await conn.execute('SAVEPOINT pending_write')
+                try:
+                    (result,) = await self._write(conn, [pending])
+                    outcomes.append((True, result))
+                except Exception as error:
+                    await conn.execute('ROLLBACK TO pending_write')
+                    outcomes.append((False, error))
+                await conn.execute('RELEASE pending_write')
+        return outcomes
+
+    async def _flush(self, batch: List[PendingWrite]) -> None:
+        try:
+            async with self.db.transaction() as conn:
+                outcomes = [(True, result) for result in await self._write(conn, batch)]
+        except Exception as error:
+            try:
+                outcomes = await self._write_one_by_one(batch) if len(batch) > 1 else [(False, error)]
+            except Exception as retry_error:
+                logger.exception(f'Failed to commit {len(batch)} queued writes')
+                outcomes = [(False, retry_error)] * len(batch)
+        self._unflushed -= len(batch)
+
+        failed: Set[str] = set()
+        for pending, (ok, outcome) in zip(batch, outcomes):
+            if pending.done is not None:
+                if pending.done.done():
+                    continue
+                if ok:
+                    pending.done.set_result(outcome)
+                else:
+                    pending.done.set_exception(outcome)
+            elif not ok:
+                logger.error(f'Queued write failed: {outcome!r}')
+                failed.update(format_id(habit.user_id) for habit in pending.habits)
+                failed.update(pending.users)
+        if failed and self.on_failed is not None:
+            repair = asyncio.create_task(self.on_failed(failed))
+            self._repairs.add(repair)
+            repair.add_done_callback(self._repairs.discard)
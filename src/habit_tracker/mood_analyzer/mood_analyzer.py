@@ -1,23 +1,132 @@
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
 
 from src.habit_tracker.trackers_main_classes import Record
 
+if TYPE_CHECKING:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
 POSITIVE_THRESHOLD = 0.5
 NEGATIVE_THRESHOLD = -0.05
+MOOD_CACHE_SIZE = 65536
+PARALLEL_THRESHOLD = 10000
+CHUNK_SIZE = 2000
+
+
+@lru_cache(maxsize=1)
+def shared_analyzer() -> 'SentimentIntensityAnalyzer':
+    """
+    Return the analyzer shared by the whole process, creating it on the first call.
+
+    Returns:
+        SentimentIntensityAnalyzer: analyzer with the Russian mood words in its lexicon
+    """
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # noqa: PLC0415
+
+    analyzer = SentimentIntensityAnalyzer()
+    analyzer.lexicon.update({'плохое': -2.0, 'хорошее': 4.0, 'нормальное': 2.5})
+    return analyzer
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize the mood text for caching.
+
+    Args:
+        text (str): the mood text
+
+    Returns:
+        str: the text with single spaces between the words
+    """
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=MOOD_CACHE_SIZE)
+def classify(text: str) -> str:
+    """
+    Classify the normalized mood text, remembering the most recent results.
+
+    Args:
+        text (str): the normalized mood text
+
+    Returns:
+        str: 'хорошее', 'плохое' or 'нормальное'
+    """
+    compound_score = shared_analyzer().polarity_scores(text)['compound']
+    if compound_score >= POSITIVE_THRESHOLD:
+        return 'хорошее'
+    if compound_score <= NEGATIVE_THRESHOLD:
+        return 'плохое'
+    return 'нормальное'
+
+
+def classify_many(texts: Sequence[str]) -> List[str]:
+    """
+    Classify a chunk of normalized mood texts, used by the worker processes.
+
+    Args:
+        texts (Sequence[str]): the normalized mood texts
+
+    Returns:
+        List[str]: the moods in the same order
+    """
+    return [classify(text) for text in texts]
+
+
+def determine_moods(records: Sequence[Record], processes: Optional[int] = None) -> None:
+    """
+    Determine the mood of many records at once.
+
+    Args:
+        records (Sequence[Record]): the records containing the mood texts
+        processes (Optional[int]): size of the process pool, the texts are scored in this process if not specified
+
+    Returns:
+        None
+    """
+    texts = [normalize(record.mood) for record in records]
+    distinct = list(dict.fromkeys(texts))
+
+    if processes and processes > 1 and len(distinct) > PARALLEL_THRESHOLD:
+        chunks = [distinct[i : i + CHUNK_SIZE] for i in range(0, len(distinct), CHUNK_SIZE)]
+        with ProcessPoolExecutor(processes) as pool:
+            moods: Dict[str, str] = dict(zip(distinct, chain.from_iterable(pool.map(classify_many, chunks))))
+    else:
+        moods = {text: classify(text) for text in distinct}
+
+    for record, text in zip(records, texts):
+        record.mood = moods[text]
+
+
+async def determine_moods_async(records: Sequence[Record], processes: Optional[int] = None) -> None:
+    """
+    Determine the mood of many records in a worker thread without blocking the event loop.
+
+    Args:
+        records (Sequence[Record]): the records containing the mood texts
+        processes (Optional[int]): size of the process pool
+
+    Returns:
+        None
+    """
+    await asyncio.get_running_loop().run_in_executor(None, partial(determine_moods, records, processes))
 
 
 class UsersMood:
     """Determine the mood by text."""
 
-    def __init__(self):
+    @property
+    def analyzer(self) -> 'SentimentIntensityAnalyzer':
         """
-        Initialize the UserMood.
+        Return the shared analyzer, creating it on the first access.
 
         Returns:
-            None
+            SentimentIntensityAnalyzer: the analyzer
         """
-        self.analyzer = SentimentIntensityAnalyzer()
-        self.analyzer.lexicon.update({'плохое': -2.0, 'хорошее': 4.0, 'нормальное': 2.5})
+        return shared_analyzer()
 
     def determine_mood(self, record: Record) -> None:
         """
@@ -29,12 +138,4 @@ class UsersMood:
         Returns:
             None
         """
-        sentiment = self.analyzer.polarity_scores(record.mood)
-        compound_score = sentiment['compound']
-
-        if compound_score >= POSITIVE_THRESHOLD:
-            record.mood = 'хорошее'
-        elif compound_score <= NEGATIVE_THRESHOLD:
-            record.mood = 'плохое'
-        else:
-            record.mood = 'нормальное'
+        record.mood = classify(normalize(record.mood))
@@ -1,26 +1,57 @@
 import json
+import os
 import random
-from typing import List, Set
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Tuple
+
+QUOTES_PATH = os.path.join(os.path.dirname(__file__), 'motivation_quotes.json')
+MAX_TRACKED_USERS = 100000
+FEISTEL_ROUNDS = 4
+
+
+@lru_cache(maxsize=None)
+def load_quotes(file_path: str = QUOTES_PATH) -> Tuple[str, ...]:
+    """
+    Read the quotes from the JSON file once per process.
+
+    Args:
+        file_path (str): path to the JSON file with quotes
+
+    Returns:
+        Tuple[str, ...]: the quotes
+    """
+    with open(file_path, encoding='utf-8') as file:
+        return tuple(json.load(file))
 
 
 class Motivation:
     """Give a motivational quote."""
 
-    def __init__(self, file_path: str = 'src/habit_tracker/motivation/motivation_quotes.json'):
+    def __init__(self, file_path: str = QUOTES_PATH):
         """
         Initialize the Motivation.
 
         Args:
-            file_path (str): path to the JSON file with quotes. By default —
-         'src/habit_tracker/motivation/motivation_quotes.json'
+            file_path (str): path to the JSON file with quotes. By default — the motivation_quotes.json
+        next to this module
 
          Returns:
              None
         """
-        with open(file_path, encoding='utf-8') as file:
-            self.quotes: List[str] = json.load(file)
+        self.file_path = file_path
+        self._deck: List[int] = []
+        self._position = 0
+
+    @property
+    def quotes(self) -> Tuple[str, ...]:
+        """
+        Return the quotes, reading the file on the first access.
 
-        self.used_quotes: Set[str] = set()
+        Returns:
+            Tuple[str, ...]: the quotes
+        """
+        return load_quotes(self.file_path)
 
     def give_random_quote(self) -> str:
         """
@@ -28,16 +59,81 @@ class Motivation:
 
         Returns:
             str: random quote
-            When all available quotes have been used at least once, the set of used quotes is cleared,
-        allowing you to start a new cycle of issuing unique quotes
+            When all available quotes have been used once, the deck is shuffled again,
+        starting a new cycle of issuing unique quotes
         """
-        while True:
-            selected_quote = random.choice(self.quotes)
+        if self._position == len(self._deck):
+            last = self._deck[-1] if self._deck else None
+            self._deck = list(range(len(self.quotes)))
+            random.shuffle(self._deck)
+            if len(self._deck) > 1 and self._deck[0] == last:
+                self._deck[0], self._deck[-1] = self._deck[-1], self._deck[0]
+            self._position = 0
+        index = self._deck[self._position]
+        self._position += 1
+        return self.quotes[index]
+
+
+class UserQuotes:
+    """Give every user their own cycle of unique quotes."""
 
-            if selected_quote not in self.used_quotes:
-                self.used_quotes.add(selected_quote)
+    def __init__(self, file_path: str = QUOTES_PATH, max_users: int = MAX_TRACKED_USERS):
+        """
+        Initialize the UserQuotes.
+
+        Args:
+            file_path (str): path to the JSON file with quotes
+            max_users (int): number of users whose cycles are kept
 
-                if len(self.used_quotes) == len(self.quotes):
-                    self.used_quotes.clear()
+        Returns:
+            None
+        """
+        self.file_path = file_path
+        self.max_users = max(1, max_users)
+        self._cycles: OrderedDict[str, Tuple[int, int]] = OrderedDict()
+
+    @property
+    def quotes(self) -> Tuple[str, ...]:
+        """
+        Return the quotes, reading the file on the first access.
+
+        Returns:
+            Tuple[str, ...]: the quotes
+        """
+        return load_quotes(self.file_path)
+
+    def give_random_quote(self, user_id: str) -> str:
+        """
+        Provide the user with the next quote of their cycle.
+
+        Args:
+            user_id (str): unique id of the user
+
+        Returns:
+            str: a quote the user has not seen in the current cycle
+        """
+        key, position = self._cycles.pop(user_id, (random.getrandbits(64), 0))
+        index = self._permute(key, position)
+        position += 1
+        if position == len(self.quotes):
+            key, position = random.getrandbits(64), 0
+        self._cycles[user_id] = (key, position)
+        if len(self._cycles) > self.max_users:
+            self._cycles.popitem(last=False)
+        return self.quotes[index]
+
+    def _permute(self, key: int, position: int) -> int:
+        value = position
+        while True:
+            value = self._feistel(key, value)
+            if value < len(self.quotes):
+                return value
 
-                return selected_quote
+    def _feistel(self, key: int, value: int) -> int:
+        half_bits = max(1, (max(len(self.quotes) - 1, 1).bit_length() + 1) // 2)
+        mask = (1 << half_bits) - 1
+        left, right = value >> half_bits, value & mask
+        for round_number in range(FEISTEL_ROUNDS):
+            round_key = (key >> (16 * round_number)) & 0xFFFF
+            left, right = right, left ^ (hash((round_key, right)) & mask)
+        return (left << half_bits) | right
@@ -0,0 +1,216 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+EVERY_DAY = 0b1111111
+WORKDAYS = 0b0011111
+WEEKEND = 0b1100000
+DAYS_IN_WEEK = 7
+
+WORKDAY_WORDS = ('weekday', 'workday', 'будн', 'рабоч')
+WEEKEND_WORDS = ('weekend', 'выходн')
+WEEKLY_WORDS = ('weekly', 'every week', 'once a week', 'еженедельно', 'каждую неделю', 'раз в неделю')
+EVERY_OTHER_DAY_WORDS = ('every other day', 'every second day', 'через день')
+WEEKDAY_WORDS = {
+    **dict.fromkeys(('mon', 'monday', 'mondays', 'пн'), 0),
+    **dict.fromkeys(('tue', 'tues', 'tuesday', 'tuesdays', 'вт'), 1),
+    **dict.fromkeys(('wed', 'wednesday', 'wednesdays', 'ср'), 2),
+    **dict.fromkeys(('thu', 'thur', 'thurs', 'thursday', 'thursdays', 'чт'), 3),
+    **dict.fromkeys(('fri', 'friday', 'fridays', 'пт'), 4),
+    **dict.fromkeys(('sat', 'saturday', 'saturdays', 'сб'), 5),
+    **dict.fromkeys(('sun', 'sunday', 'sundays', 'вс'), 6),
+}
+WEEKDAY_STEMS = ('понедельник', 'вторник', 'сред', 'четверг', 'пятниц', 'суббот', 'воскресен')
+EVERY_N_DAYS = re.compile(r'(?:every|each|каждые|каждый|каждое|раз в)\s+(\d+)\s*(?:days?|дн|день|дня|дней)\b')
+EVERY_N_WEEKS = re.compile(r'(?:every|each|каждые|каждый|раз в)\s+(\d+)\s*(?:weeks?|недел\w*)')
+
+
+class Schedule(NamedTuple):
+    """Compiled frequency of a habit."""
+
+    mask: int = EVERY_DAY
+    interval: int = 0
+    anchor: int = 0
+
+    def anchored(self, ordinal: int) -> 'Schedule':
+        """
+        Start the schedule on the given day.
+
+        Args:
+            ordinal (int): the first day of the habit
+
+        Returns:
+            Schedule: the schedule starting on the day
+        """
+        return self._replace(anchor=ordinal) if self.interval else self
+
+    def is_scheduled(self, ordinal: int) -> bool:
+        """
+        Check whether the habit is scheduled on the day.
+
+        Args:
+            ordinal (int): the day
+
+        Returns:
+            bool: True if the day is scheduled, otherwise False
+        """
+        if self.interval:
+            return ordinal >= self.anchor and (ordinal - self.anchor) % self.interval == 0
+        return bool(self.mask >> ((ordinal - 1) % DAYS_IN_WEEK) & 1)
+
+    def count_until(self, ordinal: int) -> int:
+        """
+        Count the scheduled days up to and including the day.
+
+        Args:
+            ordinal (int): the day
+
+        Returns:
+            int: number of scheduled days, not earlier than the anchor for the every-N-days schedules
+        """
+        if self.interval:
+            return max(0, (ordinal - self.anchor) // self.interval + 1)
+        if ordinal <= 0:
+            return 0
+        weeks, rest = divmod(ordinal, DAYS_IN_WEEK)
+        return weeks * self.mask.bit_count() + (self.mask & ((1 << rest) - 1)).bit_count()
+
+    def count_between(self, first: int, last: int) -> int:
+        """
+        Count the scheduled days in the inclusive range.
+
+        Args:
+            first (int): the first day of the range
+            last (int): the last day of the range
+
+        Returns:
+            int: number of scheduled days
+        """
+        if first > last:
+            return 0
+        return self.count_until(last) - self.count_until(first - 1)
+
+    def position(self, ordinal: int) -> int:
+        """
+        Return the number of the scheduled day, consecutive scheduled days get consecutive numbers.
+
+        Args:
+            ordinal (int): a scheduled day
+
+        Returns:
+            int: the number of the day
+        """
+        return self.count_until(ordinal) - 1
+
+    def day_at(self, position: int) -> int:
+        """
+        Find the scheduled day by its number, the inverse of position.
+
+        Args:
+            position (int): the number of the day
+
+        Returns:
+            int: the day
+        """
+        if self.interval:
+            return self.anchor + position * self.interval
+        weeks, rest = divmod(position, self.mask.bit_count())
+        weekday = 0
+        while rest or not self.mask >> weekday & 1:
+            rest -= self.mask >> weekday & 1
+            weekday += 1
+        return weeks * DAYS_IN_WEEK + weekday + 1
+
+    def next_day(self, ordinal: int) -> int:
+        """
+        Find the first scheduled day on or after the day.
+
+        Args:
+            ordinal (int): the day
+
+        Returns:
+            int: the scheduled day
+        """
+        return self.day_at(self.count_until(ordinal - 1))
+
+    def bits_between(self, first: int, last: int) -> int:
+        """
+        Mark the scheduled days of the inclusive range in an integer, without iterating over the days.
+
+        Args:
+            first (int): the first day of the range
+            last (int): the last day of the range
+
+        Returns:
+            int: bit N is set if the day `first + N` is scheduled
+        """
+        length = last - first + 1
+        if length <= 0:
+            return 0
+        if self.interval:
+            start = max(first, self.anchor)
+            start += (self.anchor - start) % self.interval
+            if start > last:
+                return 0
+            count = (last - start) // self.interval + 1
+            every = ((1 << (self.interval * count)) - 1) // ((1 << self.interval) - 1)
+            return every << (start - first)
+        weekday = (first - 1) % DAYS_IN_WEEK
+        week = (self.mask >> weekday | self.mask << (DAYS_IN_WEEK - weekday)) & EVERY_DAY
+        weeks = length // DAYS_IN_WEEK + 1
+        repeated = week * (((1 << (DAYS_IN_WEEK * weeks)) - 1) // EVERY_DAY)
+        return repeated & ((1 << length) - 1)
+
+
+DAILY = Schedule()
+
+
+def weekday_mask(text: str) -> int:
+    """
+    Collect the days of the week named in the frequency.
+
+    Args:
+        text (str): the frequency in lower case
+
+    Returns:
+        int: bitmask of the named days from Monday (bit 0), 0 if no day is named
+    """
+    mask = 0
+    for word in re.findall(r'[a-zа-я]+', text):
+        weekday = WEEKDAY_WORDS.get(word)
+        if weekday is None:
+            weekday = next((index for index, stem in enumerate(WEEKDAY_STEMS) if word.startswith(stem)), None)
+        if weekday is not None:
+            mask |= 1 << weekday
+    if any(word in text for word in WORKDAY_WORDS):
+        mask |= WORKDAYS
+    if any(word in text for word in WEEKEND_WORDS):
+        mask |= WEEKEND
+    return mask
+
+
+@lru_cache(maxsize=1024)
+def compile_frequency(frequency: str) -> Schedule:
+    """
+    Compile the free-text frequency of a habit.
+
+    Args:
+        frequency (str): the frequency as the user wrote it
+
+    Returns:
+        Schedule: the compiled schedule, not anchored yet
+    """
+    text = ' '.join(frequency.lower().replace('ё', 'е').split())
+    mask = weekday_mask(text)
+    if mask:
+        return Schedule(mask=mask)
+
+    if match := EVERY_N_DAYS.search(text):
+        return Schedule(interval=max(1, int(match.group(1))))
+    if match := EVERY_N_WEEKS.search(text):
+        return Schedule(interval=max(1, int(match.group(1))) * DAYS_IN_WEEK)
+    if any(word in text for word in EVERY_OTHER_DAY_WORDS):
+        return Schedule(interval=2)
+    if any(word in text for word in WEEKLY_WORDS):
+        return Schedule(interval=DAYS_IN_WEEK)
+    return DAILY
@@ -1,32 +1,69 @@
-from datetime import date, datetime
-from typing import List, Optional, Set
-from uuid import uuid4
+from datetime import date
+from itertools import count
+from typing import List, Optional, Set, Union
+
+from src.habit_tracker.analytics.aggregates import HabitStats
+from src.habit_tracker.completions import CompletionDays
+from src.habit_tracker.dates import day_ordinal, parse_day
+from src.habit_tracker.ids import format_id, new_id
+from src.habit_tracker.schedules import compile_frequency
+
+_versions = count(1)
 
 
 class Habit:
     """Describe user's habit."""
 
-    def __init__(self, name: str, freq: str, start_day: str, end_day: str, user_id: str):
+    __slots__ = (
+        'completed_days',
+        'end_day',
+        'frequency',
+        'habit_id',
+        'habit_name',
+        'records',
+        'schedule',
+        'start_day',
+        'stats',
+        'user_id',
+        'version',
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        freq: str,
+        start_day: Union[str, date],
+        end_day: Union[str, date],
+        user_id: int,
+        *,
+        habit_id: Optional[int] = None,
+    ):
         """
         Initialize the Habit.
 
         Args:
             name (str): name of the habit
-            freq (str): frequency of habit fulfillment ("daily", "every Tuesday")
-            start_day (str): starting date in the 'dd-mm-yyyy' format
-            end_day (str): final date in the 'dd-mm-yyyy' format
-            user_id (str): associated user ID
+            freq (str): frequency of habit fulfillment ("daily", "every Tuesday", "каждые 2 дня"),
+                an unrecognized frequency means every day
+            start_day (Union[str, date]): starting date, a date or a string in the 'dd-mm-yyyy' format
+            end_day (Union[str, date]): final date, a date or a string in the 'dd-mm-yyyy' format
+            user_id (int): associated user ID
+            habit_id (Optional[int], optional): the habit's ID. If not specified, it is generated automatically
 
         Returns:
             None
         """
         self.habit_name = name
         self.frequency = freq
-        self.start_day = datetime.strptime(start_day, '%d-%m-%Y').date()
-        self.end_day = datetime.strptime(end_day, '%d-%m-%Y').date()
-        self.completed_days: List[date] = []
+        self.start_day = start_day if isinstance(start_day, date) else parse_day(start_day)
+        self.end_day = end_day if isinstance(end_day, date) else parse_day(end_day)
+        self.schedule = compile_frequency(freq).anchored(self.start_day.toordinal())
+        self.completed_days = CompletionDays(self.start_day)
+        self.stats = HabitStats(self.schedule)
+        self.version = next(_versions)
         self.user_id = user_id
-        self.habit_id = str(uuid4())
+        self.habit_id = habit_id or new_id()
+        self.records: List[Record] = []
 
     def is_complited(self, day: str) -> bool:
         """
@@ -38,8 +75,7 @@ class Habit:
         Returns:
             bool: True if the habit is completed on that day, otherwise False
         """
-        target_day = datetime.strptime(day, '%d-%m-%Y').date()
-        return target_day in self.completed_days
+        return self.completed_days.contains_ordinal(day_ordinal(day))
 
     def completion_mark(self, day: str) -> None:
         """
@@ -51,9 +87,51 @@ class Habit:
         Returns:
             None
         """
-        target_day = datetime.strptime(day, '%d-%m-%Y').date()
-        if self.end_day >= target_day >= self.start_day:
-            self.completed_days.append(target_day)
+        self.mark_day(parse_day(day))
+
+    def mark_day(self, day: date) -> bool:
+        """
+        Mark the day as completed if it is inside the habit period.
+
+        Args:
+            day (date): the completed day
+
+        Returns:
+            bool: True if the day was not marked before, otherwise False
+        """
+        if not self.end_day >= day >= self.start_day or not self.completed_days.add(day):
+            return False
+        self.stats.add(day)
+        self.version = next(_versions)
+        return True
+
+    def load_day(self, day: date) -> bool:
+        """
+        Mark a stored completion without counting it in the statistics, which are loaded separately.
+
+        Args:
+            day (date): the completed day
+
+        Returns:
+            bool: True if the day is inside the habit period and was not marked before, otherwise False
+        """
+        return self.end_day >= day >= self.start_day and self.completed_days.add(day)
+
+    def unmark_day(self, day: date) -> bool:
+        """
+        Remove the completion mark of the day.
+
+        Args:
+            day (date): the day to unmark
+
+        Returns:
+            bool: True if the day was marked, otherwise False
+        """
+        if not self.completed_days.discard(day):
+            return False
+        self.stats.remove(day)
+        self.version = next(_versions)
+        return True
 
     def total_period(self) -> int:
         """
@@ -64,15 +142,52 @@ class Habit:
         """
         return (self.end_day - self.start_day).days + 1
 
+    def scheduled_days(self) -> int:
+        """
+        Count the days of the habit period on which the habit is scheduled by its frequency.
+
+        Returns:
+            int: number of scheduled days
+        """
+        return self.schedule.count_between(self.start_day.toordinal(), self.end_day.toordinal())
+
+    def scheduled_bits(self, first: date, last: date) -> int:
+        """
+        Mark the scheduled days of the habit period inside the inclusive range.
+
+        Args:
+            first (date): the first day of the range
+            last (date): the last day of the range
+
+        Returns:
+            int: bit N is set if the day `first + N days` is scheduled
+        """
+        start, end = max(first, self.start_day), min(last, self.end_day)
+        if start > end:
+            return 0
+        return self.schedule.bits_between(start.toordinal(), end.toordinal()) << (start - first).days
+
+    def is_due(self, day: date) -> bool:
+        """
+        Determine whether the habit is scheduled on the day.
+
+        Args:
+            day (date): the day to check
+
+        Returns:
+            bool: True if the day is inside the habit period and scheduled, otherwise False
+        """
+        return self.end_day >= day >= self.start_day and self.schedule.is_scheduled(day.toordinal())
+
     def completion_rate(self) -> float:
         """
-        Calculate the percentage of completed days relative to the total number of days.
+        Calculate the percentage of completed scheduled days relative to the number of scheduled days.
 
         Returns:
             float: percentage of completed days rounded to two decimal places
         """
-        total_days = self.total_period()
-        completed_count = len(self.completed_days)
+        total_days = self.scheduled_days()
+        completed_count = self.stats.scheduled_completed
         if total_days > 0:
             return round((completed_count / total_days) * 100, 2)
         return 0
@@ -81,19 +196,21 @@ class Habit:
 class User:
     """Represent the user."""
 
-    def __init__(self, name: str, user_id: Optional[str] = None):
+    __slots__ = ('user_habits', 'user_id', 'user_name')
+
+    def __init__(self, name: str, user_id: Optional[int] = None):
         """
         Initialize the User.
 
         Args:
             name (str): name of the user
-            user_id (Optional[str], optional): the user's ID. If not specified, it is generated automatically
+            user_id (Optional[int], optional): the user's ID. If not specified, it is generated automatically
 
         Returns:
             None
         """
         self.user_name = name
-        self.user_id = user_id or str(uuid4())
+        self.user_id = user_id or new_id()
         self.user_habits: Set[Habit] = set()
 
     def add_habit(self, habit: Habit) -> None:
@@ -122,19 +239,16 @@ class User:
             self.user_habits.remove(habit_to_remove)
 
     def habits(self) -> Set[Habit]:
-        """
-        Return a set of the user's current habits.
-
-         Returns:
-             Set[Habit]: set of active user habits
-        """
+        """Return a set of the user's current habits."""
         return self.user_habits
 
 
 class Record:
     """Record of habit fulfillment."""
 
-    def __init__(self, habit: Habit, day: date, mood: str = '', notes: str = ''):
+    __slots__ = ('day', 'habit', 'mood', 'notes', 'record_id')
+
+    def __init__(self, habit: Habit, day: date, mood: str = '', notes: str = '', record_id: Optional[int] = None):
         """
         Initialize the Record.
 
@@ -143,11 +257,12 @@ class Record:
             day (str): date of completion in the 'dd-mm-yyyy' format
             mood (str, optional): user's mood. The default value is empty
             notes (str, optional): additional notes. They are empty by default
+            record_id (Optional[int], optional): the record's ID. If not specified, it is generated automatically
 
         Returns:
             None
         """
-        self.record_id = str(uuid4())
+        self.record_id = record_id or new_id()
         self.habit = habit
         self.day = day
         self.mood = mood
@@ -185,5 +300,6 @@ class Record:
             str: formatted string containing all the existing information
         """
         return (
-            f'ID: {self.record_id}\nHabit Name: {self.habit}\nDate: {self.day}\nMood: {self.mood}\nNotes: {self.notes}'
+            f'ID: {format_id(self.record_id)}\nHabit Name: {self.habit}\nDate: {self.day}\n'
+            f'Mood: {self.mood}\nNotes: {self.notes}'
         )
@@ -1,7 +1,131 @@
-import matplotlib.pyplot as plt
+from datetime import date, timedelta
+from io import BytesIO
+from typing import NamedTuple, Tuple
+
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import ListedColormap
+from matplotlib.figure import Figure
 
 from src.habit_tracker.trackers_main_classes import Habit
 
+WEEKDAYS = ('Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс')
+
+
+class HabitSnapshot(NamedTuple):
+    """State of a habit needed to draw its charts, taken at one moment."""
+
+    name: str
+    start_day: date
+    end_day: date
+    completed_days: Tuple[date, ...]
+    rate: float
+
+    @classmethod
+    def of(cls, habit: Habit) -> 'HabitSnapshot':
+        """
+        Copy the state of the habit, so it can be drawn while the habit changes.
+
+        Args:
+            habit (Habit): the instance of the Habit class
+
+        Returns:
+            HabitSnapshot: the copied state
+        """
+        return cls(
+            habit.habit_name, habit.start_day, habit.end_day, tuple(habit.completed_days), habit.completion_rate()
+        )
+
+
+def draw_completion_rate(ax: Axes, habit: HabitSnapshot) -> None:
+    """
+    Draw the pie chart of the completed and missed days.
+
+    Args:
+        ax (Axes): the axes to draw on
+        habit (HabitSnapshot): the habit
+
+    Returns:
+        None
+    """
+    labels = ['Выполненные дни', 'Невыполненные дни']
+    sizes = [habit.rate, 100 - habit.rate]
+    colors = ['lightblue', 'lightcoral']
+
+    ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')
+    ax.set_title(f'Процент выполнения привычки ({habit.name})')
+
+
+def draw_calendar(ax: Axes, habit: HabitSnapshot) -> None:
+    """
+    Draw the calendar heatmap: a column per week and a row per day of the week.
+
+    Args:
+        ax (Axes): the axes to draw on
+        habit (HabitSnapshot): the habit
+
+    Returns:
+        None
+    """
+    first_monday = habit.start_day - timedelta(days=habit.start_day.weekday())
+    weeks = (habit.end_day - first_monday).days // 7 + 1
+    offsets = np.arange(weeks * 7)
+    cells = np.full(weeks * 7, np.nan)
+    period = (offsets >= (habit.start_day - first_monday).days) & (offsets <= (habit.end_day - first_monday).days)
+    cells[period] = 0
+    cells[[(day - first_monday).days for day in habit.completed_days]] = 1
+
+    ax.imshow(cells.reshape(weeks, 7).T, cmap=ListedColormap(['lightcoral', 'lightblue']), vmin=0, vmax=1)
+    ax.set_yticks(range(7), WEEKDAYS)
+    week_ticks = range(0, weeks, max(1, weeks // 8))
+    ax.set_xticks(week_ticks, [(first_monday + timedelta(weeks=week)).strftime('%d-%m') for week in week_ticks])
+    ax.set_title(f'Календарь выполнения привычки ({habit.name})')
+
+
+def draw_trend(ax: Axes, habit: HabitSnapshot) -> None:
+    """
+    Draw the number of completed days in every week of the habit period.
+
+    Args:
+        ax (Axes): the axes to draw on
+        habit (HabitSnapshot): the habit
+
+    Returns:
+        None
+    """
+    weeks = (habit.end_day - habit.start_day).days // 7 + 1
+    counts = np.bincount([(day - habit.start_day).days // 7 for day in habit.completed_days], minlength=weeks)
+    ax.plot(range(1, weeks + 1), counts[:weeks], marker='o', color='steelblue')
+    ax.set_ylim(0, 7.5)
+    ax.set_xlabel('Неделя')
+    ax.set_ylabel('Выполненные дни')
+    ax.set_title(f'Выполнение привычки по неделям ({habit.name})')
+
+
+CHARTS = {'pie': draw_completion_rate, 'calendar': draw_calendar, 'trend': draw_trend}
+
+
+def render_chart(habit: HabitSnapshot, kind: str, fmt: str = 'png') -> bytes:
+    """
+    Render the chart of the habit without a display and without the pyplot global state.
+
+    Args:
+        habit (HabitSnapshot): the habit
+        kind (str): 'pie', 'calendar' or 'trend'
+        fmt (str): 'png' or 'svg'
+
+    Returns:
+        bytes: the image
+    """
+    figure = Figure(figsize=(8, 6))
+    FigureCanvasAgg(figure)
+    CHARTS[kind](figure.add_subplot(), habit)
+    buffer = BytesIO()
+    figure.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
 
 class GraphicsAnalytics:
     """Plot the completion rate."""
@@ -20,19 +144,26 @@ class GraphicsAnalytics:
 
     def plot_completion_rate(self) -> None:
         """
-        Plot the pie chart.
+        Plot the pie chart in an interactive window.
 
         Returns:
             None
         """
-        completion_percentage = self.habit.completion_rate()
-
-        labels = ['Выполненные дни', 'Невыполненные дни']
-        sizes = [completion_percentage, 100 - completion_percentage]
-        colors = ['lightblue', 'lightcoral']
+        import matplotlib.pyplot as plt  # noqa: PLC0415
 
-        plt.figure(figsize=(8, 6))
-        plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-        plt.axis('equal')
-        plt.title(f'Процент выполнения привычки ({self.habit.habit_name})')
+        _, ax = plt.subplots(figsize=(8, 6))
+        draw_completion_rate(ax, HabitSnapshot.of(self.habit))
         plt.show()
+
+    def render(self, kind: str = 'pie', fmt: str = 'png') -> bytes:
+        """
+        Render the chart of the habit to bytes.
+
+        Args:
+            kind (str): 'pie', 'calendar' or 'trend'
+            fmt (str): 'png' or 'svg'
+
+        Returns:
+            bytes: the image
+        """
+        return render_chart(HabitSnapshot.of(self.habit), kind, fmt)
@@ -0,0 +1,89 @@
+import asyncio
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from typing import Dict, Optional, Tuple
+
+from src.habit_tracker.trackers_main_classes import Habit
+
+CHART_WORKERS = int(os.environ.get('HABITS_CHART_WORKERS', '2'))
+CHART_CACHE_SIZE = int(os.environ.get('HABITS_CHART_CACHE_SIZE', '1024'))
+GRAPHICS_MODULE = 'src.habit_tracker.visualisation.graphics'
+MEDIA_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+class ChartRenderer:
+    """Render the charts of habits in a thread pool and keep the recent images."""
+
+    def __init__(self, workers: int = CHART_WORKERS, cache_size: int = CHART_CACHE_SIZE):
+        """
+        Initialize the ChartRenderer.
+
+        Args:
+            workers (int): number of threads rendering the charts
+            cache_size (int): number of images kept in memory
+
+        Returns:
+            None
+        """
+        self.workers = max(1, workers)
+        self.cache_size = max(1, cache_size)
+        self._cache: OrderedDict[Tuple[int, int, str, str], bytes] = OrderedDict()
+        self._pending: Dict[Tuple[int, int, str, str], asyncio.Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def render(self, habit: Habit, kind: str, fmt: str = 'png') -> bytes:
+        """
+        Return the chart of the habit, rendering it without blocking the event loop if it is not cached.
+
+        Args:
+            habit (Habit): the habit
+            kind (str): 'pie', 'calendar' or 'trend'
+            fmt (str): 'png' or 'svg'
+
+        Returns:
+            bytes: the image
+        """
+        key = (habit.habit_id, habit.version, kind, fmt)
+        image = self._cache.get(key)
+        if image is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return image
+        self.misses += 1
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='charts')
+        graphics = await loop.run_in_executor(self._executor, import_module, GRAPHICS_MODULE)
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+        future = loop.run_in_executor(
+            self._executor, graphics.render_chart, graphics.HabitSnapshot.of(habit), kind, fmt
+        )
+        self._pending[key] = future
+        try:
+            image = await asyncio.shield(future)
+        finally:
+            del self._pending[key]
+        self._cache[key] = image
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return image
+
+    def close(self) -> None:
+        """
+        Stop the rendering threads and forget the cached images.
+
+        Returns:
+            None
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._cache.clear()
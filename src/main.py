@@ -0,0 +1,210 @@
+"""Export, import and rebalance the history of users and write their reminders, directly on the database.
+
+Run from the repository root:
+
+    python -m src.main export USER_ID --format csv --output history.csv
+    python -m src.main import history.csv --checkpoint history.checkpoint
+    python -m src.main rebalance 2 4
+    python -m src.main digest --outbox reminders.ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from contextlib import nullcontext
+from datetime import date
+from typing import AsyncIterator, Optional
+
+from src.habit_tracker.dates import parse_day
+from src.habit_tracker.models.reminders import read_digests
+from src.habit_tracker.models.sharding import DB_SHARDS, make_storage, make_writes, rebalance
+from src.habit_tracker.models.storage import DB_PATH
+from src.habit_tracker.models.transfer import IMPORT_CHUNK_SIZE, Importer, export_lines, save_imported_stats
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def file_format(path: str, fmt: Optional[str]) -> str:
+    """
+    Choose the format of the file.
+
+    Args:
+        path (str): path to the file
+        fmt (Optional[str]): the format given on the command line
+
+    Returns:
+        str: the given format, or 'csv' for a .csv file and 'ndjson' for any other
+    """
+    if fmt is not None:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+async def read_chunks(path: str) -> AsyncIterator[bytes]:
+    """
+    Read the file in chunks.
+
+    Args:
+        path (str): path to the file
+
+    Yields:
+        bytes: the next chunk
+    """
+    with open(path, 'rb') as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+async def export_command(args: argparse.Namespace) -> None:
+    """
+    Write the history of the user to the output file or to the standard output.
+
+    Args:
+        args (argparse.Namespace): parsed arguments
+
+    Returns:
+        None
+    """
+    fmt = file_format(args.output or '', args.format)
+    mode = 'a' if args.cursor else 'w'
+    target = open(args.output, mode, encoding='utf-8', newline='') if args.output else nullcontext(sys.stdout)  # noqa: SIM115
+    db = make_storage(args.db, args.shards)
+    await db.open()
+    try:
+        with target as output:
+            async for lines in export_lines(db, args.user_id, fmt, args.cursor):
+                output.write(lines)
+    finally:
+        await db.close()
+
+
+async def import_command(args: argparse.Namespace) -> None:
+    """
+    Import the file, resuming from the checkpoint file if it exists.
+
+    Args:
+        args (argparse.Namespace): parsed arguments
+
+    Returns:
+        None
+    """
+    skip = 0
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        with open(args.checkpoint, encoding='utf-8') as file:
+            skip = int(file.read().strip() or 0)
+
+    def save_checkpoint(line: int) -> None:
+        if args.checkpoint:
+            with open(args.checkpoint, 'w', encoding='utf-8') as file:
+                file.write(str(line))
+
+    db = make_storage(args.db, args.shards)
+    await db.open()
+    writes = make_writes(db, 'immediate')
+    try:
+        importer = Importer(db, writes, args.chunk_size)
+        fmt = file_format(args.input, args.format)
+        result = await importer.run(read_chunks(args.input), fmt, skip, save_checkpoint)
+        await save_imported_stats(db, writes, importer.user_ids)
+    finally:
+        await db.close()
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    print(result.model_dump_json(indent=2))
+
+
+async def rebalance_command(args: argparse.Namespace) -> None:
+    """
+    Move the users between the shards for the new number of shards.
+
+    Args:
+        args (argparse.Namespace): parsed arguments
+
+    Returns:
+        None
+    """
+
+    def report(user_id: str, source: int, target: int) -> None:
+        if args.verbose:
+            print(f'{user_id}: {source} -> {target}')
+
+    moved = await rebalance(args.db, args.old_shards, args.new_shards, report)
+    print(f'moved {moved} users from {args.old_shards} to {args.new_shards} shards')
+
+
+async def digest_command(args: argparse.Namespace) -> None:
+    """
+    Append the habits due on the day and not completed yet to the outbox, one user per line.
+
+    Args:
+        args (argparse.Namespace): parsed arguments
+
+    Returns:
+        None
+    """
+    day = parse_day(args.day) if args.day else date.today()
+    db = make_storage(args.db, args.shards)
+    await db.open()
+    users = 0
+    try:
+        with open(args.outbox, 'a', encoding='utf-8') as outbox:
+            async for entry in read_digests(db, day):
+                outbox.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                users += 1
+    finally:
+        await db.close()
+    print(f'wrote reminders for {users} users to {args.outbox}')
+
+
+COMMANDS = {
+    'export': export_command,
+    'import': import_command,
+    'rebalance': rebalance_command,
+    'digest': digest_command,
+}
+
+
+def main(argv: Optional[list] = None) -> None:
+    """
+    Parse the command line and run the command.
+
+    Args:
+        argv (Optional[list]): the arguments, sys.argv by default
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DB_PATH, help='path to the database file')
+    parser.add_argument('--shards', type=int, default=DB_SHARDS, help='number of shards the database is split between')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='write the user, the habits and the records of the user')
+    export.add_argument('user_id')
+    export.add_argument('--format', choices=('csv', 'ndjson'), help='by default by the extension of the output')
+    export.add_argument('--output', help='file to write, the standard output by default')
+    export.add_argument('--cursor', help='id of the last exported record, the output file is appended to')
+
+    load = commands.add_parser('import', help='import users, habits and records')
+    load.add_argument('input')
+    load.add_argument('--format', choices=('csv', 'ndjson'), help='by default by the extension of the input')
+    load.add_argument('--checkpoint', help='file keeping the number of imported lines to resume from')
+    load.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    balance = commands.add_parser('rebalance', help='move the users when the number of shards changes')
+    balance.add_argument('old_shards', type=int, help='number of shards the data is split between now')
+    balance.add_argument('new_shards', type=int, help='number of shards to split the data between')
+    balance.add_argument('--verbose', action='store_true', help='print every moved user')
+
+    digest = commands.add_parser('digest', help='write the habits due on the day to the outbox')
+    digest.add_argument('--outbox', required=True, help='file the reminders are appended to')
+    digest.add_argument('--day', help="the day in the 'dd-mm-yyyy' format, today by default")
+
+    args = parser.parse_args(argv)
+    asyncio.run(COMMANDS[args.command](args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+# the default database of the app is never the shipped one, it is set before the app is imported
+os.environ['HABITS_DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='habits-tests-'), 'habits.db')
+
+from src.habit_tracker.models import fastapi_model
+from src.habit_tracker.models.changes import ChangeFeed
+from src.habit_tracker.models.hydration import Hydrator
+from src.habit_tracker.models.registry import HabitRegistry
+from src.habit_tracker.models.reminders import DueIndex
+from src.habit_tracker.models.responses import ResponseCache
+from src.habit_tracker.models.sharding import make_storage, make_writes
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    @contextmanager
+    def factory(mode='eager', max_users=10000, write_mode='immediate', db_name='habits.db', shards=1, sync_ms=0):
+        db = make_storage(str(tmp_path / db_name), shards)
+        registry = HabitRegistry()
+        hydrator = Hydrator(db, registry, mode, max_users)
+        writes = make_writes(db, write_mode)
+        responses = ResponseCache()
+        monkeypatch.setattr(fastapi_model, 'db', db)
+        monkeypatch.setattr(fastapi_model, 'registry', registry)
+        monkeypatch.setattr(fastapi_model, 'hydrator', hydrator)
+        monkeypatch.setattr(fastapi_model, 'writes', writes)
+        monkeypatch.setattr(fastapi_model, 'responses', responses)
+        monkeypatch.setattr(fastapi_model, 'due', DueIndex(registry))
+        monkeypatch.setattr(fastapi_model, 'changes', ChangeFeed(db, writes, hydrator, responses, sync_ms))
+        with TestClient(fastapi_model.app) as test_client:
+            yield test_client
+
+    return factory
+
+
+@pytest.fixture
+def client(make_client):
+    with make_client() as test_client:
+        yield test_client
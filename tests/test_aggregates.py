@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+from src.habit_tracker.analytics.aggregates import HabitStats
+from src.habit_tracker.schedules import compile_frequency
+
+
+def days(*numbers):
+    return [date(2025, 11, number) for number in numbers]
+
+
+def test_streaks_merge_runs():
+    stats = HabitStats.from_days(days(1, 2, 5, 6, 7))
+    assert stats.longest_streak == 3
+    stats.add(date(2025, 11, 4))
+    stats.add(date(2025, 11, 3))
+    assert stats.longest_streak == 7
+    assert stats.completed == 7
+
+
+def test_remove_splits_run():
+    stats = HabitStats.from_days(days(1, 2, 3, 4, 5, 9))
+    stats.remove(date(2025, 11, 3))
+    assert stats.longest_streak == 2
+    stats.remove(date(2025, 11, 9))
+    assert stats.last_run_length == 2
+    assert stats.completed == 4
+
+
+def test_current_streak():
+    stats = HabitStats.from_days(days(10, 11, 12))
+    end_day = date(2025, 11, 30)
+    assert stats.current_streak(date(2025, 11, 12), end_day) == 3
+    assert stats.current_streak(date(2025, 11, 13), end_day) == 3
+    assert stats.current_streak(date(2025, 11, 14), end_day) == 0
+    assert stats.current_streak(date(2026, 1, 1), date(2025, 11, 13)) == 3
+
+
+def test_weekly_and_monthly_totals():
+    first = date(2025, 10, 27)
+    stats = HabitStats.from_days(first + timedelta(days=offset) for offset in range(10))
+    assert stats.weekly == {'2025-W44': 7, '2025-W45': 3}
+    assert stats.monthly == {'2025-10': 5, '2025-11': 5}
+    stats.remove(first)
+    assert stats.monthly['2025-10'] == 4
+
+
+def test_streak_over_scheduled_days():
+    tuesdays = compile_frequency('по вторникам')
+    stats = HabitStats.from_days(days(4, 11, 18, 20), tuesdays)
+    assert stats.completed == 4
+    assert stats.longest_streak == 3
+    assert stats.current_streak(date(2025, 11, 24), date(2025, 11, 30)) == 3
+    assert stats.current_streak(date(2025, 11, 26), date(2025, 11, 30)) == 0
+
+
+def test_row_round_trip():
+    tuesdays = compile_frequency('по вторникам')
+    stats = HabitStats.from_days(days(4, 11, 18, 20, 25), tuesdays)
+    stats.remove(date(2025, 11, 11))
+    restored = HabitStats.from_row(stats.to_row(), tuesdays)
+    assert restored.to_row() == stats.to_row()
+    assert restored.last_run_length == 2
+    restored.add(date(2025, 11, 11))
+    assert (restored.longest_streak, restored.scheduled_completed) == (4, 4)
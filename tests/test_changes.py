@@ -0,0 +1,84 @@
+import sqlite3
+import time
+import uuid
+
+import pytest
+
+from src.habit_tracker.models import fastapi_model
+from src.habit_tracker.models.changes import DEFAULT_SYNC_MS, sync_ms_from_env
+from tests.test_fastapi_model import add_habit, register
+
+
+def other_worker_writes(path, *statements):
+    """Commit the statements as another worker process would, together with its change rows."""
+    with sqlite3.connect(path) as conn:
+        for query, params, user_id in statements:
+            conn.execute(query, params)
+            conn.execute(
+                'INSERT OR REPLACE INTO changes (user_id, worker, changed_at) VALUES (?, ?, ?)',
+                (user_id, 'other', time.time()),
+            )
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize('mode', ['eager', 'lazy'])
+def test_workers_see_each_others_writes(make_client, tmp_path, mode):
+    path = str(tmp_path / 'habits.db')
+    with make_client(mode=mode, sync_ms=20) as client:
+        # a user registered by another worker is found by the first request for it
+        user_id = str(uuid.uuid4())
+        other_worker_writes(path, ('INSERT INTO users VALUES (?, ?)', (user_id, 'Иван'), user_id))
+        assert add_habit(client, user_id).status_code == 200
+        rate = client.get('/habits/Чтение/rate', params={'user_id': user_id})
+        assert rate.json()['message'].endswith('0.0%')
+
+        habit_id = client.get('/habits/', params={'user_id': user_id}).json()[0][0]
+        record = ('INSERT INTO records VALUES (?, ?, NULL, NULL, ?)', ('r1', '2025-11-01', habit_id), user_id)
+        other_worker_writes(path, record)
+        wait_for(lambda: client.get('/habits/Чтение/check/01-11-2025', params={'user_id': user_id}).json())
+        assert client.get('/habits/Чтение/rate', params={'user_id': user_id}).json()['message'].endswith('3.33%')
+
+        # the writes of this worker are recorded for the others and not refreshed by itself
+        register(client, 'Пётр')
+        with sqlite3.connect(path) as conn:
+            workers = {row[0] for row in conn.execute('SELECT worker FROM changes')}
+        assert workers == {'other', fastapi_model.changes.worker}
+        # the lazy mode may load a changed user before the feed sees the change, let the feed catch up first
+        client.portal.call(fastapi_model.changes.poll)
+        refreshed = fastapi_model.changes.refreshed
+        time.sleep(0.1)
+        assert fastapi_model.changes.refreshed == refreshed
+
+
+def test_feed_is_off_for_a_single_worker(client, tmp_path):
+    add_habit(client, register(client))
+    client.post('/habits/Чтение/mark/01-11-2025')
+    with sqlite3.connect(tmp_path / 'habits.db') as conn:
+        assert conn.execute('SELECT COUNT(*) FROM changes').fetchone() == (0,)
+
+
+def test_feed_is_on_by_default_for_several_workers(monkeypatch):
+    monkeypatch.delenv('HABITS_SYNC_MS', raising=False)
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    assert sync_ms_from_env() == 0
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    assert sync_ms_from_env() == DEFAULT_SYNC_MS
+    # uvicorn --workers starts the workers as child processes without WEB_CONCURRENCY
+    monkeypatch.delenv('WEB_CONCURRENCY')
+    monkeypatch.setattr('multiprocessing.parent_process', lambda: object())
+    assert sync_ms_from_env() == DEFAULT_SYNC_MS
+    monkeypatch.setenv('HABITS_SYNC_MS', '0')
+    assert sync_ms_from_env() == 0
+
+
+def test_worker_process_warns_without_the_feed(make_client, monkeypatch, caplog):
+    monkeypatch.setattr('multiprocessing.parent_process', lambda: object())
+    with make_client():
+        pass
+    assert 'HABITS_SYNC_MS' in caplog.text
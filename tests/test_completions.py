@@ -0,0 +1,49 @@
+from datetime import date
+
+from src.habit_tracker.completions import CompletionDays, run_lengths, to_bitstring
+
+
+def test_add_and_contains():
+    days = CompletionDays(date(2025, 11, 1))
+    assert days.add(date(2025, 11, 20)) is True
+    assert days.add(date(2025, 11, 20)) is False
+    assert date(2025, 11, 20) in days
+    assert date(2025, 11, 21) not in days
+    assert date(2025, 10, 31) not in days
+    assert len(days) == 1
+
+
+def test_iteration_is_sorted():
+    days = CompletionDays(date(2025, 1, 1))
+    for day in (date(2025, 3, 1), date(2025, 1, 1), date(2025, 1, 9)):
+        days.add(day)
+    assert list(days) == [date(2025, 1, 1), date(2025, 1, 9), date(2025, 3, 1)]
+
+
+def test_discard():
+    days = CompletionDays(date(2025, 1, 1))
+    days.add(date(2025, 1, 5))
+    assert days.discard(date(2025, 1, 5)) is True
+    assert days.discard(date(2025, 1, 5)) is False
+    assert len(days) == 0
+
+
+def test_count_between():
+    days = CompletionDays(date(2025, 1, 1))
+    for offset in range(0, 60, 3):
+        days.add(date.fromordinal(date(2025, 1, 1).toordinal() + offset))
+    assert days.count_between(date(2025, 1, 1), date(2025, 3, 1)) == 20
+    assert days.count_between(date(2025, 1, 2), date(2025, 1, 6)) == 1
+    assert days.count_between(date(2024, 12, 1), date(2025, 1, 4)) == 2
+    assert days.count_between(date(2025, 5, 1), date(2025, 6, 1)) == 0
+
+
+def test_bits_between_and_encodings():
+    days = CompletionDays(date(2025, 1, 1))
+    for day in (date(2025, 1, 1), date(2025, 1, 3), date(2025, 1, 4)):
+        days.add(day)
+    bits = days.bits_between(date(2024, 12, 31), date(2025, 1, 5))
+    assert to_bitstring(bits, 6) == '010110'
+    assert run_lengths(bits, 6) == [1, 1, 1, 2, 1]
+    assert run_lengths(days.bits_between(date(2025, 1, 3), date(2025, 1, 4)), 2) == [0, 2]
+    assert days.bits_between(date(2025, 2, 1), date(2025, 3, 1)) == 0
@@ -0,0 +1,51 @@
+from datetime import date, datetime
+
+import pytest
+
+from src.habit_tracker.dates import day_ordinal, format_day, parse_day
+
+SAMPLES = [
+    '01-11-2025',
+    '29-02-2024',
+    '31-12-9999',
+    '1-1-2025',
+    '01-1-2025',
+    '29-02-2025',
+    '31-04-2025',
+    '00-01-2025',
+    '01-13-2025',
+    '01-01-0000',
+    '2025-11-01',
+    '01/11/2025',
+    '01-11-25',
+    '+1-11-2025',
+    '01-11-2025 ',
+    ' 1-11-2025',
+    '01-11-20251',
+    '٠١-١١-٢٠٢٥',
+    '',
+]
+
+
+def strptime_or_error(text):
+    try:
+        return datetime.strptime(text, '%d-%m-%Y').date()
+    except ValueError:
+        return ValueError
+
+
+@pytest.mark.parametrize('text', SAMPLES)
+def test_parse_day_matches_strptime(text):
+    expected = strptime_or_error(text)
+    if expected is ValueError:
+        with pytest.raises(ValueError):
+            parse_day(text)
+    else:
+        assert parse_day(text) == expected
+        assert day_ordinal(text) == expected.toordinal()
+
+
+def test_format_day_round_trips():
+    day = date(2025, 3, 7)
+    assert format_day(day) == '07-03-2025' == day.strftime('%d-%m-%Y')
+    assert parse_day(format_day(day)) == day
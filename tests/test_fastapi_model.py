@@ -0,0 +1,231 @@
+import json
+import sqlite3
+
+import pytest
+
+from src.habit_tracker.ids import parse_id
+from src.habit_tracker.models import fastapi_model
+from src.habit_tracker.models.sharding import shard_index
+
+
+def register(client, name='Иван'):
+    return client.post('/users/', params={'name': name}).json()['user_id']
+
+
+def add_habit(client, user_id, name='Чтение'):
+    params = {'habits_name': name, 'freq': 'каждый день', 'start_day': '01-11-2025', 'end_day': '30-11-2025'}
+    return client.post(f'/users/{user_id}/habits/', params=params)
+
+
+def test_root_quotes_do_not_repeat(client):
+    quotes = [client.get('/').json()['motivational_quote'] for _ in range(10)]
+    user_quotes = [client.get('/', params={'user_id': 'u1'}).json()['motivational_quote'] for _ in range(10)]
+    assert len(set(quotes)) == len(set(user_quotes)) == 10
+
+
+def test_user_and_habit_are_stored(client):
+    user_id = register(client)
+    assert add_habit(client, user_id).status_code == 200
+    assert client.get('/users/').json() == [[user_id, 'Иван']]
+    assert client.get('/habits/').json()[0][1:] == ['Чтение', 'каждый день', '2025-11-01', '2025-11-30', user_id]
+
+
+def test_add_habit_unknown_user(client):
+    assert add_habit(client, 'unknown').status_code == 404
+
+
+def test_mark_and_check(client):
+    add_habit(client, register(client))
+    client.post('/habits/Чтение/mark/05-11-2025')
+    assert client.get('/habits/Чтение/check/05-11-2025').json() is True
+    assert client.get('/habits/Чтение/check/06-11-2025').json() is False
+    assert len(client.get('/records/').json()) == 1
+    for day in ('2025-11-05', '31-02-2025'):
+        assert client.post(f'/habits/Чтение/mark/{day}').status_code == 422
+        assert client.get(f'/habits/Чтение/check/{day}').status_code == 422
+    assert len(client.get('/records/').json()) == 1
+
+
+def test_record_mood_and_notes(client):
+    add_habit(client, register(client))
+    record_id = client.post('/habits/Чтение/records/', params={'day': '01-11-2025'}).json()['record_id']
+    client.post(f'/habits/Чтение/records/{record_id}/mood', params={'mood': 'хорошее'})
+    client.post(f'/habits/Чтение/records/{record_id}/notes', params={'notes': '20 страниц'})
+    assert client.get('/records/').json()[0][1:4] == ['2025-11-01', 'хорошее', '20 страниц']
+
+
+def test_same_habit_name_for_several_users(client):
+    first, second = register(client, 'Иван'), register(client, 'Анна')
+    add_habit(client, first)
+    add_habit(client, second)
+    assert client.post('/habits/Чтение/mark/05-11-2025').status_code == 409
+    client.post('/habits/Чтение/mark/05-11-2025', params={'user_id': second})
+    assert client.get('/habits/Чтение/check/05-11-2025', params={'user_id': second}).json() is True
+    assert client.get('/habits/Чтение/check/05-11-2025', params={'user_id': first}).json() is False
+
+
+def test_delete_habit(client):
+    user_id = register(client)
+    add_habit(client, user_id)
+    client.delete(f'/users/{user_id}/habits/Чтение')
+    assert client.get('/habits/Чтение/rate').status_code == 404
+    assert add_habit(client, user_id).status_code == 200
+
+
+def test_records_batch(client):
+    add_habit(client, register(client))
+    items = [
+        {'habit_name': 'Чтение', 'day': '01-11-2025', 'mood': 'хорошее'},
+        {'habit_name': 'Чтение', 'day': '02-11-2025'},
+        {'habit_name': 'Бег', 'day': '02-11-2025'},
+        {'habit_name': 'Чтение', 'day': '2025-11-03'},
+        {'habit_name': 'Чтение', 'day': '01-12-2025'},
+    ]
+    response = client.post('/records/batch/', json={'items': items}).json()
+    assert response['created'] == 2
+    assert [result['ok'] for result in response['results']] == [True, True, False, False, False]
+    assert client.get('/habits/Чтение/check/02-11-2025').json() is True
+    assert len(client.get('/records/').json()) == 2
+
+
+def test_records_batch_keeps_the_shards_that_committed(make_client, monkeypatch):
+    with make_client(shards=2) as client:
+        user_ids = []
+        # the ids are random, register until both shards have users
+        while len(user_ids) < 4 or len({shard_index(user_id, 2) for user_id in user_ids}) < 2:
+            user_ids.append(register(client, f'Пользователь {len(user_ids)}'))
+            add_habit(client, user_ids[-1])
+        failing = fastapi_model.writes.shard(user_ids[0])
+
+        async def fail(*args, **kwargs):
+            raise sqlite3.OperationalError('database is locked')
+
+        monkeypatch.setattr(failing, 'submit', fail)
+        items = [{'habit_name': 'Чтение', 'day': '02-11-2025', 'user_id': user_id} for user_id in user_ids]
+        response = client.post('/records/batch/', json={'items': items})
+        assert response.status_code == 200
+        committed = [fastapi_model.writes.shard(user_id) is not failing for user_id in user_ids]
+        assert [result['ok'] for result in response.json()['results']] == committed
+        assert response.json()['created'] == sum(committed) > 0
+        for user_id, ok in zip(user_ids, committed):
+            params = {'user_id': user_id}
+            assert client.get('/habits/Чтение/check/02-11-2025', params=params).json() is ok
+        assert len(client.get('/records/').json()) == sum(committed)
+
+
+def test_marked_day_has_its_record_in_memory(make_client):
+    with make_client() as client:
+        add_habit(client, register(client))
+        client.post('/habits/Чтение/mark/02-11-2025')
+        (record_id,) = [row[0] for row in client.get('/records/').json()]
+        response = client.post(f'/habits/Чтение/records/{record_id}/mood', params={'mood': 'хорошее'})
+        assert response.json()['message'] == f"Настроение в записи '{record_id}' обновлено"
+    with make_client() as client:
+        assert client.get('/records/').json()[0][:3] == [record_id, '2025-11-02', 'хорошее']
+
+
+def test_users_keyset_pagination(client):
+    user_ids = sorted(register(client, f'Пользователь {i}') for i in range(5))
+    first = client.get('/users/', params={'limit': 2})
+    assert [row[0] for row in first.json()] == user_ids[:2]
+    cursor = first.headers['X-Next-Cursor']
+    second = client.get('/users/', params={'limit': 3, 'cursor': cursor})
+    assert [row[0] for row in second.json()] == user_ids[2:]
+    assert 'X-Next-Cursor' not in second.headers
+
+
+def test_records_filters_and_ndjson(client):
+    user_id = register(client)
+    add_habit(client, user_id)
+    for day in ('01-11-2025', '10-11-2025', '20-11-2025'):
+        client.post(f'/habits/Чтение/mark/{day}')
+    params = {'user_id': user_id, 'date_from': '05-11-2025', 'date_to': '20-11-2025', 'format': 'ndjson'}
+    response = client.get('/records/', params=params)
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line[1] for line in lines) == ['2025-11-10', '2025-11-20']
+
+
+def test_one_record_per_day(client):
+    add_habit(client, register(client))
+    client.post('/habits/Чтение/mark/05-11-2025')
+    client.post('/habits/Чтение/mark/05-11-2025')
+    mark_id = client.get('/records/').json()[0][0]
+    response = client.post('/habits/Чтение/records/', params={'day': '05-11-2025', 'mood': 'хорошее'})
+    assert response.json()['record_id'] == mark_id
+    assert client.get('/records/').json() == [[mark_id, '2025-11-05', 'хорошее', '', client.get('/habits/').json()[0][0]]]
+
+
+def test_state_survives_restart(make_client):
+    with make_client() as client:
+        user_id = register(client)
+        add_habit(client, user_id)
+        client.post('/habits/Чтение/mark/05-11-2025')
+    with make_client() as client:
+        assert client.get('/habits/Чтение/check/05-11-2025').json() is True
+        assert add_habit(client, user_id, 'Бег').status_code == 200
+
+
+def test_lazy_loading_keeps_few_users(make_client):
+    with make_client() as client:
+        first, second = register(client, 'Иван'), register(client, 'Анна')
+        add_habit(client, first, 'Чтение')
+        add_habit(client, second, 'Бег')
+        client.post('/habits/Чтение/mark/05-11-2025')
+    with make_client(mode='lazy', max_users=1) as client:
+        assert fastapi_model.registry.users == {}
+        assert client.get('/habits/Чтение/check/05-11-2025').json() is True
+        assert client.get('/habits/Бег/rate').status_code == 200
+        assert list(fastapi_model.registry.users) == [parse_id(second)]
+        assert client.get('/habits/Чтение/check/05-11-2025', params={'user_id': first}).json() is True
+
+
+def test_habit_stats(client):
+    user_id = register(client)
+    add_habit(client, user_id)
+    for day in ('01-11-2025', '02-11-2025', '03-11-2025', '10-11-2025'):
+        client.post(f'/habits/Чтение/mark/{day}')
+    client.delete('/habits/Чтение/mark/02-11-2025')
+    stats = client.get('/habits/Чтение/stats').json()
+    assert (stats['completed'], stats['longest_streak']) == (3, 1)
+    assert stats['scheduled_days'] == 30
+    assert stats['monthly'] == {'2025-11': 3}
+    assert client.get(f'/users/{user_id}/stats').json() == [stats]
+    assert len(client.get('/records/').json()) == 3
+
+
+@pytest.mark.parametrize('mode', ['eager', 'lazy'])
+def test_stats_rows_that_disagree_with_the_records_are_counted_again(make_client, tmp_path, mode):
+    with make_client(mode=mode) as client:
+        user_id = register(client)
+        for name in ('Чтение', 'Бег', 'Сон', 'Йога'):
+            add_habit(client, user_id, name)
+            for day in ('01-11-2025', '02-11-2025', '05-11-2025'):
+                client.post(f'/habits/{name}/mark/{day}')
+    with sqlite3.connect(tmp_path / 'habits.db') as conn:
+        titles = "habit_id IN (SELECT id FROM habits WHERE title = '{}')".format
+        conn.execute(f"UPDATE habit_stats SET completed = 999 WHERE {titles('Чтение')}")
+        # a row that still counts a mark which was rolled back
+        conn.execute(f"UPDATE habit_stats SET runs = '[[0, 1], [4, 5]]' WHERE {titles('Бег')}")
+        # a row written before the runs were stored
+        conn.execute(f"UPDATE habit_stats SET runs = NULL WHERE {titles('Сон')}")
+        # a row with the right totals and a wrong latest run
+        conn.execute(f"UPDATE habit_stats SET runs = '[[2, 4]]' WHERE {titles('Йога')}")
+    with make_client(mode=mode) as client:
+        for name in ('Чтение', 'Бег', 'Сон', 'Йога'):
+            stats = client.get(f'/habits/{name}/stats').json()
+            assert (stats['completed'], stats['longest_streak']) == (3, 2)
+        client.post('/habits/Чтение/mark/03-11-2025')
+        assert client.get('/habits/Чтение/stats').json()['longest_streak'] == 3
+
+
+def test_habit_charts(client):
+    user_id = register(client)
+    add_habit(client, user_id)
+    client.post('/habits/Чтение/mark/03-11-2025')
+    response = client.get('/habits/Чтение/charts/calendar')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'image/png'
+    assert client.get('/habits/Чтение/charts/trend', params={'format': 'svg'}).headers['content-type'] == 'image/svg+xml'
+    assert client.get('/habits/Чтение/charts/bars').status_code == 422
+    assert client.get('/habits/Нет/charts/pie').status_code == 404
@@ -0,0 +1,65 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.habit_tracker.analytics.fleet import FleetAnalytics
+from src.habit_tracker.trackers_main_classes import Habit
+
+
+def make_habits(count, seed=7):
+    rng = random.Random(seed)
+    habits = []
+    for index in range(count):
+        start = date(2025, 1, 1) + timedelta(days=rng.randrange(120))
+        end = start + timedelta(days=rng.randrange(60))
+        habit = Habit(f'Привычка {index}', 'каждый день', start, end, str(index))
+        for _ in range(rng.randrange(40)):
+            habit.mark_day(start + timedelta(days=rng.randrange(-5, 65)))
+        habits.append(habit)
+    return habits
+
+
+def test_matches_per_object_methods():
+    habits = make_habits(300)
+    fleet = FleetAnalytics.from_habits(habits)
+    today = date(2025, 3, 1)
+    assert fleet.completion_rates().tolist() == [habit.completion_rate() for habit in habits]
+    assert fleet.longest_streaks().tolist() == [habit.stats.longest_streak for habit in habits]
+    assert fleet.current_streaks(today).tolist() == [habit.stats.current_streak(today, habit.end_day) for habit in habits]
+
+
+def test_weekday_distribution_and_cohorts():
+    habits = make_habits(50)
+    fleet = FleetAnalytics.from_habits(habits)
+    weekdays = fleet.weekday_distribution()
+    assert weekdays.sum(axis=1).tolist() == [len(habit.completed_days) for habit in habits]
+    expected = [sum(day.weekday() == 2 for day in habit.completed_days) for habit in habits]
+    assert weekdays[:, 2].tolist() == expected
+    cohorts = fleet.cohort_percentiles()
+    march = [habit.completion_rate() for habit in habits if habit.start_day.month == 3]
+    assert np.allclose(cohorts['2025-03'], np.percentile(march, (25, 50, 75, 90)))
+
+
+def test_duplicates_and_days_outside_period_are_dropped():
+    fleet = FleetAnalytics(['a'], np.array([10]), np.array([19]), np.array([0, 0, 0, 0]), np.array([9, 10, 10, 11]))
+    assert fleet.completed().tolist() == [2]
+    assert fleet.longest_streaks().tolist() == [2]
+
+
+def test_mixed_frequencies_match_per_object_methods():
+    frequencies = ('по вторникам', 'пн, ср, пт', 'каждые 3 дня', 'через день', 'по выходным')
+    habits = make_habits(200)
+    for index, habit in enumerate(habits):
+        mixed = Habit(habit.habit_name, frequencies[index % 5], habit.start_day, habit.end_day, str(index))
+        for day in habit.completed_days:
+            mixed.mark_day(day)
+        habits[index] = mixed
+    fleet = FleetAnalytics.from_habits(habits)
+    today = date(2025, 3, 1)
+    assert fleet.completion_rates().tolist() == [habit.completion_rate() for habit in habits]
+    assert fleet.longest_streaks().tolist() == [habit.stats.longest_streak for habit in habits]
+    assert fleet.current_streaks(today).tolist() == [habit.stats.current_streak(today, habit.end_day) for habit in habits]
+    assert fleet.due_on(today).tolist() == [
+        habit.start_day <= today <= habit.end_day and habit.is_due(today) for habit in habits
+    ]
@@ -0,0 +1,45 @@
+import asyncio
+from datetime import date
+
+from src.habit_tracker.trackers_main_classes import Habit
+from src.habit_tracker.visualisation.graphics import GraphicsAnalytics
+from src.habit_tracker.visualisation.rendering import ChartRenderer
+
+
+def make_habit():
+    habit = Habit('Чтение', 'каждый день', '01-11-2025', '30-11-2025', 'u1')
+    for day in (1, 2, 3, 10):
+        habit.mark_day(date(2025, 11, day))
+    return habit
+
+
+def test_render_every_chart():
+    graphics = GraphicsAnalytics(make_habit())
+    for kind in ('pie', 'calendar', 'trend'):
+        assert graphics.render(kind).startswith(b'\x89PNG')
+        assert b'<svg' in graphics.render(kind, 'svg')
+
+
+def test_version_changes_with_completions():
+    habit = make_habit()
+    version = habit.version
+    assert not habit.mark_day(date(2025, 11, 1))
+    assert habit.version == version
+    habit.unmark_day(date(2025, 11, 1))
+    assert habit.version > version
+
+
+def test_renderer_caches_until_habit_changes():
+    async def scenario():
+        renderer = ChartRenderer(cache_size=2)
+        habit = make_habit()
+        first, second = await asyncio.gather(renderer.render(habit, 'pie'), renderer.render(habit, 'pie'))
+        cached = await renderer.render(habit, 'pie')
+        habit.mark_day(date(2025, 11, 20))
+        changed = await renderer.render(habit, 'pie')
+        renderer.close()
+        return first, second, cached, changed
+
+    first, second, cached, changed = asyncio.run(scenario())
+    assert first is second is cached
+    assert changed != first
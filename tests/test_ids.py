@@ -0,0 +1,26 @@
+from uuid import uuid4
+
+import pytest
+
+from src.habit_tracker.ids import format_id, new_id, parse_id
+from src.habit_tracker.trackers_main_classes import Habit, Record, User
+
+
+@pytest.mark.parametrize('text', [str(uuid4()), '1f0a9c2b', 'Пользователь', '', str(uuid4()).upper()])
+def test_ids_round_trip(text):
+    assert format_id(parse_id(text)) == text
+
+
+def test_uuid_and_other_ids_do_not_collide():
+    uuid_text = str(uuid4())
+    assert parse_id(uuid_text) != parse_id(uuid_text.replace('-', ''))
+    assert format_id(new_id()) != format_id(new_id())
+
+
+def test_domain_objects_have_no_instance_dict():
+    user = User('Иван')
+    habit = Habit('Бег', 'каждый день', '01-11-2025', '30-11-2025', user.user_id)
+    record = Record(habit, habit.start_day)
+    for instance in (user, habit, record):
+        assert not hasattr(instance, '__dict__')
+    assert habit.records == []
@@ -0,0 +1,12 @@
+import subprocess
+import sys
+
+
+def test_app_import_does_not_load_heavy_packages():
+    code = (
+        'import sys\n'
+        'import src.habit_tracker.models.fastapi_model\n'
+        "print(sorted(name for name in ('matplotlib', 'numpy', 'vaderSentiment') if name in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
@@ -0,0 +1,55 @@
+import logging
+
+from src.habit_tracker.models import fastapi_model, queries
+from src.habit_tracker.models.metrics import Histogram, statement_name
+
+
+def samples(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency_seconds', 'Latency.', ('route',), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(('/',), value)
+    lines = samples('\n'.join(histogram.render()))
+    assert lines['latency_seconds_bucket{route="/",le="0.1"}'] == '2'
+    assert lines['latency_seconds_bucket{route="/",le="1.0"}'] == '3'
+    assert lines['latency_seconds_bucket{route="/",le="+Inf"}'] == '4'
+    assert lines['latency_seconds_count{route="/"}'] == '4'
+    assert float(lines['latency_seconds_sum{route="/"}']) == 2.65
+
+
+def test_statement_name():
+    assert statement_name(queries.INSERT_USER) == 'insert_user'
+    assert statement_name('SELECT id FROM habits WHERE id > ? ORDER BY id LIMIT ?') == 'select_habits'
+    assert statement_name('transaction') == 'transaction'
+
+
+def test_metrics_endpoint(client, monkeypatch, caplog):
+    before = samples(client.get('/metrics').text)
+    user_id = client.post('/users/', params={'name': 'Иван'}).json()['user_id']
+    params = {'habits_name': 'Чтение', 'freq': 'каждый день', 'start_day': '01-11-2025', 'end_day': '30-11-2025'}
+    client.post(f'/users/{user_id}/habits/', params=params)
+    client.post('/habits/Чтение/mark/01-11-2025')
+    client.get('/habits/Бег/rate')
+    client.get('/habits/Бег/rate')
+    with caplog.at_level(logging.WARNING):
+        monkeypatch.setattr(fastapi_model.metrics, 'slow_request_s', 0)
+        client.get('/habits/Чтение/check/01-11-2025')
+
+    response = client.get('/metrics')
+    assert response.headers['content-type'].startswith('text/plain')
+    lines = samples(response.text)
+
+    def added(name):
+        return int(lines[name]) - int(before.get(name, 0))
+
+    assert added('habits_http_request_duration_seconds_count{method="POST",route="/users/"}') == 1
+    assert added('habits_http_not_found_total{method="GET",route="/habits/{habit_name}/rate"}') == 2
+    assert added('habits_sql_duration_seconds_count{statement="insert_mark"}') == 1
+    assert added('habits_sql_duration_seconds_count{statement="insert_user"}') == 1
+    assert lines['habits_resident_users'] == '1'
+    assert lines['habits_resident_habits'] == '1'
+    assert 'habits_cache_hits_total{cache="users"}' in lines
+    assert 'Slow request: GET /habits/Чтение/check/01-11-2025 200' in caplog.text
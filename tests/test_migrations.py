@@ -0,0 +1,71 @@
+import asyncio
+import sqlite3
+
+import aiosqlite
+
+from src.habit_tracker.models.data_base import SCHEMA
+from src.habit_tracker.models.migrations import MIGRATIONS, apply_migrations
+
+
+def migrate(db_path):
+    async def run():
+        async with aiosqlite.connect(db_path) as conn:
+            return await apply_migrations(conn)
+
+    return asyncio.run(run())
+
+
+def test_migrations_on_empty_database(tmp_path):
+    db_path = tmp_path / 'habits.db'
+    assert migrate(db_path) == [migration.version for migration in MIGRATIONS]
+    assert migrate(db_path) == []
+
+
+def test_legacy_records_are_normalized(tmp_path):
+    db_path = tmp_path / 'habits.db'
+    conn = sqlite3.connect(db_path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO habits VALUES ('h', 'Чтение', 'каждый день', '2025-12-01', '2025-12-31', NULL)")
+    conn.executemany(
+        'INSERT INTO records VALUES (?, ?, ?, ?, ?)',
+        [
+            ('a', '07-12-2025', None, None, 'h'),
+            ('b', '2025-12-07', 'все нормально', 'книга интересная', 'h'),
+            ('c', '05-12-2025', None, None, 'h'),
+            ('d', '05-12-2025', None, None, 'h'),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    migrate(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT id, date FROM records ORDER BY date').fetchall() == [
+        ('c', '2025-12-05'),
+        ('b', '2025-12-07'),
+    ]
+    indexes = {row[1] for row in conn.execute("SELECT * FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_records_habit_date', 'idx_habits_user_title', 'idx_records_date'} <= indexes
+    conn.close()
+
+
+def test_records_of_deleted_habits_are_dropped(tmp_path):
+    db_path = tmp_path / 'habits.db'
+    conn = sqlite3.connect(db_path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO habits VALUES ('h', 'Чтение', 'каждый день', '2025-12-01', '2025-12-31', NULL)")
+    conn.executemany(
+        'INSERT INTO records VALUES (?, ?, NULL, NULL, ?)',
+        [('a', '2025-12-05', 'h'), ('b', '2025-12-05', 'deleted'), ('c', '2025-12-06', None)],
+    )
+    conn.commit()
+    conn.close()
+
+    migrate(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT id FROM records').fetchall() == [('a',)]
+    conn.close()
@@ -0,0 +1,34 @@
+from src.habit_tracker.mood_analyzer import mood_analyzer
+from src.habit_tracker.mood_analyzer.mood_analyzer import UsersMood, classify, determine_moods
+from src.habit_tracker.trackers_main_classes import Habit, Record
+
+
+def make_records(*moods):
+    habit = Habit('Чтение', 'каждый день', '01-11-2025', '30-11-2025', '1')
+    return [Record(habit, '01-11-2025', mood) for mood in moods]
+
+
+def test_determine_mood():
+    record = make_records('хорошее')[0]
+    UsersMood().determine_mood(record)
+    assert record.mood == 'хорошее'
+
+
+def test_analyzer_is_shared():
+    assert UsersMood().analyzer is UsersMood().analyzer
+
+
+def test_determine_moods_scores_each_text_once():
+    classify.cache_clear()
+    records = make_records('хорошее', ' хорошее ', 'плохое', 'хорошее', 'так себе')
+    determine_moods(records)
+    assert [record.mood for record in records] == ['хорошее', 'хорошее', 'плохое', 'хорошее', 'нормальное']
+    assert classify.cache_info().misses == 3
+
+
+def test_determine_moods_in_processes(monkeypatch):
+    monkeypatch.setattr(mood_analyzer, 'PARALLEL_THRESHOLD', 1)
+    monkeypatch.setattr(mood_analyzer, 'CHUNK_SIZE', 1)
+    records = make_records('хорошее', 'плохое', 'так себе')
+    determine_moods(records, processes=2)
+    assert [record.mood for record in records] == ['хорошее', 'плохое', 'нормальное']
@@ -1,4 +1,4 @@
-from src.habit_tracker.motivation.motivation import Motivation
+from src.habit_tracker.motivation.motivation import Motivation, UserQuotes
 
 
 def test_give_random_quote():
@@ -9,4 +9,42 @@ def test_give_random_quote():
 def test_unique_quotes():
     motivation = Motivation()
     quotes = [motivation.give_random_quote() for _ in range(10)]
-    assert len(set(quotes)) == len(quotes)
\ No newline at end of file
+    assert len(set(quotes)) == len(quotes)
+
+def test_quotes_cycle_through_the_whole_deck():
+    motivation = Motivation()
+    first = [motivation.give_random_quote() for _ in motivation.quotes]
+    second = [motivation.give_random_quote() for _ in motivation.quotes]
+    assert sorted(first) == sorted(second) == sorted(motivation.quotes)
+    assert first[-1] != second[0]
+
+
+def test_quotes_file_is_read_once():
+    assert Motivation().quotes is Motivation().quotes
+
+
+def test_user_quotes_cycles_are_separate():
+    user_quotes = UserQuotes(max_users=2)
+    alice = [user_quotes.give_random_quote('alice') for _ in user_quotes.quotes]
+    bob = [user_quotes.give_random_quote('bob') for _ in user_quotes.quotes]
+    assert sorted(alice) == sorted(bob) == sorted(user_quotes.quotes)
+    assert len(set(user_quotes.give_random_quote('alice') for _ in range(10))) == 10
+
+
+def test_user_quotes_forget_least_recently_used_users():
+    user_quotes = UserQuotes(max_users=2)
+    deck = sorted(user_quotes.quotes)
+    half = len(deck) // 2
+    # a remembered user goes on with their cycle while another user gets quotes
+    seen = [user_quotes.give_random_quote('alice') for _ in range(half)]
+    user_quotes.give_random_quote('bob')
+    rest = [user_quotes.give_random_quote('alice') for _ in range(len(deck) - half)]
+    assert sorted(seen + rest) == deck
+
+    # a forgotten user starts a new cycle, so their next quotes are the whole deck again
+    seen = [user_quotes.give_random_quote('alice') for _ in range(half)]
+    user_quotes.give_random_quote('bob')
+    user_quotes.give_random_quote('carol')
+    again = [user_quotes.give_random_quote('alice') for _ in deck]
+    assert sorted(again) == deck
+    assert set(again[: len(deck) - half]) & set(seen)
@@ -0,0 +1,32 @@
+import pytest
+
+from src.habit_tracker.models.registry import AmbiguousHabitError, HabitRegistry
+from src.habit_tracker.trackers_main_classes import Habit, Record
+
+
+def make_habit(user_id, name='Бег'):
+    return Habit(name, 'каждый день', '01-11-2025', '30-11-2025', user_id)
+
+
+def test_find_habit_by_owner_and_name():
+    registry = HabitRegistry()
+    first, second = make_habit('1'), make_habit('2')
+    registry.add_habit(first)
+    registry.add_habit(second)
+    assert registry.find_habit('Бег', '2') is second
+    assert registry.get_habit(first.habit_id) is first
+    with pytest.raises(AmbiguousHabitError):
+        registry.find_habit('Бег')
+
+
+def test_remove_habit_drops_its_records():
+    registry = HabitRegistry()
+    habit = make_habit('1')
+    record = Record(habit, '01-11-2025')
+    habit.records = [record]
+    registry.add_habit(habit)
+    registry.add_record(record)
+    assert registry.get_record(record.record_id, habit) is record
+    registry.remove_habit(habit)
+    assert registry.find_habit('Бег') is None
+    assert registry.get_record(record.record_id, habit) is None
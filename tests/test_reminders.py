@@ -0,0 +1,105 @@
+import json
+import sqlite3
+from datetime import date, timedelta
+
+from src.habit_tracker.dates import format_day
+from src.habit_tracker.models.queries import SELECT_DUE_HABITS
+from src.habit_tracker.models.registry import HabitRegistry
+from src.habit_tracker.models.reminders import DueIndex
+from src.habit_tracker.trackers_main_classes import Habit, User
+from src.main import main
+from tests.test_fastapi_model import register
+
+MONDAY = date(2025, 11, 3)
+
+
+def due_names(index, user):
+    return [habit.habit_name for habit in index.digest(user.user_id)]
+
+
+def test_due_index_follows_days_and_completions():
+    registry = HabitRegistry()
+    index = DueIndex(registry)
+    registry.on_add_habit = index.add
+    user = User('Иван')
+    registry.add_user(user)
+    registry.add_habit(Habit('Бег', 'каждые 2 дня', MONDAY, MONDAY + timedelta(days=30), user.user_id))
+    registry.add_habit(Habit('Чтение', 'каждый день', MONDAY, MONDAY + timedelta(days=2), user.user_id))
+    index.rebuild(MONDAY.toordinal())
+    assert due_names(index, user) == ['Бег', 'Чтение']
+
+    # habits added later and completions are seen right away
+    late = Habit('Йога', 'every Tuesday', MONDAY, MONDAY + timedelta(days=30), user.user_id)
+    registry.add_habit(late)
+    registry.get_habit(next(iter(registry.habits_by_name['Бег']))).mark_day(MONDAY)
+    assert due_names(index, user) == ['Чтение']
+
+    index.advance(MONDAY.toordinal() + 1)
+    assert due_names(index, user) == ['Йога', 'Чтение']
+    registry.remove_habit(late)
+    assert due_names(index, user) == ['Чтение']
+
+    # a skipped day and the end of a habit
+    index.advance(MONDAY.toordinal() + 4)
+    assert due_names(index, user) == ['Бег']
+    assert list(index.digests()) == [(user.user_id, index.digest(user.user_id))]
+    # going back in time rebuilds the index
+    index.advance(MONDAY.toordinal() + 2)
+    assert due_names(index, user) == ['Бег', 'Чтение']
+
+
+def test_due_endpoint_and_outbox(make_client, tmp_path, capsys):
+    today = date.today()
+    with make_client() as client:
+        user_id = register(client)
+        idle = register(client, 'Пётр')
+        for name in ('Чтение', 'Зарядка'):
+            params = {
+                'habits_name': name,
+                'freq': 'каждый день',
+                'start_day': format_day(today - timedelta(days=3)),
+                'end_day': format_day(today + timedelta(days=3)),
+            }
+            client.post(f'/users/{user_id}/habits/', params=params)
+        due = client.get(f'/users/{user_id}/due').json()
+        assert due['day'] == format_day(today)
+        assert [habit['habit_name'] for habit in due['habits']] == ['Зарядка', 'Чтение']
+
+        client.post(f'/habits/Зарядка/mark/{format_day(today)}', params={'user_id': user_id})
+        assert [habit['habit_name'] for habit in client.get(f'/users/{user_id}/due').json()['habits']] == ['Чтение']
+        assert client.get(f'/users/{idle}/due').json()['habits'] == []
+        assert client.get('/users/unknown/due').status_code == 404
+
+    outbox = str(tmp_path / 'outbox.ndjson')
+    for day in (today, today - timedelta(days=1)):
+        main(['--db', str(tmp_path / 'habits.db'), 'digest', '--outbox', outbox, '--day', format_day(day)])
+        assert capsys.readouterr().out == f'wrote reminders for 1 users to {outbox}\n'
+    with open(outbox, encoding='utf-8') as file:
+        entries = [json.loads(line) for line in file]
+    assert [(entry['user_id'], entry['day']) for entry in entries] == [
+        (user_id, format_day(today)),
+        (user_id, format_day(today - timedelta(days=1))),
+    ]
+    assert [len(entry['habits']) for entry in entries] == [1, 2]
+
+
+def test_digest_reads_the_users_that_are_not_resident(make_client, tmp_path, capsys):
+    today = date.today()
+    params = {'freq': 'каждый день', 'start_day': format_day(today), 'end_day': format_day(today + timedelta(days=3))}
+    with make_client(mode='lazy', max_users=1, shards=2) as client:
+        users = [register(client, name) for name in ('Иван', 'Пётр', 'Анна')]
+        for user_id in users:
+            client.post(f'/users/{user_id}/habits/', params={'habits_name': f'Чтение {user_id}', **params})
+        client.post(f'/habits/Чтение {users[1]}/mark/{format_day(today)}', params={'user_id': users[1]})
+
+    outbox = str(tmp_path / 'outbox.ndjson')
+    main(['--db', str(tmp_path / 'habits.db'), '--shards', '2', 'digest', '--outbox', outbox])
+    assert capsys.readouterr().out == f'wrote reminders for 2 users to {outbox}\n'
+    with open(outbox, encoding='utf-8') as file:
+        entries = [json.loads(line) for line in file]
+    assert sorted(entry['user_id'] for entry in entries) == sorted([users[0], users[2]])
+
+    with sqlite3.connect(tmp_path / 'habits.db') as conn:
+        plan = ' '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + SELECT_DUE_HABITS, ('', '', '', '')))
+    assert 'idx_habits_end_date' in plan
+    assert 'idx_records_habit_date' in plan
@@ -0,0 +1,89 @@
+from src.habit_tracker.models import fastapi_model
+from src.habit_tracker.models.responses import ResponseCache, etag_matches
+from tests.test_fastapi_model import add_habit, register
+
+
+def test_etag_matches():
+    assert etag_matches('"a-1"', '"a-1"')
+    assert etag_matches('"a-0", W/"a-1"', '"a-1"')
+    assert etag_matches('*', '"a-1"')
+    assert not etag_matches('"a-0"', '"a-1"')
+    assert not etag_matches(None, '"a-1"')
+
+
+def test_rate_is_not_modified_until_a_mark(client):
+    add_habit(client, register(client))
+    first = client.get('/habits/Чтение/rate')
+    etag = first.headers['ETag']
+    assert client.get('/habits/Чтение/rate').json() == first.json()
+
+    not_modified = client.get('/habits/Чтение/rate', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+    assert not_modified.headers['ETag'] == etag
+
+    client.post('/habits/Чтение/mark/01-11-2025')
+    changed = client.get('/habits/Чтение/rate', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.json()['message'].endswith('3.33%')
+    assert client.get('/habits/Чтение/check/01-11-2025', headers={'If-None-Match': etag}).json() is True
+
+
+def test_listing_is_cached_until_a_write(client):
+    user_ids = sorted(register(client, f'Пользователь {i}') for i in range(3))
+    first = client.get('/users/', params={'limit': 2})
+    cached = client.get('/users/', params={'limit': 2})
+    assert cached.json() == first.json()
+    assert cached.headers['X-Next-Cursor'] == first.headers['X-Next-Cursor'] == user_ids[1]
+    assert fastapi_model.responses.hits == 1
+
+    etag = first.headers['ETag']
+    assert client.get('/users/', params={'limit': 2}, headers={'If-None-Match': etag}).status_code == 304
+    register(client, 'Новый')
+    assert len(client.get('/users/', headers={'If-None-Match': etag}).json()) == 4
+
+
+def test_listing_sees_queued_writes(make_client):
+    with make_client(write_mode='write-behind') as client:
+        add_habit(client, register(client))
+        assert client.get('/records/').json() == []
+        client.post('/habits/Чтение/mark/01-11-2025')
+        assert len(client.get('/records/').json()) == 1
+
+
+def test_cache_is_bounded_by_size():
+    responses = ResponseCache(cache_mb=1 / 1024)
+    for number in range(10):
+        responses.store(('page', number), 'x' * 200)
+    assert len(responses._cache) == 5
+    assert ('page', 9) in responses._cache
+    assert ('page', 0) not in responses._cache
+
+
+def test_history_of_a_habit_and_of_a_user(client):
+    user_id = register(client)
+    add_habit(client, user_id)
+    add_habit(client, user_id, 'Бег')
+    for day in ('01-11-2025', '02-11-2025', '04-11-2025'):
+        client.post(f'/habits/Чтение/mark/{day}')
+    params = {'date_from': '30-10-2025', 'date_to': '05-11-2025'}
+
+    history = client.get('/habits/Чтение/history', params=params)
+    habit = history.json()['habits'][0]
+    assert (habit['completed'], habit['scheduled']) == ('0011010', '0011111')
+    etag = history.headers['ETag']
+    assert client.get('/habits/Чтение/history', params=params, headers={'If-None-Match': etag}).status_code == 304
+
+    heatmap = client.get(f'/users/{user_id}/history', params={**params, 'encoding': 'rle'}).json()
+    assert [habit['habit_name'] for habit in heatmap['habits']] == ['Бег', 'Чтение']
+    assert heatmap['habits'][1]['completed'] == [2, 2, 1, 1, 1]
+    assert heatmap['habits'][0]['completed'] == [7]
+
+    client.post('/habits/Чтение/mark/05-11-2025')
+    changed = client.get('/habits/Чтение/history', params=params, headers={'If-None-Match': etag})
+    assert changed.json()['habits'][0]['completed'] == '0011011'
+
+    assert client.get('/habits/Чтение/history', params={'date_from': '05-11-2025', 'date_to': '01-11-2025'}).status_code == 422
+    assert client.get('/habits/Чтение/history', params={'date_to': '2025-11-05'}).status_code == 422
+    assert client.get('/users/unknown/history').status_code == 404
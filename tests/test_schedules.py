@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+from src.habit_tracker.schedules import DAILY, WORKDAYS, Schedule, compile_frequency
+
+
+def test_compile_frequency():
+    assert compile_frequency('каждый день') == DAILY
+    assert compile_frequency('как получится') == DAILY
+    assert compile_frequency('Every Tuesday') == Schedule(mask=0b10)
+    assert compile_frequency('по понедельникам и средам') == Schedule(mask=0b101)
+    assert compile_frequency('пн, ср, пт') == Schedule(mask=0b10101)
+    assert compile_frequency('по будням') == Schedule(mask=WORKDAYS)
+    assert compile_frequency('каждые 3 дня') == Schedule(interval=3)
+    assert compile_frequency('every 2 weeks') == Schedule(interval=14)
+    assert compile_frequency('через день') == Schedule(interval=2)
+    assert compile_frequency('раз в неделю') == Schedule(interval=7)
+
+
+def test_count_between_matches_brute_force():
+    first = date(2025, 1, 1).toordinal()
+    for schedule in (Schedule(mask=0b1000101), Schedule(mask=WORKDAYS), Schedule(interval=3).anchored(first + 2)):
+        for last in range(first, first + 40):
+            expected = sum(schedule.is_scheduled(day) for day in range(first, last + 1))
+            assert schedule.count_between(first, last) == expected
+
+
+def test_day_at_and_next_day():
+    schedule = compile_frequency('по вторникам и пятницам')
+    day = date(2025, 11, 1)
+    scheduled = [day + timedelta(days=offset) for offset in range(30)]
+    scheduled = [current.toordinal() for current in scheduled if current.weekday() in (1, 4)]
+    for ordinal in scheduled:
+        assert schedule.day_at(schedule.position(ordinal)) == ordinal
+    assert schedule.next_day(day.toordinal()) == date(2025, 11, 4).toordinal()
+    assert schedule.next_day(date(2025, 11, 4).toordinal()) == date(2025, 11, 4).toordinal()
+
+
+def test_bits_between_matches_brute_force():
+    first = date(2025, 1, 1).toordinal()
+    for schedule in (Schedule(mask=0b1000101), Schedule(mask=WORKDAYS), Schedule(interval=3).anchored(first + 2)):
+        for start in range(first, first + 9):
+            for last in range(start, start + 40):
+                expected = sum(schedule.is_scheduled(day) << (day - start) for day in range(start, last + 1))
+                assert schedule.bits_between(start, last) == expected
@@ -0,0 +1,106 @@
+import sqlite3
+import uuid
+
+from src.habit_tracker.models.sharding import shard_index, shard_paths
+from src.main import main
+from tests.test_fastapi_model import add_habit, register
+
+
+def stored_users(path):
+    with sqlite3.connect(path) as conn:
+        return {row[0] for row in conn.execute('SELECT id FROM users')}
+
+
+def test_shard_index_moves_only_to_new_shards():
+    # fixed ids, so that the share of the moved users does not depend on the run
+    user_ids = [str(uuid.uuid5(uuid.NAMESPACE_OID, str(number))) for number in range(2000)]
+    for count in (1, 2, 3, 7):
+        before = [shard_index(user_id, count) for user_id in user_ids]
+        after = [shard_index(user_id, count + 1) for user_id in user_ids]
+        assert all(0 <= index < count for index in before)
+        assert all(old == new or new == count for old, new in zip(before, after))
+        assert 0 < sum(new == count for new in after) < len(user_ids) / count
+    assert shard_paths('data/habits.db', 3) == ['data/habits.db', 'data/habits.1.db', 'data/habits.2.db']
+
+
+def test_users_are_routed_to_their_shards(make_client, tmp_path):
+    with make_client(shards=3) as client:
+        user_ids = [register(client, f'Пользователь {number}') for number in range(12)]
+        for user_id in user_ids:
+            add_habit(client, user_id)
+            client.post('/habits/Чтение/mark/01-11-2025', params={'user_id': user_id})
+        items = [{'habit_name': 'Чтение', 'day': '02-11-2025', 'user_id': user_id} for user_id in user_ids]
+        assert client.post('/records/batch/', json={'items': items}).json()['created'] == 12
+
+        # the listings merge the shards by id and page across them
+        listed = []
+        params = {'limit': 5}
+        while True:
+            page = client.get('/users/', params=params)
+            listed += [row[0] for row in page.json()]
+            if 'X-Next-Cursor' not in page.headers:
+                break
+            params['cursor'] = page.headers['X-Next-Cursor']
+        assert listed == sorted(user_ids)
+        streamed = client.get('/records/', params={'format': 'ndjson', 'limit': 7}).text.splitlines()
+        assert len(streamed) == 7
+
+    paths = shard_paths(str(tmp_path / 'habits.db'), 3)
+    for number, path in enumerate(paths):
+        assert stored_users(path) == {user_id for user_id in user_ids if shard_index(user_id, 3) == number}
+
+    with make_client(shards=3) as client:
+        assert client.get('/habits/Чтение/stats', params={'user_id': user_ids[5]}).json()['completed'] == 2
+        exported = client.get(f'/users/{user_ids[5]}/export').text.splitlines()
+        assert len(exported) == 4
+
+
+def test_rebalance_between_shard_counts(make_client, tmp_path, capsys):
+    with make_client(shards=1) as client:
+        user_ids = [register(client, f'Пользователь {number}') for number in range(20)]
+        for user_id in user_ids:
+            add_habit(client, user_id)
+            client.post('/habits/Чтение/mark/01-11-2025', params={'user_id': user_id})
+
+    db_path = str(tmp_path / 'habits.db')
+    for old_count, new_count in ((1, 3), (3, 2)):
+        main(['--db', db_path, 'rebalance', str(old_count), str(new_count)])
+        moved = sum(shard_index(user_id, old_count) != shard_index(user_id, new_count) for user_id in user_ids)
+        assert capsys.readouterr().out == f'moved {moved} users from {old_count} to {new_count} shards\n'
+        for number, path in enumerate(shard_paths(db_path, new_count)):
+            assert stored_users(path) == {u for u in user_ids if shard_index(u, new_count) == number}
+
+    with make_client(shards=2) as client:
+        assert len(client.get('/users/').json()) == 20
+        assert len(client.get('/records/').json()) == 20
+        for user_id in user_ids:
+            assert client.get('/habits/Чтение/check/01-11-2025', params={'user_id': user_id}).json() is True
+    # nothing is left on the drained shard
+    assert stored_users(shard_paths(db_path, 3)[2]) == set()
+
+
+def test_rebalance_leaves_nothing_of_the_moved_users(make_client, tmp_path, capsys):
+    with make_client(shards=1) as client:
+        user_ids = [register(client, f'Пользователь {number}') for number in range(10)]
+        for user_id in user_ids:
+            for name in ('Чтение', 'Бег'):
+                add_habit(client, user_id, name)
+                client.post(f'/habits/{name}/mark/01-11-2025', params={'user_id': user_id})
+            client.delete(f'/users/{user_id}/habits/Бег')
+
+    db_path = str(tmp_path / 'habits.db')
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM records').fetchone() == (10,)
+    main(['--db', db_path, 'rebalance', '1', '3'])
+    capsys.readouterr()
+    moved = [user_id for user_id in user_ids if shard_index(user_id, 3) != 0]
+    marks = ','.join('?' * len(moved))
+    with sqlite3.connect(db_path) as conn:
+        for query in (
+            f'SELECT COUNT(*) FROM users WHERE id IN ({marks})',
+            f'SELECT COUNT(*) FROM habits WHERE user_id IN ({marks})',
+            'SELECT COUNT(*) FROM records WHERE habit_id NOT IN (SELECT id FROM habits)',
+            'SELECT COUNT(*) FROM habit_stats WHERE habit_id NOT IN (SELECT id FROM habits)',
+        ):
+            assert conn.execute(query, moved if '?' in query else ()).fetchone() == (0,)
+        assert conn.execute('SELECT COUNT(*) FROM records').fetchone() == (len(user_ids) - len(moved),)
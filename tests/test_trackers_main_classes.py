@@ -44,4 +44,18 @@ def test_record_update_notes():
     habit = Habit('Чтение', 'каждый день', '01-11-2025', '30-11-2025', '1')
     record = Record(habit, '30-11-2025')
     record.update_notes('Книга интересная')
-    assert record.notes == 'Книга интересная'
\ No newline at end of file
+    assert record.notes == 'Книга интересная'
+def test_habit_completion_mark_twice():
+    habit = Habit('Чтение', 'каждый день', '01-11-2025', '30-11-2025','1')
+    habit.completion_mark('05-11-2025')
+    habit.completion_mark('05-11-2025')
+    assert habit.completion_rate() == 3.33
+
+def test_habit_completion_rate_over_scheduled_days():
+    habit = Habit('Йога', 'по вторникам', '01-11-2025', '30-11-2025', '1')
+    assert habit.scheduled_days() == 4
+    assert habit.is_due(date(2025, 11, 4)) is True
+    assert habit.is_due(date(2025, 11, 5)) is False
+    for day in ('04-11-2025', '11-11-2025', '18-11-2025', '25-11-2025', '26-11-2025'):
+        habit.completion_mark(day)
+    assert habit.completion_rate() == 100.0
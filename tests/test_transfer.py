@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from src.main import main
+from tests.test_fastapi_model import add_habit, register
+
+
+def history(client):
+    user_id = register(client)
+    add_habit(client, user_id)
+    add_habit(client, user_id, 'Бег')
+    for day in ('01-11-2025', '02-11-2025', '03-11-2025'):
+        client.post(f'/habits/Чтение/mark/{day}')
+    params = {'day': '04-11-2025', 'mood': 'хорошее, "бодрое"', 'notes': 'первая строка\nвторая строка'}
+    client.post('/habits/Чтение/records/', params=params)
+    return user_id
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson'])
+def test_export_and_import_between_databases(make_client, fmt):
+    with make_client() as client:
+        user_id = history(client)
+        exported = client.get(f'/users/{user_id}/export', params={'format': fmt})
+        assert exported.headers['content-type'].startswith('text/csv' if fmt == 'csv' else 'application/x-ndjson')
+        assert client.get('/users/unknown/export').status_code == 404
+        stats = sorted(client.get(f'/users/{user_id}/stats').json(), key=lambda habit: habit['habit_id'])
+
+    with make_client(db_name='copy.db') as client:
+        result = client.post('/users/import', params={'format': fmt}, content=exported.content).json()
+        assert result == {'lines': 7, 'users': 1, 'habits': 2, 'records': 4, 'rejected': 0, 'issues': []}
+        # the imported data is served right away
+        assert sorted(client.get(f'/users/{user_id}/stats').json(), key=lambda habit: habit['habit_id']) == stats
+        assert client.get('/habits/Чтение/check/02-11-2025').json() is True
+        record = next(row for row in client.get('/records/').json() if row[1] == '2025-11-04')
+        assert record[2:4] == ['хорошее, "бодрое"', 'первая строка\nвторая строка']
+
+        # the users and habits are upserted by their ids and the records by their habits and days,
+        # so a repeated import changes nothing
+        assert client.post('/users/import', params={'format': fmt}, content=exported.content).json()['records'] == 4
+        assert len(client.get('/records/').json()) == 4
+
+
+def test_import_reports_invalid_lines_and_resumes(client):
+    user_id = history(client)
+    habit_id = next(row[0] for row in client.get('/habits/', params={'user_id': user_id}).json() if row[1] == 'Чтение')
+    lines = [
+        {'kind': 'record', 'id': 'r1', 'habit_id': habit_id, 'date': '2025-11-10'},
+        {'kind': 'record', 'id': 'r2', 'habit_id': habit_id, 'date': '10-11-2025'},
+        {'kind': 'record', 'id': 'r3', 'habit_id': habit_id, 'date': '2026-01-01'},
+        {'kind': 'record', 'id': 'r4', 'habit_id': 'unknown', 'date': '2025-11-10'},
+        {'kind': 'habit', 'id': 'h1', 'user_id': user_id, 'name': 'Бег', 'start_date': '2025-11-01'},
+        {'kind': 'habit', 'id': 'h2', 'user_id': user_id, 'name': 'Бег', 'frequency': 'daily',
+         'start_date': '2025-11-01', 'end_date': '2025-11-30'},
+        {'kind': 'record', 'id': 'r5', 'habit_id': habit_id, 'date': '2025-11-11'},
+    ]
+    body = '\n'.join(json.dumps(line) for line in lines) + '\nnot json\n'
+
+    result = client.post('/users/import', content=body.encode()).json()
+    assert result['lines'] == 8
+    assert result['records'] == 2
+    assert [issue['line'] for issue in result['issues']] == [2, 3, 4, 5, 6, 8]
+    assert result['issues'][-2]['message'] == "Привычка 'Бег' уже существует"
+
+    resumed = client.post('/users/import', params={'skip': 6}, content=body.encode()).json()
+    assert (resumed['lines'], resumed['records'], resumed['rejected']) == (8, 1, 1)
+    assert client.get('/habits/Чтение/check/11-11-2025').json() is True
+
+
+def test_import_rejects_taken_record_ids(client):
+    user_id = history(client)
+    habits = {row[1]: row[0] for row in client.get('/habits/', params={'user_id': user_id}).json()}
+    taken = next(row[0] for row in client.get('/records/').json() if row[1] == '2025-11-01')
+    lines = [
+        {'kind': 'record', 'id': 'r1', 'habit_id': habits['Чтение'], 'date': '2025-11-20'},
+        {'kind': 'record', 'id': taken, 'habit_id': habits['Чтение'], 'date': '2025-11-21'},
+        {'kind': 'record', 'id': taken, 'habit_id': habits['Бег'], 'date': '2025-11-01'},
+        {'kind': 'record', 'id': 'r2', 'habit_id': habits['Бег'], 'date': '2025-11-22'},
+    ]
+    body = '\n'.join(json.dumps(line) for line in lines)
+
+    result = client.post('/users/import', content=body.encode()).json()
+    assert (result['records'], result['rejected']) == (2, 2)
+    assert [issue['line'] for issue in result['issues']] == [2, 3]
+    assert result['issues'][0]['message'] == 'Запись с таким id уже есть у другой привычки или даты'
+    assert client.get('/habits/Чтение/check/01-11-2025').json() is True
+    assert client.get('/habits/Чтение/check/20-11-2025').json() is True
+    assert client.get('/habits/Бег/check/01-11-2025').json() is False
+    assert client.get('/habits/Бег/check/22-11-2025').json() is True
+
+
+def test_export_resumes_after_cursor(client):
+    user_id = history(client)
+    lines = client.get(f'/users/{user_id}/export').text.splitlines()
+    records = [json.loads(line) for line in lines if json.loads(line)['kind'] == 'record']
+    resumed = client.get(f'/users/{user_id}/export', params={'cursor': records[1]['id']}).text.splitlines()
+    assert [json.loads(line) for line in resumed] == records[2:]
+
+
+def test_command_line_export_and_import(make_client, tmp_path, capsys):
+    with make_client() as client:
+        user_id = history(client)
+    exported = tmp_path / 'history.csv'
+    main(['--db', str(tmp_path / 'habits.db'), 'export', user_id, '--output', str(exported)])
+    assert exported.read_text(encoding='utf-8').startswith('kind,id,user_id')
+
+    checkpoint = tmp_path / 'history.checkpoint'
+    main(['--db', str(tmp_path / 'copy.db'), 'import', str(exported), '--checkpoint', str(checkpoint), '--chunk-size', '2'])
+    assert json.loads(capsys.readouterr().out)['records'] == 4
+    assert not checkpoint.exists()
+
+    with make_client(db_name='copy.db') as client:
+        assert client.get('/habits/Бег/rate').status_code == 200
+        assert client.get('/habits/Чтение/stats').json()['completed'] == 4
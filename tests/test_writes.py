@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from src.habit_tracker.models import fastapi_model
+from src.habit_tracker.models.storage import ConnectionPool
+from src.habit_tracker.models.writes import WriteBehind
+from tests.test_fastapi_model import add_habit, register
+
+
+def test_write_behind_survives_restart(make_client):
+    with make_client(write_mode='write-behind') as client:
+        user_id = register(client)
+        add_habit(client, user_id)
+        for day in ('01-11-2025', '02-11-2025', '03-11-2025'):
+            assert client.post(f'/habits/Чтение/mark/{day}').status_code == 200
+        client.delete('/habits/Чтение/mark/02-11-2025')
+        # the listings wait for the queued writes
+        assert len(client.get('/records/').json()) == 2
+        marked = client.post('/habits/Чтение/mark/04-11-2025', params={'durable': True})
+        assert marked.status_code == 200
+        client.post('/habits/Чтение/mark/05-11-2025')
+    with make_client() as client:
+        assert client.get('/habits/Чтение/stats').json()['completed'] == 4
+        assert client.get('/habits/Чтение/check/05-11-2025').json() is True
+
+
+def test_record_on_marked_day_keeps_stored_id(make_client):
+    with make_client(write_mode='write-behind') as client:
+        add_habit(client, register(client))
+        client.post('/habits/Чтение/mark/01-11-2025')
+        created = client.post('/habits/Чтение/records/', params={'day': '01-11-2025', 'mood': 'хорошее'}).json()
+        fresh = client.post('/habits/Чтение/records/', params={'day': '02-11-2025'}).json()
+        again = client.post('/habits/Чтение/records/', params={'day': '02-11-2025', 'notes': 'ещё'}).json()
+        stored = {row[0] for row in client.get('/records/').json()}
+    assert {created['record_id'], fresh['record_id']} == stored
+    assert again['record_id'] == fresh['record_id']
+
+
+def test_failed_write_does_not_undo_its_group(tmp_path):
+    async def scenario():
+        db = ConnectionPool(str(tmp_path / 'habits.db'))
+        await db.open()
+        writes = WriteBehind(db, 'write-behind', flush_ms=50)
+        writes.start()
+
+        def insert(user_id):
+            return lambda conn: conn.execute('INSERT INTO users VALUES (?, ?)', (user_id, 'Иван'))
+
+        results = await asyncio.gather(
+            writes.submit(insert('a')),
+            writes.submit(insert('a')),
+            writes.submit(insert('b'), durable=False),
+            return_exceptions=True,
+        )
+        await writes.close()
+        rows = await db.fetch_all('SELECT id FROM users ORDER BY id')
+        await db.close()
+        return results, rows
+
+    results, rows = asyncio.run(scenario())
+    assert results[0] is not None
+    assert isinstance(results[1], Exception)
+    assert results[2] is None
+    assert rows == [('a',), ('b',)]
+
+
+def test_cancelled_and_failed_writes_keep_the_queue_running(tmp_path):
+    async def scenario():
+        db = ConnectionPool(str(tmp_path / 'habits.db'))
+        await db.open()
+        writes = WriteBehind(db, 'write-behind', flush_ms=50)
+        repaired = []
+
+        async def repair(user_ids):
+            await writes.sync()
+            repaired.append(user_ids)
+
+        writes.on_failed = repair
+        writes.start()
+        insert = 'INSERT INTO users VALUES (?, ?)'
+        # the client of a durable write disconnects before its group is committed
+        cancelled = asyncio.create_task(writes.execute(insert, ('a', 'Иван')))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await writes.execute(insert, ('a', 'Иван'), durable=False, users=('a',))
+        await asyncio.wait_for(writes.sync(), 1)
+        await asyncio.wait_for(writes.execute(insert, ('b', 'Пётр')), 1)
+        await writes.close()
+        rows = await db.fetch_all('SELECT id FROM users ORDER BY id')
+        await db.close()
+        return rows, repaired
+
+    rows, repaired = asyncio.run(scenario())
+    assert rows == [('a',), ('b',)]
+    assert repaired == [{'a'}]
+
+
+def test_unknown_write_mode():
+    with pytest.raises(ValueError):
+        WriteBehind(fastapi_model.db, 'sometimes')